@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Sequence
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from browser_use.agent.llm_cache.views import IMAGE_DATA_URL_PATTERN, LLMCacheConfig, LLMCacheMissError
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache(BaseCache):
+	"""
+	Disk-backed (SQLite) cache of chat model responses, for replays, tests and evals.
+
+	Entries are keyed by a hash of the model with all its parameters and the serialized messages, after removing
+	volatile prompt parts like the timestamp line. The cache plugs into the langchain cache hook, so every non-streamed
+	model call is covered: agent steps, the planner, output validation and extract_content.
+
+	Example:
+		cache = LLMResponseCache(LLMCacheConfig(mode='replay'))
+		agent = Agent(task=task, llm=llm, llm_cache=cache)
+
+		# or for every model of the process
+		langchain_core.globals.set_llm_cache(cache)
+	"""
+
+	def __init__(self, config: LLMCacheConfig | None = None):
+		self.config = config or LLMCacheConfig()
+		self.hits = 0
+		self.misses = 0
+
+		self._volatile_patterns = [re.compile(pattern) for pattern in self.config.volatile_patterns]
+		if self.config.ignore_images:
+			self._volatile_patterns.append(re.compile(IMAGE_DATA_URL_PATTERN))
+
+		self.config.path.parent.mkdir(parents=True, exist_ok=True)
+		# lookups of ainvoke calls run in executor threads, the connection is shared behind a lock
+		self._lock = threading.Lock()
+		self._connection = sqlite3.connect(str(self.config.path), check_same_thread=False)
+		with self._lock:
+			self._connection.execute('PRAGMA journal_mode=WAL')
+			self._connection.execute(
+				'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, generations TEXT NOT NULL, created_at REAL NOT NULL)'
+			)
+			self._connection.commit()
+
+	def cache_key(self, prompt: str, llm_string: str) -> str:
+		"""Canonical hash of a model call, prompt is the serialized message list and llm_string the model with its parameters"""
+		for pattern in self._volatile_patterns:
+			prompt = pattern.sub('<volatile>', prompt)
+		return hashlib.sha256(f'{llm_string}\0{prompt}'.encode()).hexdigest()
+
+	def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+		if self.config.mode == 'record':
+			return None
+
+		key = self.cache_key(prompt, llm_string)
+		with self._lock:
+			row = self._connection.execute('SELECT generations FROM responses WHERE key = ?', (key,)).fetchone()
+
+		if row is None:
+			self.misses += 1
+			if self.config.mode == 'replay':
+				raise LLMCacheMissError(f'No recorded LLM response for key {key[:16]} in {self.config.path}')
+			return None
+
+		self.hits += 1
+		logger.debug(f'💾 LLM response cache hit {key[:16]}')
+		return loads(row[0])
+
+	def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+		if self.config.mode == 'replay':
+			return
+
+		key = self.cache_key(prompt, llm_string)
+		generations = dumps(list(return_val))
+		with self._lock:
+			self._connection.execute(
+				'INSERT OR REPLACE INTO responses (key, generations, created_at) VALUES (?, ?, ?)',
+				(key, generations, time.time()),
+			)
+			self._connection.commit()
+
+	def clear(self, **kwargs: Any) -> None:
+		with self._lock:
+			self._connection.execute('DELETE FROM responses')
+			self._connection.commit()
+
+	def close(self) -> None:
+		with self._lock:
+			self._connection.close()
+
+	def attach(self, llms: Sequence[Any]) -> None:
+		"""Use this cache for the given models, models that already have a cache configured keep it"""
+		for llm in llms:
+			if llm is not None and getattr(llm, 'cache', None) is None:
+				llm.cache = self
@@ -0,0 +1,35 @@
+from pathlib import Path
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from browser_use.utils import xdg_cache_home
+
+# read_through: answer from the cache, call the model (and store the response) on a miss
+# record: always call the model and store the response, e.g. to refresh recorded runs
+# replay: only answer from the cache, a miss raises LLMCacheMissError instead of calling the model
+LLMCacheMode = Literal['read_through', 'record', 'replay']
+
+# Parts of prompts that change between otherwise identical runs, replaced before hashing.
+# Matches the timestamp line of AgentMessagePrompt.
+DEFAULT_VOLATILE_PATTERNS = [r'Current date and time: \d{4}-\d{2}-\d{2} \d{2}:\d{2}']
+
+IMAGE_DATA_URL_PATTERN = r'data:image/[a-zA-Z]+;base64,[A-Za-z0-9+/=]+'
+
+
+class LLMCacheConfig(BaseModel):
+	"""Configuration for the LLM response cache."""
+
+	model_config = ConfigDict(from_attributes=True, validate_default=True)
+
+	mode: LLMCacheMode = 'read_through'
+	path: Path = Field(default_factory=lambda: xdg_cache_home() / 'browser_use' / 'llm_cache.sqlite3')
+
+	# regexes of volatile prompt parts that are left out of the cache key
+	volatile_patterns: list[str] = Field(default_factory=lambda: list(DEFAULT_VOLATILE_PATTERNS))
+	# leave screenshots out of the cache key, so that vision runs hit the cache although pages render slightly differently
+	ignore_images: bool = False
+
+
+class LLMCacheMissError(Exception):
+	"""Raised in replay mode when a model call has no recorded response"""
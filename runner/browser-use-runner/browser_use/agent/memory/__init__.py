@@ -1,4 +1,5 @@
+from browser_use.agent.memory.local import LocalProceduralMemory
 from browser_use.agent.memory.service import Memory
 from browser_use.agent.memory.views import MemoryConfig
 
-__all__ = ['Memory', 'MemoryConfig']
+__all__ = ['Memory', 'MemoryConfig', 'LocalProceduralMemory']
@@ -0,0 +1,116 @@
+"""
+In-process procedural memory backend, an alternative to mem0 that needs no embedding service or model download.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import uuid
+import zlib
+from typing import Any
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+
+logger = logging.getLogger(__name__)
+
+PROCEDURAL_MEMORY_PROMPT = """
+You are a memory summarization system that records the interaction history between a human and an AI agent.
+You are provided with the agent's execution history over the past steps. Produce a summary that contains every detail
+necessary for the agent to continue the task without ambiguity:
+- Task objective and progress status (completion percentage, milestones reached)
+- For each step: the action taken, its result (record extracted data verbatim), key findings, navigation history
+  (visited urls) and errors or challenges encountered
+- The current context, i.e. what the agent was about to do next
+""".strip()
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+class HashingEmbedder:
+	"""
+	Embeds text into a fixed number of dimensions by hashing its words and word pairs (the hashing trick).
+
+	No vocabulary or model is needed, so it starts instantly and works offline. Similar texts share words and end up
+	close to each other, which is what retrieval of step summaries needs.
+	"""
+
+	def __init__(self, dims: int = 384):
+		self.dims = dims
+
+	def embed(self, texts: list[str]) -> np.ndarray:
+		"""L2-normalized embeddings, one row per text"""
+		vectors = np.zeros((len(texts), self.dims), dtype=np.float32)
+		for row, text in enumerate(texts):
+			words = WORD_PATTERN.findall(text.lower())
+			for feature in words + [f'{a} {b}' for a, b in zip(words, words[1:])]:
+				hashed = zlib.crc32(feature.encode())
+				# the sign bit keeps collisions from always adding up
+				vectors[row, hashed % self.dims] += 1.0 if hashed & 0x80000000 else -1.0
+		norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+		return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class LocalMemoryStore:
+	"""Memories with their embeddings in a NumPy matrix, searched by cosine similarity in one matrix product"""
+
+	def __init__(self, embedder: HashingEmbedder, initial_capacity: int = 64):
+		self.embedder = embedder
+		self._vectors = np.zeros((initial_capacity, embedder.dims), dtype=np.float32)
+		self._memories: list[dict[str, Any]] = []
+
+	def __len__(self) -> int:
+		return len(self._memories)
+
+	def add(self, memory: str, metadata: dict[str, Any] | None = None) -> str:
+		if len(self._memories) == len(self._vectors):
+			# grow by doubling, adding stays amortized O(1)
+			self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+		self._vectors[len(self._memories)] = self.embedder.embed([memory])[0]
+		memory_id = str(uuid.uuid4())
+		self._memories.append({'id': memory_id, 'memory': memory, 'metadata': metadata or {}})
+		return memory_id
+
+	def search(self, query: str, limit: int = 5, filters: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+		"""Most similar memories first, optionally only those whose metadata matches all filters"""
+		if not self._memories:
+			return []
+		scores = self._vectors[: len(self._memories)] @ self.embedder.embed([query])[0]
+		if filters:
+			matches = np.array([all(m['metadata'].get(k) == v for k, v in filters.items()) for m in self._memories])
+			scores = np.where(matches, scores, -np.inf)
+
+		limit = min(limit, len(self._memories))
+		top = np.argpartition(-scores, limit - 1)[:limit]
+		top = top[np.argsort(-scores[top])]
+		return [{**self._memories[i], 'score': float(scores[i])} for i in top if np.isfinite(scores[i])]
+
+
+class LocalProceduralMemory:
+	"""
+	Procedural memory with the interface of the mem0 client used by Memory: add() summarizes the messages with the
+	agent's LLM and stores the summary in a LocalMemoryStore.
+	"""
+
+	def __init__(self, llm: BaseChatModel, embedder: HashingEmbedder | None = None):
+		self.llm = llm
+		self.store = LocalMemoryStore(embedder or HashingEmbedder())
+
+	def add(
+		self, messages: list[dict[str, Any]], agent_id: str, memory_type: str, metadata: dict[str, Any] | None = None
+	) -> dict[str, Any]:
+		response = self.llm.invoke(
+			[
+				SystemMessage(content=PROCEDURAL_MEMORY_PROMPT),
+				*messages,
+				HumanMessage(content='Create procedural memory of the above conversation.'),
+			]
+		)
+		memory = str(response.content)
+		memory_id = self.store.add(memory, {**(metadata or {}), 'agent_id': agent_id, 'memory_type': memory_type})
+		return {'results': [{'id': memory_id, 'memory': memory, 'event': 'ADD'}]}
+
+	def search(self, query: str, agent_id: str, limit: int = 5) -> dict[str, Any]:
+		return {'results': self.store.search(query, limit=limit, filters={'agent_id': agent_id})}
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 
@@ -10,9 +11,11 @@ from langchain_core.messages import (
 )
 from langchain_core.messages.utils import convert_to_openai_messages
 
+from browser_use.agent.memory.local import HashingEmbedder, LocalProceduralMemory
 from browser_use.agent.memory.views import MemoryConfig
 from browser_use.agent.message_manager.service import MessageManager
 from browser_use.agent.message_manager.views import ManagedMessage, MessageMetadata
+from browser_use.profiling import create_unprofiled_task
 from browser_use.utils import time_execution_sync
 
 logger = logging.getLogger(__name__)
@@ -57,9 +60,18 @@ class Memory:
 				self.config.embedder_dims = 512
 		else:
 			# Ensure LLM instance is set in the config
-			self.config = MemoryConfig(config)  # re-validate user-provided config
+			self.config = MemoryConfig.model_validate(config)  # re-validate user-provided config
 			self.config.llm_instance = llm
 
+		# background consolidations and the ids of the messages they replace
+		self._consolidations: set[asyncio.Task] = set()
+		self._consolidating: set[int] = set()
+
+		if self.config.backend == 'local':
+			# same interface as the mem0 client
+			self.mem0 = LocalProceduralMemory(llm, HashingEmbedder(self.config.embedder_dims))
+			return
+
 		# Check for required packages
 		try:
 			# also disable mem0's telemetry when ANONYMIZED_TELEMETRY=False
@@ -91,48 +103,108 @@ class Memory:
 		"""
 		logger.info(f'Creating procedural memory at step {current_step}')
 
-		# Get all messages
-		all_messages = self.message_manager.state.history.messages
+		messages_to_replace = self._get_messages_to_replace()
+		if messages_to_replace is None:
+			return
+		# Create a procedural memory
+		memory_content = self._create(self._get_messages_to_summarize(messages_to_replace), current_step)
+		self._replace_with_memory(messages_to_replace, memory_content)
 
-		# Separate messages into those to keep as-is and those to process for memory
-		new_messages = []
-		messages_to_process = []
+	def schedule_procedural_memory(self, current_step: int) -> bool:
+		"""
+		Create a procedural memory in the background, the agent keeps stepping while mem0 runs in a worker thread.
 
-		for msg in all_messages:
-			if isinstance(msg, ManagedMessage) and msg.metadata.message_type in {'init', 'memory'}:
-				# Keep system and memory messages as they are
-				new_messages.append(msg)
-			else:
-				if len(msg.message.content) > 0:
-					messages_to_process.append(msg)
+		The messages to consolidate are fixed now, once the memory is ready they are replaced by it in one go, messages
+		added in the meantime stay after it. At most config.max_concurrent_consolidations run at the same time.
+
+		Returns whether a consolidation was started.
+		"""
+		self._consolidations = {task for task in self._consolidations if not task.done()}
+		if len(self._consolidations) >= self.config.max_concurrent_consolidations:
+			logger.debug(f'Skipping procedural memory at step {current_step}, previous consolidations are still running')
+			return False
+
+		messages_to_replace = self._get_messages_to_replace()
+		if messages_to_replace is None:
+			return False
+
+		logger.info(f'Creating procedural memory in the background at step {current_step}')
+		self._consolidating.update(id(msg) for msg in messages_to_replace)
+		task = create_unprofiled_task(self._consolidate(messages_to_replace, current_step))
+		self._consolidations.add(task)
+		return True
+
+	async def _consolidate(self, messages_to_replace: list[ManagedMessage], current_step: int) -> None:
+		try:
+			messages = self._get_messages_to_summarize(messages_to_replace)
+			memory_content = await asyncio.to_thread(self._create, messages, current_step)
+			self._replace_with_memory(messages_to_replace, memory_content)
+		finally:
+			self._consolidating.difference_update(id(msg) for msg in messages_to_replace)
+
+	async def wait_for_consolidations(self) -> None:
+		"""Wait until all background consolidations are applied to the history"""
+		if self._consolidations:
+			await asyncio.gather(*self._consolidations, return_exceptions=True)
+
+	def cancel_consolidations(self) -> None:
+		"""Drop the results of running background consolidations"""
+		for task in self._consolidations:
+			task.cancel()
+		self._consolidations.clear()
+
+	def _get_messages_to_replace(self) -> list[ManagedMessage] | None:
+		"""
+		Messages that the next memory replaces, None if there is not enough to summarize.
+
+		System, memory and page snapshot messages are kept as they are, as well as messages already being consolidated.
+		"""
+		messages_to_replace = [
+			msg
+			for msg in self.message_manager.state.history.messages
+			if msg.metadata.message_type not in {'init', 'memory', 'page_snapshot'} and id(msg) not in self._consolidating
+		]
 
 		# Need at least 2 messages to create a meaningful summary
-		if len(messages_to_process) <= 1:
+		if len(self._get_messages_to_summarize(messages_to_replace)) <= 1:
 			logger.info('Not enough non-memory messages to summarize')
-			return
-		# Create a procedural memory
-		memory_content = self._create([m.message for m in messages_to_process], current_step)
-
+			return None
+		return messages_to_replace
+
+	def _get_messages_to_summarize(self, messages_to_replace: list[ManagedMessage]) -> list[BaseMessage]:
+		# screenshots and empty messages (e.g. tool results) are not summarized, they are dropped with the others
+		return [
+			msg.message
+			for msg in messages_to_replace
+			if msg.metadata.message_type not in {'screenshot', 'screenshot_thumbnail'} and len(msg.message.content) > 0
+		]
+
+	def _replace_with_memory(self, messages_to_replace: list[ManagedMessage], memory_content: str | None) -> None:
+		"""Replace the consolidated messages still in the history with the memory message, at the first one's position"""
 		if not memory_content:
 			logger.warning('Failed to create procedural memory')
 			return
 
-		# Replace the processed messages with the consolidated memory
 		memory_message = HumanMessage(content=memory_content)
 		memory_tokens = self.message_manager._count_tokens(memory_message)
 		memory_metadata = MessageMetadata(tokens=memory_tokens, message_type='memory')
 
-		# Calculate the total tokens being removed
-		removed_tokens = sum(m.metadata.tokens for m in messages_to_process)
+		replaced = {id(msg) for msg in messages_to_replace}
+		new_messages = []
+		for msg in self.message_manager.state.history.messages:
+			if id(msg) not in replaced:
+				new_messages.append(msg)
+			elif memory_message is not None:
+				new_messages.append(ManagedMessage(message=memory_message, metadata=memory_metadata))
+				memory_message = None
 
-		# Add the memory message
-		new_messages.append(ManagedMessage(message=memory_message, metadata=memory_metadata))
+		if memory_message is not None:
+			logger.debug('The consolidated messages are no longer in the history, dropping the procedural memory')
+			return
 
 		# Update the history
-		self.message_manager.state.history.messages = new_messages
-		self.message_manager.state.history.current_tokens -= removed_tokens
-		self.message_manager.state.history.current_tokens += memory_tokens
-		logger.info(f'Messages consolidated: {len(messages_to_process)} messages converted to procedural memory')
+		self.message_manager.state.history.set_messages(new_messages)
+		logger.info(f'Messages consolidated: {len(messages_to_replace)} messages converted to procedural memory')
 
 	def _create(self, messages: list[BaseMessage], current_step: int) -> str | None:
 		parsed_messages = convert_to_openai_messages(messages)
@@ -14,6 +14,8 @@ class MemoryConfig(BaseModel):
 	# Memory settings
 	agent_id: str = Field(default='browser_use_agent', min_length=1)
 	memory_interval: int = Field(default=10, gt=1, lt=100)
+	# consolidations running in the background at the same time, further ones are skipped until one finishes
+	max_concurrent_consolidations: int = Field(default=1, ge=1, le=10)
 
 	# Embedder settings
 	embedder_provider: Literal['openai', 'gemini', 'ollama', 'huggingface'] = 'huggingface'
@@ -24,6 +26,10 @@ class MemoryConfig(BaseModel):
 	llm_provider: Literal['langchain'] = 'langchain'
 	llm_instance: BaseChatModel | None = None
 
+	# Backend: mem0, or 'local' for the in-process store (no mem0, works offline, embedder and vector store settings
+	# except embedder_dims are ignored)
+	backend: Literal['mem0', 'local'] = 'mem0'
+
 	# Vector store settings
 	vector_store_provider: Literal['faiss'] = 'faiss'
 	vector_store_base_path: str = Field(default='/tmp/mem0')
@@ -0,0 +1,88 @@
+"""
+Element deltas: the changes of the interactive elements since the last page snapshot sent to the model.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+INDEX_PATTERN = re.compile(r'^\*?\[(\d+)\]\*?')
+
+
+def _split_index(line: str) -> tuple[int | None, str]:
+	"""Highlight index and the rest of an element line, the new-element marker is not part of the rest"""
+	match = INDEX_PATTERN.match(line)
+	if match is None:
+		return None, line
+	return int(match.group(1)), line[match.end() :]
+
+
+@dataclass
+class ElementsDelta:
+	added: list[str] = field(default_factory=list)
+	changed: list[str] = field(default_factory=list)
+	removed: list[str] = field(default_factory=list)
+	# (index in the snapshot, current index) of unchanged elements whose index moved
+	reindexed: list[tuple[int, int]] = field(default_factory=list)
+	unchanged: int = 0
+
+	@property
+	def size(self) -> int:
+		return len(self.added) + len(self.changed) + len(self.removed)
+
+	def to_string(self) -> str:
+		summary = f'{self.unchanged} elements unchanged'
+		if self.reindexed:
+			summary += ', moved to new indexes: ' + ', '.join(_format_index_ranges(self.reindexed))
+		if not self.size:
+			return f'No changes to the interactive elements of the page snapshot above ({summary}).'
+
+		parts = [f'Changes to the interactive elements of the page snapshot above ({summary}):']
+		if self.added:
+			parts += ['Added:', *self.added]
+		if self.changed:
+			parts += ['Changed:', *self.changed]
+		if self.removed:
+			parts += ['Removed (indexes of the snapshot, not usable anymore):', *self.removed]
+		return '\n'.join(parts)
+
+
+def diff_elements(snapshot: dict[str, str], current: dict[str, str]) -> ElementsDelta:
+	"""Compare two results of DOMElementNode.clickable_elements_snapshot"""
+	delta = ElementsDelta()
+	for key, line in current.items():
+		if key not in snapshot:
+			delta.added.append(line)
+			continue
+
+		old_index, old_rest = _split_index(snapshot[key])
+		new_index, new_rest = _split_index(line)
+		if old_rest != new_rest:
+			delta.changed.append(line)
+			continue
+
+		delta.unchanged += 1
+		if old_index != new_index and old_index is not None and new_index is not None:
+			delta.reindexed.append((old_index, new_index))
+
+	delta.removed = [line for key, line in snapshot.items() if key not in current]
+	return delta
+
+
+def _format_index_ranges(pairs: list[tuple[int, int]]) -> list[str]:
+	"""[3]->[4], [4]->[5], [5]->[6] becomes [3]-[5]->[4]-[6]"""
+	ranges: list[list[int]] = []
+	for old, new in sorted(pairs):
+		if ranges and old == ranges[-1][1] + 1 and new == ranges[-1][3] + 1:
+			ranges[-1][1], ranges[-1][3] = old, new
+		else:
+			ranges.append([old, old, new, new])
+
+	formatted = []
+	for old_start, old_end, new_start, new_end in ranges:
+		if old_start == old_end:
+			formatted.append(f'[{old_start}]->[{new_start}]')
+		else:
+			formatted.append(f'[{old_start}]-[{old_end}]->[{new_start}]-[{new_end}]')
+	return formatted
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+from functools import partial
 
 from langchain_core.messages import (
 	AIMessage,
@@ -11,7 +12,10 @@ from langchain_core.messages import (
 )
 from pydantic import BaseModel
 
-from browser_use.agent.message_manager.views import MessageMetadata
+from browser_use.agent.message_manager.delta import ElementsDelta, diff_elements
+from browser_use.agent.message_manager.tokenizer import Tokenizer, get_tokenizer
+from browser_use.agent.message_manager.utils import make_thumbnail
+from browser_use.agent.message_manager.views import ManagedMessage, MessageMetadata, PageSnapshot, VisionRetentionPolicy
 from browser_use.agent.prompts import AgentMessagePrompt
 from browser_use.agent.views import ActionResult, AgentOutput, AgentStepInfo, MessageManagerState
 from browser_use.browser.views import BrowserState
@@ -22,12 +26,21 @@ logger = logging.getLogger(__name__)
 
 class MessageManagerSettings(BaseModel):
 	max_input_tokens: int = 128000
+	# model the messages are sent to, selects the tokenizer (estimates below are used if it has no local tokenizer)
+	model_name: str | None = None
 	estimated_characters_per_token: int = 3
 	image_tokens: int = 800
 	include_attributes: list[str] = []
 	message_context: str | None = None
 	sensitive_data: dict[str, str] | None = None
 	available_file_paths: list[str] | None = None
+	# mark the stable message prefix with cache_control breakpoints (Anthropic prompt caching)
+	add_cache_control: bool = False
+	# send the interactive elements once as a page snapshot and afterwards only their changes
+	delta_state_messages: bool = False
+	# send a new full snapshot after this many delta state messages
+	full_state_interval: int = 10
+	vision_retention: VisionRetentionPolicy = VisionRetentionPolicy()
 
 
 class MessageManager:
@@ -36,12 +49,19 @@ class MessageManager:
 		task: str,
 		system_message: SystemMessage,
 		settings: MessageManagerSettings = MessageManagerSettings(),
-		state: MessageManagerState = MessageManagerState(),
+		state: MessageManagerState | None = None,
+		tokenizer: Tokenizer | None = None,
 	):
 		self.task = task
 		self.settings = settings
-		self.state = state
+		# a fresh state per manager, a shared default instance would share the history between managers
+		self.state = state or MessageManagerState()
 		self.system_prompt = system_message
+		self.tokenizer = tokenizer or get_tokenizer(
+			settings.model_name, settings.estimated_characters_per_token, settings.image_tokens
+		)
+		# (label, image url) of the screenshot in the current state message
+		self._last_state_screenshot: tuple[str, str] | None = None
 
 		# Only initialize messages if state is empty
 		if len(self.state.history.messages) == 0:
@@ -118,13 +138,14 @@ class MessageManager:
 		self._add_message_with_tokens(msg)
 		self.task = new_task
 
-	@time_execution_sync('--add_state_message')
+	@time_execution_sync('--add_state_message', phase='prompt')
 	def add_state_message(
 		self,
 		state: BrowserState,
 		result: list[ActionResult] | None = None,
 		step_info: AgentStepInfo | None = None,
 		use_vision=True,
+		page_filtered_actions: str | None = None,
 	) -> None:
 		"""Add browser state as human message"""
 
@@ -145,15 +166,64 @@ class MessageManager:
 						self._add_message_with_tokens(msg)
 					result = None  # if result in history, we dont want to add it again
 
+		elements_delta = self._update_page_snapshot(state) if self.settings.delta_state_messages else None
+
+		# the state message gets what the history leaves of the input budget, so elements are chosen instead of cut off
+		max_text_tokens = self.settings.max_input_tokens - self.state.history.current_tokens
+		if use_vision and state.screenshot:
+			max_text_tokens -= self.tokenizer.count_image(f'data:image/png;base64,{state.screenshot}')
+
 		# otherwise add state message and result to next message (which will not stay in memory)
 		state_message = AgentMessagePrompt(
 			state,
 			result,
 			include_attributes=self.settings.include_attributes,
 			step_info=step_info,
+			page_filtered_actions=page_filtered_actions,
+			max_text_tokens=max_text_tokens,
+			count_tokens=partial(self.tokenizer.count_text, cache=False),
+			elements_delta=elements_delta,
 		).get_user_message(use_vision)
 		self._add_message_with_tokens(state_message)
 
+		self._last_state_screenshot = None
+		if use_vision and state.screenshot:
+			step = f'step {step_info.step_number + 1}' if step_info else 'an earlier step'
+			self._last_state_screenshot = (f'Screenshot of {step} ({state.url}):', f'data:image/png;base64,{state.screenshot}')
+
+	def _update_page_snapshot(self, state: BrowserState) -> str | None:
+		"""
+		Delta mode: the interactive elements are sent once as a page snapshot message that stays in the history, the
+		following state messages only list what changed since. A new snapshot is sent after navigation, every
+		full_state_interval steps or once the changes are no longer much smaller than the page.
+
+		Returns the elements text of the state message, None if all elements have to be in the state message.
+		"""
+		elements = state.element_tree.clickable_elements_snapshot(include_attributes=self.settings.include_attributes)
+		snapshot = self.state.page_snapshot
+		if snapshot is not None and snapshot.url == state.url and snapshot.steps < self.settings.full_state_interval:
+			delta = diff_elements(snapshot.elements, elements)
+			if delta.size <= len(elements) // 2:
+				snapshot.steps += 1
+				return delta.to_string()
+
+		self.state.history.remove_messages_of_type('page_snapshot')
+		self.state.page_snapshot = None
+
+		elements_text = state.element_tree.clickable_elements_to_string(include_attributes=self.settings.include_attributes)
+		snapshot_message = HumanMessage(
+			content=f'[Page snapshot] Interactive elements of {state.url}, until the next snapshot the state only lists '
+			f'changes to them:\n{elements_text or "empty page"}'
+		)
+		# a snapshot stays in the history, if it takes more than half of the remaining budget send the full state instead
+		if self._count_tokens(snapshot_message) > (self.settings.max_input_tokens - self.state.history.current_tokens) // 2:
+			logger.debug('Page snapshot too large for the history, sending the full state')
+			return None
+
+		self._add_message_with_tokens(snapshot_message, message_type='page_snapshot')
+		self.state.page_snapshot = PageSnapshot(url=state.url, elements=elements)
+		return ElementsDelta(unchanged=len(elements)).to_string()
+
 	def add_model_output(self, model_output: AgentOutput) -> None:
 		"""Add model output as AI message"""
 		tool_calls = [
@@ -179,21 +249,61 @@ class MessageManager:
 			msg = AIMessage(content=plan)
 			self._add_message_with_tokens(msg, position)
 
-	@time_execution_sync('--get_messages')
+	@time_execution_sync('--get_messages', phase='prompt')
 	def get_messages(self) -> list[BaseMessage]:
 		"""Get current message list, potentially trimmed to max tokens"""
 
-		msg = [m.message for m in self.state.history.messages]
-		# debug which messages are in history with token count # log
-		total_input_tokens = 0
-		logger.debug(f'Messages in history: {len(self.state.history.messages)}:')
-		for m in self.state.history.messages:
-			total_input_tokens += m.metadata.tokens
-			logger.debug(f'{m.message.__class__.__name__} - Token count: {m.metadata.tokens}')
-		logger.debug(f'Total input tokens: {total_input_tokens}')
+		msg = self.state.history.get_messages()
+		# debug which messages are in history with token count, only formatted if debug logging is on
+		if logger.isEnabledFor(logging.DEBUG):
+			logger.debug(f'Messages in history: {len(self.state.history.messages)}:')
+			for m in self.state.history.messages:
+				logger.debug(f'{m.message.__class__.__name__} - Token count: {m.metadata.tokens}')
+			logger.debug(f'Total input tokens: {self.state.history.current_tokens}')
+
+		if self.settings.add_cache_control:
+			msg = self._add_cache_control(msg)
 
 		return msg
 
+	def _add_cache_control(self, messages: list[BaseMessage]) -> list[BaseMessage]:
+		"""
+		Mark the end of the stable prefix for provider-side prompt caching.
+
+		All messages but the last state message stay the same from step to step, so breakpoints are set on the system
+		prompt, at the end of the init messages and on the last message before the current state. Marked messages are
+		copies, the history itself is left untouched.
+		"""
+		n_init = 0
+		for managed in self.state.history.messages:
+			if managed.metadata.message_type != 'init':
+				break
+			n_init += 1
+
+		breakpoints = set()
+		for position in (0, n_init - 1, len(messages) - 2):
+			# cache_control can only be attached to non-empty text, e.g. not to tool calls or empty tool results
+			while position >= 0 and not (
+				isinstance(messages[position], (HumanMessage, SystemMessage)) and messages[position].content
+			):
+				position -= 1
+			if position >= 0:
+				breakpoints.add(position)
+
+		messages = list(messages)
+		for position in breakpoints:
+			message = messages[position]
+			if isinstance(message.content, str):
+				content = [{'type': 'text', 'text': message.content}]
+			else:
+				content = [dict(item) if isinstance(item, dict) else {'type': 'text', 'text': item} for item in message.content]
+			for item in reversed(content):
+				if item.get('type') == 'text':
+					item['cache_control'] = {'type': 'ephemeral'}
+					break
+			messages[position] = message.model_copy(update={'content': content})
+		return messages
+
 	def _add_message_with_tokens(
 		self, message: BaseMessage, position: int | None = None, message_type: str | None = None
 	) -> None:
@@ -213,21 +323,22 @@ class MessageManager:
 	def _filter_sensitive_data(self, message: BaseMessage) -> BaseMessage:
 		"""Filter out sensitive data from the message"""
 
-		def replace_sensitive(value: str) -> str:
-			if not self.settings.sensitive_data:
-				return value
+		if not self.settings.sensitive_data:
+			return message
 
-			# Create a dictionary with all key-value pairs from sensitive_data where value is not None or empty
-			valid_sensitive_data = {k: v for k, v in self.settings.sensitive_data.items() if v}
+		# Create a dictionary with all key-value pairs from sensitive_data where value is not None or empty
+		valid_sensitive_data = {k: v for k, v in self.settings.sensitive_data.items() if v}
 
-			# If there are no valid sensitive data entries, just return the original value
-			if not valid_sensitive_data:
-				logger.warning('No valid entries found in sensitive_data dictionary')
-				return value
+		# If there are no valid sensitive data entries, just return the original message
+		if not valid_sensitive_data:
+			logger.warning('No valid entries found in sensitive_data dictionary')
+			return message
 
+		def replace_sensitive(value: str) -> str:
 			# Replace all valid sensitive data values with their placeholder tags
 			for key, val in valid_sensitive_data.items():
-				value = value.replace(val, f'<secret>{key}</secret>')
+				if val in value:
+					value = value.replace(val, f'<secret>{key}</secret>')
 
 			return value
 
@@ -246,7 +357,7 @@ class MessageManager:
 		if isinstance(message.content, list):
 			for item in message.content:
 				if 'image_url' in item:
-					tokens += self.settings.image_tokens
+					tokens += self._count_image_tokens(item)
 				elif isinstance(item, dict) and 'text' in item:
 					tokens += self._count_text_tokens(item['text'])
 		else:
@@ -258,8 +369,11 @@ class MessageManager:
 
 	def _count_text_tokens(self, text: str) -> int:
 		"""Count tokens in a text string"""
-		tokens = len(text) // self.settings.estimated_characters_per_token  # Rough estimate if no tokenizer available
-		return tokens
+		return self.tokenizer.count_text(text)
+
+	def _count_image_tokens(self, item: dict) -> int:
+		image_url = item['image_url']
+		return self.tokenizer.count_image(image_url['url'] if isinstance(image_url, dict) else image_url)
 
 	def cut_messages(self):
 		"""Get current message list, potentially trimmed to max tokens"""
@@ -267,19 +381,29 @@ class MessageManager:
 		if diff <= 0:
 			return None
 
+		# screenshots of previous steps go first
+		for managed in self._get_screenshot_messages():
+			if diff <= 0:
+				return None
+			tokens_before = self.state.history.current_tokens
+			self._drop_screenshot(managed)
+			diff -= tokens_before - self.state.history.current_tokens
+		if diff <= 0:
+			return None
+
 		msg = self.state.history.messages[-1]
 
 		# if list with image remove image
 		if isinstance(msg.message.content, list):
 			text = ''
-			for item in msg.message.content:
+			for item in list(msg.message.content):
 				if 'image_url' in item:
+					image_tokens = self._count_image_tokens(item)
 					msg.message.content.remove(item)
-					diff -= self.settings.image_tokens
-					msg.metadata.tokens -= self.settings.image_tokens
-					self.state.history.current_tokens -= self.settings.image_tokens
+					diff -= image_tokens
+					self.state.history.update_tokens(msg, msg.metadata.tokens - image_tokens)
 					logger.debug(
-						f'Removed image with {self.settings.image_tokens} tokens - total tokens now: {self.state.history.current_tokens}/{self.settings.max_input_tokens}'
+						f'Removed image with {image_tokens} tokens - total tokens now: {self.state.history.current_tokens}/{self.settings.max_input_tokens}'
 					)
 				elif 'text' in item and isinstance(item, dict):
 					text += item['text']
@@ -301,9 +425,8 @@ class MessageManager:
 			f'Removing {proportion_to_remove * 100:.2f}% of the last message  {proportion_to_remove * msg.metadata.tokens:.2f} / {msg.metadata.tokens:.2f} tokens)'
 		)
 
-		content = msg.message.content
-		characters_to_remove = int(len(content) * proportion_to_remove)
-		content = content[:-characters_to_remove]
+		# keep exactly as many tokens as fit, instead of cutting a proportional number of characters
+		content = self.tokenizer.truncate_text(msg.message.content, msg.metadata.tokens - diff)
 
 		# remove tokens and old long message
 		self.state.history.remove_last_state_message()
@@ -318,10 +441,57 @@ class MessageManager:
 			f'Added message with {last_msg.metadata.tokens} tokens - total tokens now: {self.state.history.current_tokens}/{self.settings.max_input_tokens} - total messages: {len(self.state.history.messages)}'
 		)
 
-	def _remove_last_state_message(self) -> None:
-		"""Remove last state message from history"""
+	def _remove_last_state_message(self, keep_screenshot: bool = False) -> None:
+		"""Remove last state message from history, with keep_screenshot its screenshot stays as the vision retention allows"""
 		self.state.history.remove_last_state_message()
 
+		screenshot, self._last_state_screenshot = self._last_state_screenshot, None
+		policy = self.settings.vision_retention
+		if not keep_screenshot or screenshot is None or (policy.max_screenshots <= 1 and not policy.thumbnail_previous):
+			return
+
+		label, image_url = screenshot
+		message = HumanMessage(content=[{'type': 'text', 'text': label}, {'type': 'image_url', 'image_url': {'url': image_url}}])
+		self._add_message_with_tokens(message, message_type='screenshot')
+		self._apply_vision_retention()
+
+	def _get_screenshot_messages(self) -> list[ManagedMessage]:
+		"""Messages with screenshots of previous steps, oldest first"""
+		return self.state.history.get_messages_of_type('screenshot', 'screenshot_thumbnail')
+
+	def _apply_vision_retention(self) -> None:
+		"""Keep the newest max_screenshots - 1 previous screenshots (the current state has one more), drop the others"""
+		policy = self.settings.vision_retention
+		for age, managed in enumerate(reversed(self._get_screenshot_messages()), start=1):
+			if age < policy.max_screenshots:
+				continue
+			if age == policy.max_screenshots and policy.thumbnail_previous:
+				if managed.metadata.message_type == 'screenshot':
+					self._drop_screenshot(managed, thumbnail_width=policy.thumbnail_width)
+				continue
+			self._drop_screenshot(managed)
+
+	def _drop_screenshot(self, managed: ManagedMessage, thumbnail_width: int | None = None) -> None:
+		"""Replace the screenshot of a message by a thumbnail or a placeholder, updating the token counts"""
+		label = next(item['text'] for item in managed.message.content if isinstance(item, dict) and 'text' in item)
+		image_url = next(
+			item['image_url']['url'] for item in managed.message.content if isinstance(item, dict) and 'image_url' in item
+		)
+
+		thumbnail = make_thumbnail(image_url, thumbnail_width) if thumbnail_width else None
+		if thumbnail is not None:
+			managed.message = HumanMessage(
+				content=[{'type': 'text', 'text': label}, {'type': 'image_url', 'image_url': {'url': thumbnail}}]
+			)
+			self.state.history.set_message_type(managed, 'screenshot_thumbnail')
+		else:
+			if thumbnail_width:
+				logger.debug('Pillow is not installed, dropping the screenshot instead of sending a thumbnail')
+			managed.message = HumanMessage(content=f'{label} [screenshot removed]')
+			self.state.history.set_message_type(managed, None)
+
+		self.state.history.update_tokens(managed, self._count_tokens(managed.message))
+
 	def add_tool_message(self, content: str, message_type: str | None = None) -> None:
 		"""Add tool message to history"""
 		msg = ToolMessage(content=content, tool_call_id=str(self.state.tool_id))
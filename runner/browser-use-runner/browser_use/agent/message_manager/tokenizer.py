@@ -0,0 +1,159 @@
+"""
+Token counting for the message manager, with exact tokenizers where they are available locally.
+"""
+
+from __future__ import annotations
+
+import base64
+import logging
+import math
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+ImageTokenFormula = Callable[[int, int], int]
+
+
+def openai_image_tokens(width: int, height: int) -> int:
+	"""Tokens of a high detail image for OpenAI vision models: 85 plus 170 per 512px tile after downscaling"""
+	scale = min(1.0, 2048 / max(width, height))
+	width, height = width * scale, height * scale
+	scale = min(1.0, 768 / min(width, height))
+	width, height = width * scale, height * scale
+	return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def anthropic_image_tokens(width: int, height: int) -> int:
+	"""Tokens of an image for Anthropic models: width * height / 750 after downscaling to at most 1568px"""
+	scale = min(1.0, 1568 / max(width, height))
+	return math.ceil(width * scale * height * scale / 750)
+
+
+def get_png_size(image_url: str) -> tuple[int, int] | None:
+	"""Width and height of a base64 PNG data url (as used for screenshots), read from its header"""
+	if not image_url.startswith('data:image/png;base64,'):
+		return None
+	try:
+		header = base64.b64decode(image_url[len('data:image/png;base64,') :][:32])
+	except ValueError:
+		return None
+	if len(header) < 24 or not header.startswith(b'\x89PNG\r\n\x1a\n'):
+		return None
+	return int.from_bytes(header[16:20], 'big'), int.from_bytes(header[20:24], 'big')
+
+
+class Tokenizer(ABC):
+	"""
+	Counts the tokens of message content. Subclass it and implement _count_text to plug in the tokenizer of a model family.
+
+	Counts of message texts are memoized, the same messages (system prompt, repeated page states) are only tokenized once.
+	"""
+
+	def __init__(self, image_tokens: int = 800, image_token_formula: ImageTokenFormula | None = None):
+		self.image_tokens = image_tokens
+		self.image_token_formula = image_token_formula
+		self._count_text_cached = lru_cache(maxsize=128)(self._count_text)
+
+	def count_text(self, text: str, cache: bool = True) -> int:
+		"""Tokens of text, pass cache=False for pieces of a message (e.g. lines) that are not counted again"""
+		return self._count_text_cached(text) if cache else self._count_text(text)
+
+	@abstractmethod
+	def _count_text(self, text: str) -> int: ...
+
+	def count_image(self, image_url: str) -> int:
+		"""Tokens of an image content item, image_url is usually a base64 data url"""
+		if self.image_token_formula is not None:
+			size = get_png_size(image_url)
+			if size is not None:
+				return self.image_token_formula(*size)
+		return self.image_tokens
+
+	def truncate_text(self, text: str, max_tokens: int) -> str:
+		"""Longest prefix of text with at most max_tokens tokens"""
+		if self._count_text(text) <= max_tokens:
+			return text
+		low, high = 0, len(text)
+		while low < high:
+			middle = (low + high + 1) // 2
+			if self._count_text(text[:middle]) <= max_tokens:
+				low = middle
+			else:
+				high = middle - 1
+		return text[:low]
+
+
+class CharacterEstimateTokenizer(Tokenizer):
+	"""Estimates tokens from the number of characters, for models without a local tokenizer"""
+
+	def __init__(
+		self, characters_per_token: int = 3, image_tokens: int = 800, image_token_formula: ImageTokenFormula | None = None
+	):
+		super().__init__(image_tokens=image_tokens, image_token_formula=image_token_formula)
+		self.characters_per_token = characters_per_token
+
+	def _count_text(self, text: str) -> int:
+		return len(text) // self.characters_per_token
+
+	def truncate_text(self, text: str, max_tokens: int) -> str:
+		return text[: max(0, max_tokens) * self.characters_per_token]
+
+
+class TiktokenTokenizer(Tokenizer):
+	"""Exact token counts for OpenAI models"""
+
+	def __init__(self, encoding, image_tokens: int = 800):
+		super().__init__(image_tokens=image_tokens, image_token_formula=openai_image_tokens)
+		self.encoding = encoding
+
+	def _count_text(self, text: str) -> int:
+		return len(self.encoding.encode(text, disallowed_special=()))
+
+	def truncate_text(self, text: str, max_tokens: int) -> str:
+		tokens = self.encoding.encode(text, disallowed_special=())
+		if len(tokens) <= max_tokens:
+			return text
+		return self.encoding.decode(tokens[: max(0, max_tokens)])
+
+
+OPENAI_MODEL_PREFIXES = ('gpt-', 'chatgpt', 'o1', 'o3', 'o4')
+
+# encodings that could not be loaded (tiktoken downloads them on first use), not retried for every agent
+_unavailable_encodings: set[str] = set()
+
+
+def _load_tiktoken_encoding(model_name: str):
+	try:
+		import tiktoken
+	except ImportError:
+		return None
+
+	try:
+		encoding_name = tiktoken.encoding_name_for_model(model_name)
+	except KeyError:
+		encoding_name = 'o200k_base'
+	if encoding_name in _unavailable_encodings:
+		return None
+
+	try:
+		return tiktoken.get_encoding(encoding_name)
+	except Exception as e:
+		_unavailable_encodings.add(encoding_name)
+		logger.warning(f'Could not load the {encoding_name} tokenizer, falling back to estimated token counts: {e}')
+		return None
+
+
+def get_tokenizer(model_name: str | None, characters_per_token: int = 3, image_tokens: int = 800) -> Tokenizer:
+	"""The most exact tokenizer available locally for a model"""
+	name = (model_name or '').lower()
+	if name.startswith(OPENAI_MODEL_PREFIXES):
+		encoding = _load_tiktoken_encoding(name)
+		if encoding is not None:
+			return TiktokenTokenizer(encoding, image_tokens=image_tokens)
+		return CharacterEstimateTokenizer(characters_per_token, image_tokens, image_token_formula=openai_image_tokens)
+	if 'claude' in name:
+		# Anthropic has no local tokenizer, but its image sizes are exact
+		return CharacterEstimateTokenizer(characters_per_token, image_tokens, image_token_formula=anthropic_image_tokens)
+	return CharacterEstimateTokenizer(characters_per_token, image_tokens)
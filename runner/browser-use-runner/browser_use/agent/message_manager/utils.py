@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import base64
+import io
 import json
 import logging
 import os
@@ -106,6 +108,21 @@ def _merge_successive_messages(messages: list[BaseMessage], class_to_merge: type
 	return merged_messages
 
 
+def make_thumbnail(image_url: str, width: int) -> str | None:
+	"""Downscaled PNG data url of a base64 image data url, None if Pillow is not installed"""
+	try:
+		from PIL import Image
+	except ImportError:
+		return None
+
+	image = Image.open(io.BytesIO(base64.b64decode(image_url.split(',', 1)[-1])))
+	if image.width > width:
+		image = image.resize((width, max(1, round(image.height * width / image.width))))
+	buffer = io.BytesIO()
+	image.save(buffer, format='PNG')
+	return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
 def save_conversation(input_messages: list[BaseMessage], response: Any, target: str, encoding: str | None = None) -> None:
 	"""Save conversation history to file."""
 
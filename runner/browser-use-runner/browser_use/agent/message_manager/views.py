@@ -1,12 +1,13 @@
 from __future__ import annotations
 
+from collections import Counter
 from typing import TYPE_CHECKING, Any
 from warnings import filterwarnings
 
 from langchain_core._api import LangChainBetaWarning
 from langchain_core.load import dumpd, load
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
-from pydantic import BaseModel, ConfigDict, Field, model_serializer, model_validator
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_serializer, model_validator
 
 filterwarnings('ignore', category=LangChainBetaWarning)
 
@@ -70,10 +71,16 @@ class MessageHistory(BaseModel):
 	"""History of messages with metadata"""
 
 	messages: list[ManagedMessage] = Field(default_factory=list)
-	current_tokens: int = 0
+	current_tokens: int = 0  # running total, kept up to date by every method changing messages or their tokens
 
 	model_config = ConfigDict(arbitrary_types_allowed=True)
 
+	# number of messages per message type, lookups by type only scan the history if there is something to find
+	_type_counts: Counter = PrivateAttr(default_factory=Counter)
+
+	def model_post_init(self, __context: Any) -> None:
+		self._type_counts = Counter(m.metadata.message_type for m in self.messages)
+
 	def add_message(self, message: BaseMessage, metadata: MessageMetadata, position: int | None = None) -> None:
 		"""Add message with metadata to history"""
 		if position is None:
@@ -81,6 +88,44 @@ class MessageHistory(BaseModel):
 		else:
 			self.messages.insert(position, ManagedMessage(message=message, metadata=metadata))
 		self.current_tokens += metadata.tokens
+		self._type_counts[metadata.message_type] += 1
+
+	def set_messages(self, messages: list[ManagedMessage]) -> None:
+		"""Replace all messages, e.g. after consolidating them"""
+		self.messages = messages
+		self.current_tokens = sum(m.metadata.tokens for m in messages)
+		self._type_counts = Counter(m.metadata.message_type for m in messages)
+
+	def _pop(self, index: int) -> ManagedMessage:
+		msg = self.messages.pop(index)
+		self.current_tokens -= msg.metadata.tokens
+		self._type_counts[msg.metadata.message_type] -= 1
+		return msg
+
+	def update_tokens(self, msg: ManagedMessage, tokens: int) -> None:
+		"""Change the token count of a message in the history, e.g. after removing an image from it"""
+		self.current_tokens += tokens - msg.metadata.tokens
+		msg.metadata.tokens = tokens
+
+	def set_message_type(self, msg: ManagedMessage, message_type: str | None) -> None:
+		"""Change the type of a message in the history"""
+		self._type_counts[msg.metadata.message_type] -= 1
+		self._type_counts[message_type] += 1
+		msg.metadata.message_type = message_type
+
+	def get_messages_of_type(self, *message_types: str) -> list[ManagedMessage]:
+		"""Messages of the given types in history order"""
+		if not any(self._type_counts[message_type] for message_type in message_types):
+			return []
+		return [m for m in self.messages if m.metadata.message_type in message_types]
+
+	def remove_messages_of_type(self, message_type: str) -> None:
+		"""Remove all messages of a message type"""
+		if not self._type_counts[message_type]:
+			return
+		for i in range(len(self.messages) - 1, -1, -1):
+			if self.messages[i].metadata.message_type == message_type:
+				self._pop(i)
 
 	def add_model_output(self, output: AgentOutput) -> None:
 		"""Add model output as AI message"""
@@ -115,15 +160,31 @@ class MessageHistory(BaseModel):
 		"""Remove oldest non-system message"""
 		for i, msg in enumerate(self.messages):
 			if not isinstance(msg.message, SystemMessage):
-				self.current_tokens -= msg.metadata.tokens
-				self.messages.pop(i)
+				self._pop(i)
 				break
 
 	def remove_last_state_message(self) -> None:
 		"""Remove last state message from history"""
 		if len(self.messages) > 2 and isinstance(self.messages[-1].message, HumanMessage):
-			self.current_tokens -= self.messages[-1].metadata.tokens
-			self.messages.pop()
+			self._pop(-1)
+
+
+class VisionRetentionPolicy(BaseModel):
+	"""Which screenshots of previous steps stay in the prompt"""
+
+	# screenshots in the prompt including the one of the current state, older ones are replaced by a placeholder
+	max_screenshots: int = 1
+	# keep the newest screenshot that would be dropped as a downscaled thumbnail (requires Pillow)
+	thumbnail_previous: bool = False
+	thumbnail_width: int = 320
+
+
+class PageSnapshot(BaseModel):
+	"""The interactive elements of a page as last sent in full to the model, state messages only contain changes to it"""
+
+	url: str
+	elements: dict[str, str] = Field(default_factory=dict)
+	steps: int = 0  # state messages sent as a delta to this snapshot
 
 
 class MessageManagerState(BaseModel):
@@ -131,5 +192,6 @@ class MessageManagerState(BaseModel):
 
 	history: MessageHistory = Field(default_factory=MessageHistory)
 	tool_id: int = 1
+	page_snapshot: PageSnapshot | None = None
 
 	model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -0,0 +1,68 @@
+"""
+Work taken off the critical path of the agent's steps.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from browser_use.profiling import create_unprofiled_task
+
+logger = logging.getLogger(__name__)
+
+# submissions of one kind that may wait behind the running one before submit() waits for it (backpressure)
+MAX_PENDING_PER_KIND = 2
+
+
+class BackgroundWork:
+	"""
+	Runs step work that nothing later in the step depends on (conversation files, hooks, callbacks) as tasks, so it
+	happens while the step waits for the page or the LLM instead of before them.
+
+	Work of the same kind runs one at a time in submission order. Errors are logged, they do not fail the step.
+	"""
+
+	def __init__(self):
+		self._last_tasks: dict[str, asyncio.Task] = {}
+		self._pending: dict[str, int] = defaultdict(int)
+		self._durations: dict[str, float] = defaultdict(float)
+
+	async def submit(self, kind: str, work: Callable[[], Awaitable[Any]]) -> None:
+		previous = self._last_tasks.get(kind)
+		if previous is not None and self._pending[kind] >= MAX_PENDING_PER_KIND:
+			await asyncio.gather(previous, return_exceptions=True)
+
+		self._pending[kind] += 1
+		self._last_tasks[kind] = create_unprofiled_task(self._run(kind, previous, work))
+
+	async def submit_sync(self, kind: str, func: Callable[..., Any], *args: Any) -> None:
+		"""Run a blocking function (e.g. a file write) in a worker thread"""
+		await self.submit(kind, lambda: asyncio.to_thread(func, *args))
+
+	async def _run(self, kind: str, previous: asyncio.Task | None, work: Callable[[], Awaitable[Any]]) -> None:
+		if previous is not None:
+			await asyncio.gather(previous, return_exceptions=True)
+		start_time = time.time()
+		try:
+			await work()
+		except Exception as e:
+			logger.error(f'Background {kind} failed: {e}')
+		finally:
+			self._durations[kind] += time.time() - start_time
+			self._pending[kind] -= 1
+
+	async def drain(self) -> None:
+		"""Wait for all submitted work"""
+		await asyncio.gather(*self._last_tasks.values(), return_exceptions=True)
+		self._last_tasks.clear()
+
+	def take_durations(self) -> dict[str, float]:
+		"""Seconds spent per kind of work finished since the last call, i.e. the latency taken off the steps"""
+		durations = {f'background.{kind}': seconds for kind, seconds in self._durations.items()}
+		self._durations.clear()
+		return durations
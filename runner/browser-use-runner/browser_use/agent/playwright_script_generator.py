@@ -606,6 +606,9 @@ class PlaywrightScriptGenerator:
 					'                try:',
 					"                    with open(cookies_path, 'r', encoding='utf-8') as f_cookies:",
 					'                        cookies = json.load(f_cookies)',
+					'                        # storage_state snapshots keep the cookies under a key',
+					'                        if isinstance(cookies, dict):',
+					"                            cookies = cookies.get('cookies', [])",
 					'                        # Validate sameSite attribute',
 					"                        valid_same_site = ['Strict', 'Lax', 'None']",
 					'                        for cookie in cookies:',
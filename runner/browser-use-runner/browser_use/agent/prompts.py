@@ -1,4 +1,5 @@
 import importlib.resources
+from collections.abc import Callable
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
@@ -8,6 +9,9 @@ if TYPE_CHECKING:
 	from browser_use.agent.views import ActionResult, AgentStepInfo
 	from browser_use.browser.views import BrowserState
 
+# elements always get at least this many tokens, even if the rest of the message already fills the budget
+MIN_ELEMENT_TOKENS = 1000
+
 
 class SystemPrompt:
 	def __init__(
@@ -66,14 +70,34 @@ class AgentMessagePrompt:
 		result: list['ActionResult'] | None = None,
 		include_attributes: list[str] | None = None,
 		step_info: Optional['AgentStepInfo'] = None,
+		page_filtered_actions: str | None = None,
+		max_text_tokens: int | None = None,
+		count_tokens: Callable[[str], int] | None = None,
+		elements_delta: str | None = None,
 	):
 		self.state = state
 		self.result = result
 		self.include_attributes = include_attributes or []
 		self.step_info = step_info
+		self.page_filtered_actions = page_filtered_actions
+		# token budget for the text of the message, the page elements get what the rest of the message leaves
+		self.max_text_tokens = max_text_tokens
+		self.count_tokens = count_tokens
+		# changes since the page snapshot in the history, sent instead of the elements (see delta_state_messages)
+		self.elements_delta = elements_delta
 
 	def get_user_message(self, use_vision: bool = True) -> HumanMessage:
-		elements_text = self.state.element_tree.clickable_elements_to_string(include_attributes=self.include_attributes)
+		if self.elements_delta is not None:
+			elements_text = self.elements_delta
+		else:
+			max_element_tokens = None
+			if self.max_text_tokens is not None:
+				other_tokens = (self.count_tokens or (lambda text: len(text) // 3))(self._get_state_description(''))
+				max_element_tokens = max(self.max_text_tokens - other_tokens, MIN_ELEMENT_TOKENS)
+
+			elements_text = self.state.element_tree.clickable_elements_to_string(
+				include_attributes=self.include_attributes, max_tokens=max_element_tokens, count_tokens=self.count_tokens
+			)
 
 		has_content_above = (self.state.pixels_above or 0) > 0
 		has_content_below = (self.state.pixels_below or 0) > 0
@@ -94,6 +118,23 @@ class AgentMessagePrompt:
 		else:
 			elements_text = 'empty page'
 
+		state_description = self._get_state_description(elements_text)
+
+		if self.state.screenshot and use_vision is True:
+			# Format message for vision model
+			return HumanMessage(
+				content=[
+					{'type': 'text', 'text': state_description},
+					{
+						'type': 'image_url',
+						'image_url': {'url': f'data:image/png;base64,{self.state.screenshot}'},  # , 'detail': 'low'
+					},
+				]
+			)
+
+		return HumanMessage(content=state_description)
+
+	def _get_state_description(self, elements_text: str) -> str:
 		if self.step_info:
 			step_info_description = f'Current step: {self.step_info.step_number + 1}/{self.step_info.max_steps}'
 		else:
@@ -113,6 +154,9 @@ Interactive elements from top layer of the current page inside the viewport:
 {step_info_description}
 """
 
+		if self.page_filtered_actions:
+			state_description += f'\nFor this page, these additional actions are available:\n{self.page_filtered_actions}\n'
+
 		if self.result:
 			for i, result in enumerate(self.result):
 				if result.extracted_content:
@@ -122,19 +166,7 @@ Interactive elements from top layer of the current page inside the viewport:
 					error = result.error.split('\n')[-1]
 					state_description += f'\nAction error {i + 1}/{len(self.result)}: ...{error}'
 
-		if self.state.screenshot and use_vision is True:
-			# Format message for vision model
-			return HumanMessage(
-				content=[
-					{'type': 'text', 'text': state_description},
-					{
-						'type': 'image_url',
-						'image_url': {'url': f'data:image/png;base64,{self.state.screenshot}'},  # , 'detail': 'low'
-					},
-				]
-			)
-
-		return HumanMessage(content=state_description)
+		return state_description
 
 
 class PlannerPrompt(SystemPrompt):
@@ -9,7 +9,7 @@ import sys
 import time
 from collections.abc import Awaitable, Callable
 from pathlib import Path
-from typing import Any, Generic, TypeVar
+from typing import Any, Generic, TypeVar, get_args
 
 from dotenv import load_dotenv
 from langchain_core.language_models.chat_models import BaseChatModel
@@ -23,6 +23,7 @@ from langchain_core.messages import (
 from pydantic import BaseModel, ValidationError
 
 from browser_use.agent.gif import create_history_gif
+from browser_use.agent.llm_cache.service import LLMResponseCache
 from browser_use.agent.memory.service import Memory
 from browser_use.agent.memory.views import MemoryConfig
 from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
@@ -32,7 +33,12 @@ from browser_use.agent.message_manager.utils import (
 	is_model_without_tool_support,
 	save_conversation,
 )
+from browser_use.agent.message_manager.views import VisionRetentionPolicy
+from browser_use.agent.pipeline import BackgroundWork
 from browser_use.agent.prompts import AgentMessagePrompt, PlannerPrompt, SystemPrompt
+from browser_use.agent.streaming import StreamingActionParser
+from browser_use.agent.trajectory_cache.service import TrajectoryCache
+from browser_use.agent.trajectory_cache.views import Trajectory, TrajectoryStep
 from browser_use.agent.views import (
 	REQUIRED_LLM_API_ENV_VARS,
 	ActionResult,
@@ -56,13 +62,22 @@ from browser_use.dom.history_tree_processor.service import (
 	HistoryTreeProcessor,
 )
 from browser_use.exceptions import LLMException
+from browser_use.profiling import (
+	create_unprofiled_task,
+	profile_phase,
+	record_phase,
+	start_step_profile,
+	step_metrics,
+	stop_step_profile,
+)
 from browser_use.telemetry.service import ProductTelemetry
 from browser_use.telemetry.views import (
 	AgentEndTelemetryEvent,
 	AgentRunTelemetryEvent,
 	AgentStepTelemetryEvent,
 )
-from browser_use.utils import check_env_variables, time_execution_async, time_execution_sync
+from browser_use.tracing import set_span_attributes
+from browser_use.utils import LoopLagMonitor, ainvoke_llm, check_env_variables, time_execution_async, time_execution_sync
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -120,6 +135,7 @@ class Agent(Generic[Context]):
 		# Agent settings
 		use_vision: bool = True,
 		use_vision_for_planner: bool = False,
+		vision_retention: VisionRetentionPolicy | None = None,
 		save_conversation_path: str | None = None,
 		save_conversation_path_encoding: str | None = 'utf-8',
 		max_failures: int = 3,
@@ -144,10 +160,17 @@ class Agent(Generic[Context]):
 			'data-date-format',
 		],
 		max_actions_per_step: int = 10,
+		stream_actions: bool = False,
+		delta_state_messages: bool = False,
+		full_state_interval: int = 10,
 		tool_calling_method: ToolCallingMethod | None = 'auto',
 		page_extraction_llm: BaseChatModel | None = None,
 		planner_llm: BaseChatModel | None = None,
 		planner_interval: int = 1,  # Run planner every N steps
+		concurrent_planner: bool = False,
+		skip_unchanged_plans: bool = False,
+		pipeline_steps: bool = False,
+		profile_steps: bool = False,
 		is_planner_reasoning: bool = False,
 		extend_planner_system_message: str | None = None,
 		injected_agent_state: AgentState | None = None,
@@ -155,20 +178,32 @@ class Agent(Generic[Context]):
 		save_playwright_script_path: str | None = None,
 		enable_memory: bool = True,
 		memory_config: MemoryConfig | None = None,
+		llm_cache: LLMResponseCache | None = None,
+		trajectory_cache: TrajectoryCache | None = None,
 		source: str | None = None,
 	):
 		if page_extraction_llm is None:
 			page_extraction_llm = llm
 
+		if llm_cache is not None:
+			llm_cache.attach([llm, page_extraction_llm, planner_llm])
+			if llm_cache.config.mode == 'replay':
+				# a replay must not need a working API key, the connection test would only fail with a cache miss
+				llm._verified_api_keys = True
+
 		# Core components
 		self.task = task
 		self.llm = llm
 		self.controller = controller
 		self.sensitive_data = sensitive_data
+		self.trajectory_cache = trajectory_cache
+		# url the run started on after the initial actions, the trajectory of the run is cached under it
+		self._trajectory_start_url: str | None = None
 
 		self.settings = AgentSettings(
 			use_vision=use_vision,
 			use_vision_for_planner=use_vision_for_planner,
+			vision_retention=vision_retention or VisionRetentionPolicy(),
 			save_conversation_path=save_conversation_path,
 			save_conversation_path_encoding=save_conversation_path_encoding,
 			max_failures=max_failures,
@@ -182,10 +217,17 @@ class Agent(Generic[Context]):
 			available_file_paths=available_file_paths,
 			include_attributes=include_attributes,
 			max_actions_per_step=max_actions_per_step,
+			stream_actions=stream_actions,
+			delta_state_messages=delta_state_messages,
+			full_state_interval=full_state_interval,
 			tool_calling_method=tool_calling_method,
 			page_extraction_llm=page_extraction_llm,
 			planner_llm=planner_llm,
 			planner_interval=planner_interval,
+			concurrent_planner=concurrent_planner,
+			skip_unchanged_plans=skip_unchanged_plans,
+			pipeline_steps=pipeline_steps,
+			profile_steps=profile_steps,
 			is_planner_reasoning=is_planner_reasoning,
 			save_playwright_script_path=save_playwright_script_path,
 			extend_planner_system_message=extend_planner_system_message,
@@ -236,9 +278,6 @@ class Agent(Generic[Context]):
 			f'extraction_model={getattr(self.settings.page_extraction_llm, "model_name", None)} '
 		)
 
-		# Verify we can connect to the LLM
-		self._verify_llm_connection()
-
 		# Initialize available actions for system prompt (only non-filtered actions)
 		# These will be used for the system prompt to maintain caching
 		self.unfiltered_actions = self.controller.registry.get_prompt_description()
@@ -257,10 +296,15 @@ class Agent(Generic[Context]):
 			).get_system_message(),
 			settings=MessageManagerSettings(
 				max_input_tokens=self.settings.max_input_tokens,
+				model_name=self.model_name,
 				include_attributes=self.settings.include_attributes,
 				message_context=self.settings.message_context,
 				sensitive_data=sensitive_data,
 				available_file_paths=self.settings.available_file_paths,
+				add_cache_control=self.chat_model_library in ('ChatAnthropic', 'ChatAnthropicVertex'),
+				delta_state_messages=self.settings.delta_state_messages,
+				full_state_interval=self.settings.full_state_interval,
+				vision_retention=self.settings.vision_retention,
 			),
 			state=self.state.message_manager_state,
 		)
@@ -322,6 +366,19 @@ class Agent(Generic[Context]):
 		# Telemetry
 		self.telemetry = ProductTelemetry()
 
+		# usage_metadata of the last model response, for the prompt cache tokens of StepMetadata
+		self._last_usage_metadata: dict[str, Any] | None = None
+
+		# planner for the next step started after the actions of the current one (concurrent_planner)
+		self._planner_task: asyncio.Task[str | None] | None = None
+		self._last_plan_key: str | None = None
+		self._unchanged_plans = 0
+
+		# conversation files, callbacks and hooks that run while the next steps continue (pipeline_steps)
+		self._background = BackgroundWork()
+		# hook durations of profiled steps recorded before the step starts (profile_steps)
+		self._pending_phases: dict[str, float] = {}
+
 		if self.settings.save_conversation_path:
 			logger.info(f'Saving conversation to {self.settings.save_conversation_path}')
 
@@ -387,14 +444,16 @@ class Agent(Generic[Context]):
 
 	def _setup_action_models(self) -> None:
 		"""Setup dynamic action models from controller's registry"""
+		self._agent_output_types: dict[type[ActionModel], type[AgentOutput]] = {}
+
 		# Initially only include actions with no filters
 		self.ActionModel = self.controller.registry.create_action_model()
 		# Create output model with the dynamic actions
-		self.AgentOutput = AgentOutput.type_with_custom_actions(self.ActionModel)
+		self.AgentOutput = self._get_agent_output_type(self.ActionModel)
 
 		# used to force the done action when max_steps is reached
 		self.DoneActionModel = self.controller.registry.create_action_model(include_actions=['done'])
-		self.DoneAgentOutput = AgentOutput.type_with_custom_actions(self.DoneActionModel)
+		self.DoneAgentOutput = self._get_agent_output_type(self.DoneActionModel)
 
 	def _set_tool_calling_method(self) -> ToolCallingMethod | None:
 		tool_calling_method = self.settings.tool_calling_method
@@ -437,33 +496,34 @@ class Agent(Generic[Context]):
 	async def step(self, step_info: AgentStepInfo | None = None) -> None:
 		"""Execute one step of the task"""
 		logger.info(f'📍 Step {self.state.n_steps}')
+		set_span_attributes(step=self.state.n_steps, agent_id=self.state.agent_id)
 		state = None
 		model_output = None
 		result: list[ActionResult] = []
 		step_start_time = time.time()
+		phase_durations: dict[str, float] = {}
+		profile_token = start_step_profile(phase_durations) if self.settings.profile_steps else None
 		tokens = 0
+		self._last_usage_metadata = None
+		first_action_task: asyncio.Task[ActionResult] | None = None
 
 		try:
 			state = await self.browser_context.get_state(cache_clickable_elements_hashes=True)
 			current_page = await self.browser_context.get_current_page()
+			phase_durations['state'] = time.time() - step_start_time
 
-			# generate procedural memory if needed
+			# generate procedural memory if needed, in the background so the step does not wait for mem0
 			if self.enable_memory and self.memory and self.state.n_steps % self.memory.config.memory_interval == 0:
-				self.memory.create_procedural_memory(self.state.n_steps)
+				self.memory.schedule_procedural_memory(self.state.n_steps)
 
 			await self._raise_if_stopped_or_paused()
 
 			# Update action models with page-specific actions
 			await self._update_action_models_for_page(current_page)
 
-			# Get page-specific filtered actions
+			# Get page-specific filtered actions, they are part of the state message so the history prefix stays stable
 			page_filtered_actions = self.controller.registry.get_prompt_description(current_page)
 
-			# If there are page-specific actions, add them as a special message for this step only
-			if page_filtered_actions:
-				page_action_message = f'For this page, these additional actions are available:\n{page_filtered_actions}'
-				self._message_manager._add_message_with_tokens(HumanMessage(content=page_action_message))
-
 			# If using raw tool calling method, we need to update the message context with new actions
 			if self.tool_calling_method == 'raw':
 				# For raw tool calling, get all non-filtered actions plus the page-filtered ones
@@ -481,11 +541,23 @@ class Agent(Generic[Context]):
 					updated_context = f'Available actions: {all_actions}'
 				self._message_manager.settings.message_context = updated_context
 
-			self._message_manager.add_state_message(state, self.state.last_result, step_info, self.settings.use_vision)
+			self._message_manager.add_state_message(
+				state,
+				self.state.last_result,
+				step_info,
+				self.settings.use_vision,
+				page_filtered_actions=page_filtered_actions or None,
+			)
 
 			# Run planner at specified intervals if planner is configured
-			if self.settings.planner_llm and self.state.n_steps % self.settings.planner_interval == 0:
+			if self._planner_task is not None:
+				# started concurrently after the last actions, a late plan is attached on the next step
+				if self._planner_task.done():
+					plan = self._take_planner_result()
+					self._message_manager.add_plan(plan, position=-1)
+			elif self._should_run_planner(self.state.n_steps):
 				plan = await self._run_planner()
+				self._track_plan(plan)
 				# add plan before last state message
 				self._message_manager.add_plan(plan, position=-1)
 
@@ -502,8 +574,14 @@ class Agent(Generic[Context]):
 			input_messages = self._message_manager.get_messages()
 			tokens = self._message_manager.state.history.current_tokens
 
+			def dispatch_first_action(action: ActionModel) -> None:
+				nonlocal first_action_task
+				first_action_task = asyncio.create_task(self._execute_streamed_action(action))
+
+			llm_start_time = time.time()
+			phase_durations['prepare'] = llm_start_time - step_start_time - phase_durations['state']
 			try:
-				model_output = await self.get_next_action(input_messages)
+				model_output = await self.get_next_action(input_messages, on_first_action=dispatch_first_action)
 				if (
 					not model_output.action
 					or not isinstance(model_output.action, list)
@@ -528,21 +606,17 @@ class Agent(Generic[Context]):
 						)
 						model_output.action = [action_instance]
 
+				phase_durations['llm'] = time.time() - llm_start_time
+
 				# Check again for paused/stopped state after getting model output
 				await self._raise_if_stopped_or_paused()
 
 				self.state.n_steps += 1
 
-				if self.register_new_step_callback:
-					if inspect.iscoroutinefunction(self.register_new_step_callback):
-						await self.register_new_step_callback(state, model_output, self.state.n_steps)
-					else:
-						self.register_new_step_callback(state, model_output, self.state.n_steps)
-				if self.settings.save_conversation_path:
-					target = self.settings.save_conversation_path + f'_{self.state.n_steps}.txt'
-					save_conversation(input_messages, model_output, target, self.settings.save_conversation_path_encoding)
+				await self._report_step(state, model_output, input_messages)
 
-				self._message_manager._remove_last_state_message()  # we dont want the whole state in the chat history
+				# we dont want the whole state in the chat history, only the screenshot if the vision retention keeps it
+				self._message_manager._remove_last_state_message(keep_screenshot=True)
 
 				# check again if Ctrl+C was pressed before we commit the output to history
 				await self._raise_if_stopped_or_paused()
@@ -550,23 +624,30 @@ class Agent(Generic[Context]):
 				self._message_manager.add_model_output(model_output)
 			except asyncio.CancelledError:
 				# Task was cancelled due to Ctrl+C
+				await self._cancel_action_task(first_action_task)
 				self._message_manager._remove_last_state_message()
 				raise InterruptedError('Model query cancelled by user')
 			except InterruptedError:
 				# Agent was paused during get_next_action
+				await self._cancel_action_task(first_action_task)
 				self._message_manager._remove_last_state_message()
 				raise  # Re-raise to be caught by the outer try/except
 			except Exception as e:
 				# model call failed, remove last state message from history
+				await self._cancel_action_task(first_action_task)
 				self._message_manager._remove_last_state_message()
 				raise e
 
-			result: list[ActionResult] = await self.multi_act(model_output.action)
+			actions_start_time = time.time()
+			result: list[ActionResult] = await self.multi_act(model_output.action, first_action_task=first_action_task)
+			phase_durations['actions'] = time.time() - actions_start_time
 
 			self.state.last_result = result
 
 			if len(result) > 0 and result[-1].is_done:
 				logger.info(f'📄 Result: {result[-1].extracted_content}')
+			elif self.settings.concurrent_planner:
+				self._start_planner(result)
 
 			self.state.consecutive_failures = 0
 
@@ -589,6 +670,10 @@ class Agent(Generic[Context]):
 
 		finally:
 			step_end_time = time.time()
+			if profile_token is not None:
+				stop_step_profile(profile_token)
+				phase_durations.update(self._pending_phases)
+				self._pending_phases = {}
 			actions = [a.model_dump(exclude_unset=True) for a in model_output.action] if model_output else []
 			self.telemetry.capture(
 				AgentStepTelemetryEvent(
@@ -608,8 +693,40 @@ class Agent(Generic[Context]):
 					step_start_time=step_start_time,
 					step_end_time=step_end_time,
 					input_tokens=tokens,
+					phase_durations={**phase_durations, **self._background.take_durations()},
+					**self._get_cache_token_usage(),
 				)
 				self._make_history_item(model_output, state, result, metadata)
+				if profile_token is not None:
+					step_metrics.observe({'step': metadata.duration_seconds, **metadata.phase_durations})
+
+	def _record_finished_step_phase(self, phase: str, seconds: float) -> None:
+		"""Add a phase that runs after the step's metadata was recorded, like the on_step_end hook"""
+		step_metrics.observe({phase: seconds})
+		if self.state.history.history and (metadata := self.state.history.history[-1].metadata):
+			metadata.phase_durations[phase] = metadata.phase_durations.get(phase, 0.0) + seconds
+
+	async def _report_step(self, state: BrowserState, model_output: AgentOutput, input_messages: list[BaseMessage]) -> None:
+		"""Hand the step to the new step callback and save the conversation, in the background with pipeline_steps"""
+		n_steps = self.state.n_steps
+		callback = self.register_new_step_callback
+		if callback:
+			if inspect.iscoroutinefunction(callback) and self.settings.pipeline_steps:
+				await self._background.submit('step_callback', lambda: callback(state, model_output, n_steps))
+			else:
+				with profile_phase('hooks.step_callback'):
+					if inspect.iscoroutinefunction(callback):
+						await callback(state, model_output, n_steps)
+					else:
+						callback(state, model_output, n_steps)
+
+		if self.settings.save_conversation_path:
+			target = self.settings.save_conversation_path + f'_{n_steps}.txt'
+			args = (input_messages, model_output, target, self.settings.save_conversation_path_encoding)
+			if self.settings.pipeline_steps:
+				await self._background.submit_sync('conversation', save_conversation, *args)
+			else:
+				save_conversation(*args)
 
 	@time_execution_async('--handle_step_error (agent)')
 	async def _handle_step_error(self, error: Exception) -> list[ActionResult]:
@@ -701,19 +818,32 @@ class Agent(Generic[Context]):
 			return input_messages
 
 	@time_execution_async('--get_next_action (agent)')
-	async def get_next_action(self, input_messages: list[BaseMessage]) -> AgentOutput:
-		"""Get next action from LLM based on current state"""
+	async def get_next_action(
+		self,
+		input_messages: list[BaseMessage],
+		on_first_action: Callable[[ActionModel], None] | None = None,
+	) -> AgentOutput:
+		"""
+		Get next action from LLM based on current state.
+
+		With stream_actions, on_first_action is called with the first action as soon as it was streamed completely.
+		"""
 		input_messages = self._convert_input_messages(input_messages)
 
-		if self.tool_calling_method == 'raw':
+		if on_first_action and self.settings.stream_actions and self.tool_calling_method in ('raw', 'function_calling'):
+			parsed = await self._stream_next_action(input_messages, on_first_action)
+			response = {'parsed': parsed}
+
+		elif self.tool_calling_method == 'raw':
 			logger.debug(f'Using {self.tool_calling_method} for {self.chat_model_library}')
 			try:
-				output = self.llm.invoke(input_messages)
+				output = await ainvoke_llm(self.llm, input_messages)
 				response = {'raw': output, 'parsed': None}
 			except Exception as e:
 				logger.error(f'Failed to invoke model: {str(e)}')
 				raise LLMException(401, 'LLM API call failed') from e
-			# TODO: currently invoke does not return reasoning_content, we should override invoke
+			self._last_usage_metadata = getattr(output, 'usage_metadata', None)
+			# TODO: currently ainvoke does not return reasoning_content, we should override it
 			output.content = self._remove_think_tags(str(output.content))
 			try:
 				parsed_json = extract_json_from_model_output(output.content)
@@ -738,6 +868,9 @@ class Agent(Generic[Context]):
 			structured_llm = self.llm.with_structured_output(self.AgentOutput, include_raw=True, method=self.tool_calling_method)
 			response: dict[str, Any] = await structured_llm.ainvoke(input_messages)  # type: ignore
 
+		if self.tool_calling_method != 'raw' and 'raw' in response:
+			self._last_usage_metadata = getattr(response['raw'], 'usage_metadata', None)
+
 		# Handle tool call responses
 		if response.get('parsing_error') and 'raw' in response:
 			raw_msg = response['raw']
@@ -783,6 +916,73 @@ class Agent(Generic[Context]):
 
 		return parsed
 
+	async def _stream_next_action(
+		self,
+		input_messages: list[BaseMessage],
+		on_first_action: Callable[[ActionModel], None],
+	) -> AgentOutput:
+		"""Stream the model output and hand over the first action while the rest of the response is generated"""
+		logger.debug(f'Streaming {self.tool_calling_method} output of {self.chat_model_library}')
+		if self.tool_calling_method == 'function_calling':
+			llm = self.llm.bind_tools([self.AgentOutput], tool_choice=self.AgentOutput.__name__)
+		else:
+			llm = self.llm
+
+		action_model: type[ActionModel] = get_args(self.AgentOutput.model_fields['action'].annotation)[0]
+		parser = StreamingActionParser()
+		tool_call_index = None
+		full_message = None
+		dispatched = False
+		start_time = time.time()
+
+		try:
+			async for chunk in llm.astream(input_messages):
+				if full_message is None:
+					record_phase('llm.first_token', time.time() - start_time)
+				full_message = chunk if full_message is None else full_message + chunk
+				if self.tool_calling_method == 'function_calling':
+					text = ''
+					for tool_call_chunk in chunk.tool_call_chunks:
+						if tool_call_index is None:
+							tool_call_index = tool_call_chunk.get('index')
+						if tool_call_chunk.get('index') == tool_call_index:
+							text += tool_call_chunk.get('args') or ''
+				else:
+					text = chunk.content if isinstance(chunk.content, str) else ''
+
+				actions = parser.feed(text)
+				if actions and not dispatched:
+					dispatched = True
+					try:
+						first_action = action_model.model_validate(actions[0])
+					except ValidationError:
+						# an invalid action is reported by the final parse of the whole response
+						continue
+					if first_action.model_dump(exclude_unset=True):
+						logger.debug(f'Dispatching first action before the response is complete: {actions[0]}')
+						on_first_action(first_action)
+		except Exception as e:
+			logger.error(f'Failed to stream model output: {str(e)}')
+			raise LLMException(401, 'LLM API call failed') from e
+		self._last_usage_metadata = getattr(full_message, 'usage_metadata', None)
+
+		try:
+			if self.tool_calling_method == 'function_calling' and full_message is not None and full_message.tool_calls:
+				return self.AgentOutput(**full_message.tool_calls[0]['args'])
+			parsed_json = extract_json_from_model_output(self._remove_think_tags(parser.text))
+			return self.AgentOutput(**parsed_json)
+		except (ValueError, ValidationError) as e:
+			logger.warning(f'Failed to parse model output: {parser.text} {str(e)}')
+			raise ValueError('Could not parse response.')
+
+	def _get_cache_token_usage(self) -> dict[str, int]:
+		"""Prompt cache tokens of the last model response, as StepMetadata fields"""
+		details = (self._last_usage_metadata or {}).get('input_token_details') or {}
+		return {
+			'cache_read_input_tokens': details.get('cache_read') or 0,
+			'cache_creation_input_tokens': details.get('cache_creation') or 0,
+		}
+
 	def _log_agent_run(self) -> None:
 		"""Log the agent run"""
 		logger.info(f'🚀 Starting task: {self.task}')
@@ -844,7 +1044,13 @@ class Agent(Generic[Context]):
 		)
 		signal_handler.register()
 
+		# warn when something blocks the event loop, which stalls every other agent of this process
+		lag_monitor = LoopLagMonitor.ensure_running()
+
 		try:
+			# Verify we can connect to the LLM
+			await self._verify_llm_connection()
+
 			self._log_agent_run()
 
 			# Execute initial actions if provided
@@ -852,7 +1058,15 @@ class Agent(Generic[Context]):
 				result = await self.multi_act(self.initial_actions, check_for_new_elements=False)
 				self.state.last_result = result
 
-			for step in range(max_steps):
+			# replayed steps count against max_steps, the LLM continues with the remaining ones
+			replayed_steps, step_started = 0, False
+			if self.trajectory_cache is not None:
+				replayed_steps, step_started = await self._replay_cached_trajectory(max_steps, on_step_start, on_step_end)
+			if replayed_steps and self.state.history.is_done():
+				await self.log_completion()
+				return self.state.history
+
+			for step in range(replayed_steps, max_steps):
 				# Check if waiting for user input after Ctrl+C
 				if self.state.paused:
 					signal_handler.wait_for_resume()
@@ -873,14 +1087,15 @@ class Agent(Generic[Context]):
 					if self.state.stopped:  # Allow stopping while paused
 						break
 
-				if on_step_start is not None:
-					await on_step_start(self)
+				if on_step_start is not None and not step_started:
+					await self._run_step_start_hook(on_step_start)
+				step_started = False
 
 				step_info = AgentStepInfo(step_number=step, max_steps=max_steps)
 				await self.step(step_info)
 
 				if on_step_end is not None:
-					await on_step_end(self)
+					await self._run_step_end_hook(on_step_end)
 
 				if self.state.history.is_done():
 					if self.settings.validate_output and step < max_steps - 1:
@@ -920,6 +1135,14 @@ class Agent(Generic[Context]):
 			# Unregister signal handlers before cleanup
 			signal_handler.unregister()
 
+			if lag_monitor is not None:
+				await lag_monitor.release()
+
+			await self._background.drain()
+
+			if self.trajectory_cache is not None and self._trajectory_start_url and self.state.history.is_successful():
+				self.trajectory_cache.put(Trajectory.from_history(self.task, self._trajectory_start_url, self.state.history))
+
 			self.telemetry.capture(
 				AgentEndTelemetryEvent(
 					agent_id=self.state.agent_id,
@@ -960,23 +1183,51 @@ class Agent(Generic[Context]):
 
 				create_history_gif(task=self.task, history=self.state.history, output_path=output_path)
 
+	async def _run_step_start_hook(self, on_step_start: AgentHookFunc) -> None:
+		hook_start_time = time.time()
+		await on_step_start(self)
+		if self.settings.profile_steps:
+			# the step about to run adds it to its phases
+			self._pending_phases['hooks.on_step_start'] = time.time() - hook_start_time
+
+	async def _run_step_end_hook(self, on_step_end: AgentHookFunc) -> None:
+		if self.settings.pipeline_steps:
+			# the hook sees the agent while the next step runs, e.g. a stop() takes effect one step later
+			await self._background.submit('on_step_end', lambda: on_step_end(self))
+		else:
+			hook_start_time = time.time()
+			await on_step_end(self)
+			if self.settings.profile_steps:
+				self._record_finished_step_phase('hooks.on_step_end', time.time() - hook_start_time)
+
 	# @observe(name='controller.multi_act')
 	@time_execution_async('--multi-act (agent)')
 	async def multi_act(
 		self,
 		actions: list[ActionModel],
 		check_for_new_elements: bool = True,
+		first_action_task: asyncio.Task[ActionResult] | None = None,
 	) -> list[ActionResult]:
-		"""Execute multiple actions"""
+		"""Execute multiple actions, the first one may already run in first_action_task (see stream_actions)"""
 		results = []
 
 		cached_selector_map = await self.browser_context.get_selector_map()
 		cached_path_hashes = {e.hash.branch_path_hash for e in cached_selector_map.values()}
 
-		await self.browser_context.remove_highlights()
+		if first_action_task is None:
+			await self.browser_context.remove_highlights()
 
+		# the cheap check compares the page with the latest extracted state, which is only the state the indices of the
+		# actions refer to until a state is extracted here, after that every indexed action is checked with a full state
+		extracted_state = False
 		for i, action in enumerate(actions):
-			if action.get_index() is not None and i != 0:
+			# a full state is only extracted when the cheap check can not tell that the page kept its elements
+			if (
+				action.get_index() is not None
+				and i != 0
+				and (extracted_state or not await self.browser_context.is_cached_state_current(cached_selector_map))
+			):
+				extracted_state = True
 				new_state = await self.browser_context.get_state(cache_clickable_elements_hashes=False)
 				new_selector_map = new_state.selector_map
 
@@ -1000,16 +1251,11 @@ class Agent(Generic[Context]):
 					break
 
 			try:
-				await self._raise_if_stopped_or_paused()
-
-				result = await self.controller.act(
-					action,
-					self.browser_context,
-					self.settings.page_extraction_llm,
-					self.sensitive_data,
-					self.settings.available_file_paths,
-					context=self.context,
-				)
+				if i == 0 and first_action_task is not None:
+					result = await first_action_task
+				else:
+					await self._raise_if_stopped_or_paused()
+					result = await self._execute_action(action)
 
 				results.append(result)
 
@@ -1030,6 +1276,33 @@ class Agent(Generic[Context]):
 
 		return results
 
+	async def _execute_action(self, action: ActionModel) -> ActionResult:
+		return await self.controller.act(
+			action,
+			self.browser_context,
+			self.settings.page_extraction_llm,
+			self.sensitive_data,
+			self.settings.available_file_paths,
+			context=self.context,
+		)
+
+	async def _execute_streamed_action(self, action: ActionModel) -> ActionResult:
+		await self._raise_if_stopped_or_paused()
+		await self.browser_context.remove_highlights()
+		return await self._execute_action(action)
+
+	async def _cancel_action_task(self, task: asyncio.Task | None) -> None:
+		"""Cancel an action started while the model output was streaming, e.g. because the stream failed"""
+		if task is None:
+			return
+		if not task.done():
+			task.cancel()
+			logger.info('Cancelled the action started from the incomplete model output')
+		try:
+			await task
+		except (asyncio.CancelledError, Exception):
+			pass
+
 	async def _validate_output(self) -> bool:
 		"""Validate the output of the last action is what the user wanted"""
 		system_msg = (
@@ -1098,15 +1371,20 @@ class Agent(Generic[Context]):
 		max_retries: int = 3,
 		skip_failures: bool = True,
 		delay_between_actions: float = 2.0,
+		wait_timeout: float = 10.0,
 	) -> list[ActionResult]:
 		"""
 		Rerun a saved history of actions with error handling and retry logic.
 
+		Before each step, waits until the page is loaded and shows the elements the step interacts with, and
+		extracting the state waits for the network to be idle, so steps are replayed as soon as the page is ready.
+
 		Args:
 				history: The history to replay
 				max_retries: Maximum number of retries per action
 				skip_failures: Whether to skip failed actions or stop execution
-				delay_between_actions: Delay between actions in seconds
+				delay_between_actions: Delay in seconds before a step whose page could not be confirmed to be ready
+				wait_timeout: Maximum time in seconds to wait for the page and the elements of a step
 
 		Returns:
 				List of action results
@@ -1134,7 +1412,8 @@ class Agent(Generic[Context]):
 			retry_count = 0
 			while retry_count < max_retries:
 				try:
-					result = await self._execute_history_step(history_item, delay_between_actions)
+					await self._wait_for_history_step(history_item, wait_timeout, delay_between_actions)
+					result = await self._execute_history_step(history_item)
 					results.extend(result)
 					break
 
@@ -1148,11 +1427,123 @@ class Agent(Generic[Context]):
 							raise RuntimeError(error_msg)
 					else:
 						logger.warning(f'Step {i + 1} failed (attempt {retry_count}/{max_retries}), retrying...')
-						await asyncio.sleep(delay_between_actions)
 
 		return results
 
-	async def _execute_history_step(self, history_item: AgentHistory, delay: float) -> list[ActionResult]:
+	async def _replay_cached_trajectory(
+		self,
+		max_steps: int,
+		on_step_start: AgentHookFunc | None = None,
+		on_step_end: AgentHookFunc | None = None,
+	) -> tuple[int, bool]:
+		"""
+		Replay the cached steps of the task until the page or an element does not match. Returns how many steps were
+		replayed and whether on_step_start already ran for the step after them, which the LLM then takes over.
+
+		Replayed steps go through the same hooks, callbacks and telemetry as LLM steps and are recorded like them, so
+		the LLM continues from where the replay stopped. The last of max_steps is left to the LLM unless it is the
+		cached done step, so a long trajectory can not use them up.
+		"""
+		assert self.trajectory_cache is not None
+		page = await self.browser_context.get_current_page()
+		self._trajectory_start_url = page.url
+		trajectory = self.trajectory_cache.get(self.task, page.url)
+		if trajectory is None:
+			return 0, False
+
+		logger.info(f'🔁 Replaying {len(trajectory.steps)} cached steps')
+		history_length = len(self.state.history.history)
+		for i, cached_step in enumerate(trajectory.steps):
+			if cached_step.is_done and not self.trajectory_cache.config.replay_done:
+				logger.info('🔁 Replayed all cached steps, the LLM writes the result')
+				break
+			if i >= max_steps - 1 and not cached_step.is_done:
+				logger.info(f'🔁 Replayed {i} cached steps, the LLM takes the last of {max_steps} steps')
+				break
+			await self._raise_if_stopped_or_paused()
+			if on_step_start is not None:
+				await self._run_step_start_hook(on_step_start)
+			step_history_length = len(self.state.history.history)
+			mismatch = await self._replay_step(cached_step)
+			if len(self.state.history.history) == step_history_length:
+				# nothing was executed, the LLM takes over the step that was already started
+				logger.info(f'🔁 Cached step {i + 1} does not match the page ({mismatch}), continuing with the LLM')
+				return len(self.state.history.history) - history_length, on_step_start is not None
+			if on_step_end is not None:
+				await self._run_step_end_hook(on_step_end)
+			if mismatch:
+				logger.info(f'🔁 Cached step {i + 1} did not run as cached ({mismatch}), continuing with the LLM')
+				break
+
+		return len(self.state.history.history) - history_length, False
+
+	async def _replay_step(self, cached_step: TrajectoryStep) -> str | None:
+		"""Replay one cached step with its elements re-identified on the current page, returns why it did not match"""
+		step_start_time = time.time()
+		state = await self.browser_context.get_state(cache_clickable_elements_hashes=True)
+		if state.url != cached_step.url:
+			return f'expected {cached_step.url}, got {state.url}'
+
+		await self._update_action_models_for_page(await self.browser_context.get_current_page())
+		try:
+			model_output = self.AgentOutput.model_validate(cached_step.model_output)
+		except ValidationError as e:
+			return f'actions not available: {e.error_count()} validation errors'
+
+		elements = cached_step.interacted_element + [None] * (len(model_output.action) - len(cached_step.interacted_element))
+		for action, element in zip(model_output.action, elements):
+			if await self._update_action_indices(element, action, state) is None:
+				return f'element {element.tag_name if element else ""} not found'
+
+		logger.info(f'📍 Step {self.state.n_steps} (replayed)')
+		self.state.n_steps += 1
+		await self._report_step(state, model_output, [])
+		self._message_manager.add_model_output(model_output)
+
+		result = await self.multi_act(model_output.action)
+		self.state.last_result = result
+		self.telemetry.capture(
+			AgentStepTelemetryEvent(
+				agent_id=self.state.agent_id,
+				step=self.state.n_steps,
+				actions=[a.model_dump(exclude_unset=True) for a in model_output.action],
+				consecutive_failures=self.state.consecutive_failures,
+				step_error=[r.error for r in result if r.error] if result else ['No result'],
+			)
+		)
+		phase_durations, self._pending_phases = self._pending_phases, {}
+		metadata = StepMetadata(
+			step_number=self.state.n_steps,
+			step_start_time=step_start_time,
+			step_end_time=time.time(),
+			input_tokens=0,
+			phase_durations={**phase_durations, **self._background.take_durations()},
+		)
+		self._make_history_item(model_output, state, result, metadata)
+
+		if not result:
+			return 'no action was executed'
+		if any(r.error for r in result):
+			return result[-1].error or 'action failed'
+		if len(result) < len(model_output.action) and not result[-1].is_done:
+			# multi_act stopped because the page changed between the actions
+			return result[-1].extracted_content
+		return None
+
+	async def _wait_for_history_step(self, history_item: AgentHistory, timeout: float, fallback_delay: float) -> None:
+		"""Wait until the page shows the elements a history step interacts with, or sleep the fallback delay"""
+		# xpaths of elements in iframes and shadow roots are relative to those, such elements are only re-identified
+		xpaths = [
+			element.xpath
+			for element in history_item.state.interacted_element
+			if element is not None and element.xpath.startswith('html') and 'iframe' not in element.entire_parent_branch_path
+		]
+		if await self.browser_context.wait_for_elements(xpaths, timeout):
+			return
+		logger.debug(f'Page not ready after {timeout}s, waiting {fallback_delay}s')
+		await asyncio.sleep(fallback_delay)
+
+	async def _execute_history_step(self, history_item: AgentHistory) -> list[ActionResult]:
 		"""Execute a single step from history with element validation"""
 		state = await self.browser_context.get_state(cache_clickable_elements_hashes=False)
 		if not state or not history_item.model_output:
@@ -1169,10 +1560,7 @@ class Agent(Generic[Context]):
 			if updated_action is None:
 				raise ValueError(f'Could not find matching element {i} in current page')
 
-		result = await self.multi_act(updated_actions)
-
-		await asyncio.sleep(delay)
-		return result
+		return await self.multi_act(updated_actions)
 
 	async def _update_action_indices(
 		self,
@@ -1270,7 +1658,7 @@ class Agent(Generic[Context]):
 
 		return converted_actions
 
-	def _verify_llm_connection(self) -> bool:
+	async def _verify_llm_connection(self) -> bool:
 		"""
 		Verify that the LLM API keys are setup and the LLM API is responding properly.
 		Helps prevent errors due to running out of API credits, missing env vars, or network issues.
@@ -1293,8 +1681,8 @@ class Agent(Generic[Context]):
 		test_prompt = 'What is the capital of France? Respond with a single word.'
 		test_answer = 'paris'
 		try:
-			# dont convert this to async! it *should* block any subsequent llm calls from running
-			response = self.llm.invoke([HumanMessage(content=test_prompt)])
+			# awaited before the first step, so no other llm call of this agent runs before the check finished
+			response = await ainvoke_llm(self.llm, [HumanMessage(content=test_prompt)])
 			response_text = str(response.content).lower()
 
 			if test_answer in response_text:
@@ -1321,8 +1709,61 @@ class Agent(Generic[Context]):
 			else:
 				pass
 
-	async def _run_planner(self) -> str | None:
-		"""Run the planner to analyze state and suggest next steps"""
+	def _should_run_planner(self, step: int) -> bool:
+		"""Planner steps, with skip_unchanged_plans the interval doubles for every unchanged plan (up to 8x)"""
+		if not self.settings.planner_llm:
+			return False
+		interval = self.settings.planner_interval
+		if self.settings.skip_unchanged_plans:
+			interval *= 2**self._unchanged_plans
+		return step % interval == 0
+
+	def _track_plan(self, plan: str | None) -> None:
+		"""Count how many plans in a row suggested the same next steps"""
+		if not plan:
+			return
+		try:
+			plan_key = json.dumps(json.loads(plan).get('next_steps'), sort_keys=True)
+		except (json.JSONDecodeError, AttributeError):
+			plan_key = plan.strip()
+
+		if plan_key == self._last_plan_key:
+			self._unchanged_plans = min(self._unchanged_plans + 1, 3)
+		else:
+			self._unchanged_plans = 0
+		self._last_plan_key = plan_key
+
+	def _start_planner(self, result: list[ActionResult]) -> None:
+		"""
+		Start the planner of the next step right after the actions, so it runs while the next state is captured. It
+		sees the history and the action results, not the next page state.
+		"""
+		if self._planner_task is not None or not self._should_run_planner(self.state.n_steps):
+			return
+
+		results = []
+		for r in result:
+			if r.extracted_content:
+				results.append(f'Action result: {r.extracted_content}')
+			if r.error:
+				results.append(f'Action error: {r.error.splitlines()[-1]}')
+		extra_messages = [HumanMessage(content='\n'.join(results))] if results else []
+		self._planner_task = create_unprofiled_task(self._run_planner(extra_messages))
+
+	def _take_planner_result(self) -> str | None:
+		"""Result of the finished concurrent planner, a failed planner does not fail the step"""
+		task, self._planner_task = self._planner_task, None
+		if task is None or task.cancelled():
+			return None
+		if task.exception() is not None:
+			logger.warning(f'Concurrent planner failed: {task.exception()}')
+			return None
+		plan = task.result()
+		self._track_plan(plan)
+		return plan
+
+	async def _run_planner(self, extra_messages: list[BaseMessage] | None = None) -> str | None:
+		"""Run the planner to analyze state and suggest next steps, extra_messages are appended to the history"""
 		# Skip planning if no planner_llm is set
 		if not self.settings.planner_llm:
 			return None
@@ -1346,6 +1787,7 @@ class Agent(Generic[Context]):
 				extended_planner_system_prompt=self.settings.extend_planner_system_message,
 			),
 			*self._message_manager.get_messages()[1:],  # Use full message history except the first
+			*(extra_messages or []),
 		]
 
 		if not self.settings.use_vision_for_planner and self.settings.use_vision:
@@ -1396,6 +1838,12 @@ class Agent(Generic[Context]):
 	async def close(self):
 		"""Close all resources"""
 		try:
+			if self.memory:
+				self.memory.cancel_consolidations()
+			if self._planner_task is not None:
+				self._planner_task.cancel()
+				self._planner_task = None
+
 			# First close browser resources
 			if self.browser_context and not self.injected_browser_context:
 				await self.browser_context.close()
@@ -1408,13 +1856,20 @@ class Agent(Generic[Context]):
 		except Exception as e:
 			logger.error(f'Error during cleanup: {e}')
 
+	@time_execution_async('--update_action_models_for_page', phase='action_models')
 	async def _update_action_models_for_page(self, page) -> None:
 		"""Update action models with page-specific actions"""
-		# Create new action model with current page's filtered actions
+		# Create new action model with current page's filtered actions (cached by the registry per set of actions)
 		self.ActionModel = self.controller.registry.create_action_model(page=page)
 		# Update output model with the new actions
-		self.AgentOutput = AgentOutput.type_with_custom_actions(self.ActionModel)
+		self.AgentOutput = self._get_agent_output_type(self.ActionModel)
 
 		# Update done action model too
 		self.DoneActionModel = self.controller.registry.create_action_model(include_actions=['done'], page=page)
-		self.DoneAgentOutput = AgentOutput.type_with_custom_actions(self.DoneActionModel)
+		self.DoneAgentOutput = self._get_agent_output_type(self.DoneActionModel)
+
+	def _get_agent_output_type(self, action_model: type[ActionModel]) -> type[AgentOutput]:
+		"""AgentOutput extended with action_model, built once per action model"""
+		if action_model not in self._agent_output_types:
+			self._agent_output_types[action_model] = AgentOutput.type_with_custom_actions(action_model)
+		return self._agent_output_types[action_model]
@@ -0,0 +1,100 @@
+"""
+Incremental parsing of streamed agent output, so actions can start before the model finished its response.
+"""
+
+import json
+from typing import Any
+
+
+class StreamingActionParser:
+	"""
+	Finds the complete elements of the top level "action" array of a streamed AgentOutput JSON.
+
+	Text is fed chunk by chunk and scanned only once. Everything before the first "{" (markdown fences, <think> blocks
+	of reasoning models) is skipped. The parser does not validate the document, the complete response is still parsed
+	as a whole once the stream ended.
+
+	Example:
+		parser = StreamingActionParser()
+		parser.feed('{"current_state": {...}, "action": [{"click_element": {"index": 3}}, {"inp')
+		# -> [{'click_element': {'index': 3}}]
+	"""
+
+	def __init__(self):
+		self.text = ''
+		self.actions: list[dict[str, Any]] = []
+		self._pos = 0
+		self._started = False
+		self._depth = 0
+		self._in_string = False
+		self._escape = False
+		self._string_start = 0
+		self._last_string: str | None = None
+		self._last_key: str | None = None
+		self._in_action_array = False
+		self._element_start: int | None = None
+
+	def feed(self, chunk: str) -> list[dict[str, Any]]:
+		"""Add a chunk of the response and return the actions that were completed by it"""
+		self.text += chunk
+		text = self.text
+		completed: list[dict[str, Any]] = []
+
+		while self._pos < len(text):
+			char = text[self._pos]
+
+			if not self._started:
+				if '<think>'.startswith(text[self._pos : self._pos + len('<think>')]) and len(text) - self._pos < len('<think>'):
+					# the opening tag may be split across chunks
+					break
+				if text.startswith('<think>', self._pos):
+					end = text.find('</think>', self._pos)
+					if end == -1:
+						# wait for the end of the reasoning block
+						break
+					self._pos = end + len('</think>')
+					continue
+				if char == '{':
+					self._started = True
+					self._depth = 1
+
+			elif self._in_string:
+				if self._escape:
+					self._escape = False
+				elif char == '\\':
+					self._escape = True
+				elif char == '"':
+					self._in_string = False
+					if self._depth == 1:
+						self._last_string = text[self._string_start : self._pos]
+
+			elif char == '"':
+				self._in_string = True
+				self._string_start = self._pos + 1
+
+			elif char == ':':
+				if self._depth == 1:
+					self._last_key = self._last_string
+
+			elif char in '{[':
+				self._depth += 1
+				if char == '[' and self._depth == 2 and self._last_key == 'action':
+					self._in_action_array = True
+				elif char == '{' and self._depth == 3 and self._in_action_array:
+					self._element_start = self._pos
+
+			elif char in '}]':
+				if self._in_action_array and self._depth == 3 and char == '}' and self._element_start is not None:
+					try:
+						completed.append(json.loads(text[self._element_start : self._pos + 1]))
+					except json.JSONDecodeError:
+						pass
+					self._element_start = None
+				elif self._in_action_array and self._depth == 2 and char == ']':
+					self._in_action_array = False
+				self._depth -= 1
+
+			self._pos += 1
+
+		self.actions.extend(completed)
+		return completed
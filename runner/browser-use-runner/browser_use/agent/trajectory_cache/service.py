@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+from browser_use.agent.trajectory_cache.views import Trajectory, TrajectoryCacheConfig
+
+logger = logging.getLogger(__name__)
+
+
+class TrajectoryCache:
+	"""
+	Disk-backed (SQLite) cache of the steps of successful runs, keyed by the task and the url the run started on.
+
+	An agent with a trajectory cache first replays the cached steps of its task, re-identifying the elements of each
+	action on the current page, and only asks the LLM from the first step where the page or an element does not match.
+	The run is stored again once it succeeded, so a changed site only costs LLM calls until the new path is recorded.
+
+	Example:
+		cache = TrajectoryCache()
+		agent = Agent(task=task, llm=llm, trajectory_cache=cache)
+	"""
+
+	def __init__(self, config: TrajectoryCacheConfig | None = None):
+		self.config = config or TrajectoryCacheConfig()
+		self.hits = 0
+		self.misses = 0
+
+		self.config.path.parent.mkdir(parents=True, exist_ok=True)
+		self._lock = threading.Lock()
+		self._connection = sqlite3.connect(str(self.config.path), check_same_thread=False)
+		with self._lock:
+			self._connection.execute('PRAGMA journal_mode=WAL')
+			self._connection.execute(
+				'CREATE TABLE IF NOT EXISTS trajectories (key TEXT PRIMARY KEY, trajectory TEXT NOT NULL, created_at REAL NOT NULL)'
+			)
+			self._connection.commit()
+
+	@staticmethod
+	def cache_key(task: str, start_url: str) -> str:
+		return hashlib.sha256(f'{task.strip()}\0{start_url}'.encode()).hexdigest()
+
+	def get(self, task: str, start_url: str) -> Trajectory | None:
+		key = self.cache_key(task, start_url)
+		with self._lock:
+			row = self._connection.execute('SELECT trajectory FROM trajectories WHERE key = ?', (key,)).fetchone()
+
+		if row is None:
+			self.misses += 1
+			return None
+
+		self.hits += 1
+		logger.debug(f'💾 Trajectory cache hit {key[:16]}')
+		return Trajectory.model_validate_json(row[0])
+
+	def put(self, trajectory: Trajectory) -> None:
+		if not trajectory.steps:
+			return
+		key = self.cache_key(trajectory.task, trajectory.start_url)
+		with self._lock:
+			self._connection.execute(
+				'INSERT OR REPLACE INTO trajectories (key, trajectory, created_at) VALUES (?, ?, ?)',
+				(key, trajectory.model_dump_json(), time.time()),
+			)
+			self._connection.commit()
+
+	def clear(self) -> None:
+		with self._lock:
+			self._connection.execute('DELETE FROM trajectories')
+			self._connection.commit()
+
+	def close(self) -> None:
+		with self._lock:
+			self._connection.close()
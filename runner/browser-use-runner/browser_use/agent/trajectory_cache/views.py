@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from browser_use.dom.history_tree_processor.view import DOMHistoryElement
+from browser_use.utils import xdg_cache_home
+
+if TYPE_CHECKING:
+	from browser_use.agent.views import AgentHistoryList
+
+
+class TrajectoryCacheConfig(BaseModel):
+	"""Configuration for the trajectory cache."""
+
+	model_config = ConfigDict(from_attributes=True, validate_default=True)
+
+	path: Path = Field(default_factory=lambda: xdg_cache_home() / 'browser_use' / 'trajectory_cache.sqlite3')
+	# also replay the final done action, its text is then the one of the cached run. Only for tasks whose result
+	# does not change between runs (e.g. logging in), otherwise the LLM writes the result after the replayed steps.
+	replay_done: bool = False
+
+
+class TrajectoryStep(BaseModel):
+	"""One step of a successful run: the page it started on, the model output and the elements its actions used"""
+
+	url: str
+	model_output: dict[str, Any]
+	interacted_element: list[DOMHistoryElement | None]
+
+	@property
+	def is_done(self) -> bool:
+		return any('done' in action for action in self.model_output.get('action', []))
+
+
+class Trajectory(BaseModel):
+	task: str
+	start_url: str
+	steps: list[TrajectoryStep]
+
+	@classmethod
+	def from_history(cls, task: str, start_url: str, history: AgentHistoryList) -> Trajectory:
+		"""The steps of a run without the ones whose actions failed, the run recovered from those"""
+		steps = []
+		for item in history.history:
+			if item.model_output is None or any(result.error for result in item.result):
+				continue
+			model_output = item.model_dump()['model_output']
+			steps.append(
+				TrajectoryStep(url=item.state.url, model_output=model_output, interacted_element=item.state.interacted_element)
+			)
+		return cls(task=task, start_url=start_url, steps=steps)
@@ -11,7 +11,7 @@ from langchain_core.language_models.chat_models import BaseChatModel
 from openai import RateLimitError
 from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model
 
-from browser_use.agent.message_manager.views import MessageManagerState
+from browser_use.agent.message_manager.views import MessageManagerState, VisionRetentionPolicy
 from browser_use.agent.playwright_script_generator import PlaywrightScriptGenerator
 from browser_use.browser.browser import BrowserConfig
 from browser_use.browser.context import BrowserContextConfig
@@ -42,6 +42,7 @@ class AgentSettings(BaseModel):
 
 	use_vision: bool = True
 	use_vision_for_planner: bool = False
+	vision_retention: VisionRetentionPolicy = VisionRetentionPolicy()
 	save_conversation_path: str | None = None
 	save_conversation_path_encoding: str | None = 'utf-8'
 	max_failures: int = 3
@@ -66,11 +67,18 @@ class AgentSettings(BaseModel):
 		'aria-expanded',
 	]
 	max_actions_per_step: int = 10
+	stream_actions: bool = False  # Stream the model output and start the first action before the response is complete
+	delta_state_messages: bool = False  # Send the page elements once per page, afterwards only their changes
+	full_state_interval: int = 10  # Steps after which the full page elements are sent again in delta mode
 
 	tool_calling_method: ToolCallingMethod | None = 'auto'
 	page_extraction_llm: BaseChatModel | None = None
 	planner_llm: BaseChatModel | None = None
 	planner_interval: int = 1  # Run planner every N steps
+	concurrent_planner: bool = False  # Plan the next step while its state is captured, attach the plan when ready
+	skip_unchanged_plans: bool = False  # Plan less often while the suggested next steps stay the same
+	pipeline_steps: bool = False  # Save conversations and run callbacks and step end hooks in the background
+	profile_steps: bool = False  # Record the duration of each phase of the steps (DOM, screenshot, LLM, actions, hooks)
 	is_planner_reasoning: bool = False  # type: ignore
 	extend_planner_system_message: str | None = None
 
@@ -123,6 +131,9 @@ class StepMetadata(BaseModel):
 	step_end_time: float
 	input_tokens: int  # Approximate tokens from message manager for this step
 	step_number: int
+	cache_read_input_tokens: int = 0  # Input tokens the provider served from its prompt cache, as reported by the model
+	cache_creation_input_tokens: int = 0  # Input tokens the provider wrote to its prompt cache
+	phase_durations: dict[str, float] = Field(default_factory=dict)  # Seconds per phase of the step
 
 	@property
 	def duration_seconds(self) -> float:
@@ -240,6 +251,10 @@ class AgentHistoryList(BaseModel):
 		"""Get token usage for each step"""
 		return [h.metadata.input_tokens for h in self.history if h.metadata]
 
+	def total_cache_read_input_tokens(self) -> int:
+		"""Get the input tokens served from the provider's prompt cache across all steps, as reported by the model"""
+		return sum(h.metadata.cache_read_input_tokens for h in self.history if h.metadata)
+
 	def __str__(self) -> str:
 		"""Representation of the AgentHistoryList object"""
 		return f'AgentHistoryList(all_results={self.action_results()}, all_model_outputs={self.model_actions()})'
@@ -258,6 +273,22 @@ class AgentHistoryList(BaseModel):
 		except Exception as e:
 			raise e
 
+	def save_step_profile(self, filepath: str | Path, append: bool = False) -> None:
+		"""Save the timing of each step as JSON lines: step number, start, duration, input tokens and phase durations"""
+		Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+		with open(filepath, 'a' if append else 'w', encoding='utf-8') as f:
+			for item in self.history:
+				if item.metadata is None:
+					continue
+				record = {
+					'step': item.metadata.step_number,
+					'start': item.metadata.step_start_time,
+					'duration': item.metadata.duration_seconds,
+					'input_tokens': item.metadata.input_tokens,
+					'phases': item.metadata.phase_durations,
+				}
+				f.write(json.dumps(record) + '\n')
+
 	def save_as_playwright_script(
 		self,
 		output_path: str | Path,
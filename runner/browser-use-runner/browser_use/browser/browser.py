@@ -6,7 +6,6 @@ import asyncio
 import gc
 import logging
 import os
-import socket
 import subprocess
 from typing import Literal
 
@@ -28,6 +27,7 @@ from browser_use.browser.chrome import (
 	CHROME_HEADLESS_ARGS,
 )
 from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.browser.resources import ResourceLease, get_resource_allocator
 from browser_use.browser.utils.screen_resolution import get_screen_resolution, get_window_adjustments
 from browser_use.utils import time_execution_async
 
@@ -83,6 +83,9 @@ class BrowserConfig(BaseModel):
 			This allows running multiple chrome browsers with same browser_binary_path but running on different ports.
 			Also, makes it possible to launch new user provided chrome browser without closing already opened chrome instances,
 			by providing non-default chrome debugging port.
+			Set to None to lease a free port (and, with browser_binary_path, a fresh profile directory) from the host-wide
+			ResourceAllocator, so that many browsers can run on one host. The builtin browser leases the next free port
+			when this one is taken.
 
 		keep_alive: False
 			Keep the browser alive after the agent has finished running
@@ -137,12 +140,20 @@ class Browser:
 		self.config = config or BrowserConfig()
 		self.playwright: Playwright | None = None
 		self.playwright_browser: PlaywrightBrowser | None = None
+		self._resource_leases: list[ResourceLease] = []
 
-	async def new_context(self, config: BrowserContextConfig | None = None) -> BrowserContext:
-		"""Create a browser context"""
+	async def new_context(
+		self, config: BrowserContextConfig | None = None, storage_state: dict | str | None = None
+	) -> BrowserContext:
+		"""Create a browser context
+
+		storage_state: a Playwright storage_state dict or file to restore into the context (e.g. from LoginStateCache.load)
+		"""
 		browser_config = self.config.model_dump() if self.config else {}
 		context_config = config.model_dump() if config else {}
 		merged_config = {**browser_config, **context_config}
+		if storage_state is not None:
+			merged_config['storage_state'] = storage_state
 		return BrowserContext(config=BrowserContextConfig(**merged_config), browser=self)
 
 	async def get_playwright_browser(self) -> PlaywrightBrowser:
@@ -194,19 +205,25 @@ class Browser:
 			'browser_binary_path only supports chromium browsers (make sure browser_class=chromium)'
 		)
 
+		debugging_port = self.config.chrome_remote_debugging_port
+		profile_args = []
+		if debugging_port is None:
+			# a leased port is free, so there is no running browser to reuse
+			debugging_port = self._lease_debugging_port()
+			if not any(arg.startswith('--user-data-dir') for arg in self.config.extra_browser_args):
+				profile_lease = get_resource_allocator().lease_profile_dir()
+				self._resource_leases.append(profile_lease)
+				profile_args.append(f'--user-data-dir={profile_lease.value}')
+
 		try:
-			# Check if browser is already running
+			# Check if browser is already running (a leased port never has one)
 			async with httpx.AsyncClient() as client:
-				response = await client.get(
-					f'http://localhost:{self.config.chrome_remote_debugging_port}/json/version', timeout=2
-				)
+				response = await client.get(f'http://localhost:{debugging_port}/json/version', timeout=2)
 				if response.status_code == 200:
-					logger.info(
-						f'🔌  Reusing existing browser found running on http://localhost:{self.config.chrome_remote_debugging_port}'
-					)
+					logger.info(f'🔌  Reusing existing browser found running on http://localhost:{debugging_port}')
 					browser_class = getattr(playwright, self.config.browser_class)
 					browser = await browser_class.connect_over_cdp(
-						endpoint_url=f'http://localhost:{self.config.chrome_remote_debugging_port}',
+						endpoint_url=f'http://localhost:{debugging_port}',
 						timeout=20000,  # 20 second timeout for connection
 					)
 					return browser
@@ -216,7 +233,8 @@ class Browser:
 		# Start a new Chrome instance
 		chrome_launch_args = [
 			*{  # remove duplicates (usually preserves the order, but not guaranteed)
-				f'--remote-debugging-port={self.config.chrome_remote_debugging_port}',
+				f'--remote-debugging-port={debugging_port}',
+				*profile_args,
 				*CHROME_ARGS,
 				*(CHROME_DOCKER_ARGS if IN_DOCKER else []),
 				*(CHROME_HEADLESS_ARGS if self.config.headless else []),
@@ -238,9 +256,7 @@ class Browser:
 		for _ in range(10):
 			try:
 				async with httpx.AsyncClient() as client:
-					response = await client.get(
-						f'http://localhost:{self.config.chrome_remote_debugging_port}/json/version', timeout=2
-					)
+					response = await client.get(f'http://localhost:{debugging_port}/json/version', timeout=2)
 					if response.status_code == 200:
 						break
 			except httpx.RequestError:
@@ -251,7 +267,7 @@ class Browser:
 		try:
 			browser_class = getattr(playwright, self.config.browser_class)
 			browser = await browser_class.connect_over_cdp(
-				endpoint_url=f'http://localhost:{self.config.chrome_remote_debugging_port}',
+				endpoint_url=f'http://localhost:{debugging_port}',
 				timeout=20000,  # 20 second timeout for connection
 			)
 			return browser
@@ -284,8 +300,11 @@ class Browser:
 			screen_size = get_screen_resolution()
 			offset_x, offset_y = get_window_adjustments()
 
+		# lease the configured debugging port, or the next free one if another browser already uses it
+		debugging_port = self._lease_debugging_port()
+
 		chrome_args = {
-			f'--remote-debugging-port={self.config.chrome_remote_debugging_port}',
+			f'--remote-debugging-port={debugging_port}',
 			*CHROME_ARGS,
 			*(CHROME_DOCKER_ARGS if IN_DOCKER else []),
 			*(CHROME_HEADLESS_ARGS if self.config.headless else []),
@@ -296,12 +315,6 @@ class Browser:
 			*self.config.extra_browser_args,
 		}
 
-		# check if chrome remote debugging port is already taken,
-		# if so remove the remote-debugging-port arg to prevent conflicts
-		with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-			if s.connect_ex(('localhost', self.config.chrome_remote_debugging_port)) == 0:
-				chrome_args.remove(f'--remote-debugging-port={self.config.chrome_remote_debugging_port}')
-
 		browser_class = getattr(playwright, self.config.browser_class)
 		args = {
 			'chromium': list(chrome_args),
@@ -329,6 +342,15 @@ class Browser:
 		)
 		return browser
 
+	def _lease_debugging_port(self) -> int:
+		"""Lease the configured remote debugging port, or the next free one if it is taken or not configured"""
+		start = self.config.chrome_remote_debugging_port or CHROME_DEBUG_PORT
+		lease = get_resource_allocator().lease_port(start=start, end=start + 100)
+		self._resource_leases.append(lease)
+		if self.config.chrome_remote_debugging_port and lease.value != start:
+			logger.info(f'🔌  Remote debugging port {start} is taken, using {lease.value} instead')
+		return lease.value
+
 	async def _setup_browser(self, playwright: Playwright) -> PlaywrightBrowser:
 		"""Sets up and returns a Playwright Browser instance with anti-detection measures."""
 		try:
@@ -379,6 +401,9 @@ class Browser:
 			self.playwright_browser = None
 			self.playwright = None
 			self._chrome_subprocess = None
+			for lease in self._resource_leases:
+				lease.release()
+			self._resource_leases = []
 			gc.collect()
 
 	def __del__(self):
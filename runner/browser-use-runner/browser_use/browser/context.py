@@ -11,10 +11,9 @@ import os
 import re
 import time
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import TYPE_CHECKING
 
-import anyio
 from patchright._impl._errors import TimeoutError
 from patchright.async_api import Browser as PlaywrightBrowser
 from patchright.async_api import (
@@ -27,6 +26,14 @@ from patchright.async_api import (
 )
 from pydantic import BaseModel, ConfigDict, Field
 
+from browser_use.browser.state_cache import PageFingerprint, PageStateCache
+from browser_use.browser.storage_state import (
+	CookiePersistence,
+	CookiesFileFormat,
+	apply_storage_state,
+	normalize_storage_state,
+	read_storage_state,
+)
 from browser_use.browser.views import (
 	BrowserError,
 	BrowserState,
@@ -60,6 +67,17 @@ class BrowserContextConfig(BaseModel):
 	    cookies_file: None
 	        Path to cookies file for persistence
 
+	    cookies_file_format: 'cookies'
+	        Format cookies are saved in: 'cookies' (list of cookies) or 'storage_state' (Playwright storage_state snapshot,
+	        cookies plus localStorage). Both formats are accepted when loading.
+
+	    cookies_save_interval: 5.0
+	        Cookies are saved at most once per interval (in seconds) while the context is open, and always when it closes
+
+	    storage_state: None
+	        Storage state (cookies and localStorage) to restore into the context, as a Playwright storage_state dict or
+	        a path to a file holding one, e.g. a login state from LoginStateCache
+
 		disable_security: False
 			Disable browser security features (dangerous, but cross-origin iframe support requires it)
 
@@ -133,6 +151,12 @@ class BrowserContextConfig(BaseModel):
 
 		force_new_context: False
 			Forces a new browser context to be created. Useful when running locally with branded browser (e.g Chrome, Edge) and setting a custom config.
+
+		cache_page_state: False
+			Keep the last extracted state of every tab and reuse it while the tab has not navigated and its DOM, scroll position,
+			viewport and the open tabs are unchanged (e.g. when switching back to a tab), and share a single extraction
+			between concurrent get_state calls (e.g. several agents on one context).
+			Changes the DOM does not reflect (e.g. video or canvas content) will not refresh the screenshot.
 	"""
 
 	model_config = ConfigDict(
@@ -145,6 +169,9 @@ class BrowserContextConfig(BaseModel):
 	)
 
 	cookies_file: str | None = None
+	cookies_file_format: CookiesFileFormat = 'cookies'
+	cookies_save_interval: float = 5.0
+	storage_state: dict | str | None = None
 	minimum_wait_page_load_time: float = 0.25
 	wait_for_network_idle_page_load_time: float = 0.5
 	maximum_wait_page_load_time: float = 5
@@ -183,6 +210,8 @@ class BrowserContextConfig(BaseModel):
 
 	force_new_context: bool = False
 
+	cache_page_state: bool = False
+
 
 @dataclass
 class CachedStateClickableElementsHashes:
@@ -200,6 +229,10 @@ class BrowserSession:
 		self.cached_state = cached_state
 
 		self.cached_state_clickable_elements_hashes: CachedStateClickableElementsHashes | None = None
+		# fingerprint of the page taken before cached_state was extracted (see is_cached_state_current)
+		self.cached_state_fingerprint: PageFingerprint | None = None
+
+		self.state_cache = PageStateCache()
 
 
 @dataclass
@@ -228,6 +261,15 @@ class BrowserContext:
 		# Initialize these as None - they'll be set up when needed
 		self.session: BrowserSession | None = None
 
+		self.cookie_persistence: CookiePersistence | None = None
+		if self.config.cookies_file:
+			self.cookie_persistence = CookiePersistence(
+				path=self.config.cookies_file,
+				get_context=lambda: self.session.context if self.session else None,
+				file_format=self.config.cookies_file_format,
+				save_interval=self.config.cookies_save_interval,
+			)
+
 		# Tab references - separate concepts for agent intent and browser state
 		self.agent_current_page: Page | None = None  # The tab the agent intends to interact with
 		self.human_current_page: Page | None = None  # The tab currently shown in the browser UI
@@ -258,7 +300,8 @@ class BrowserContext:
 					logger.debug(f'Failed to remove CDP listener: {e}')
 				self._page_event_handler = None
 
-			await self.save_cookies()
+			if self.cookie_persistence:
+				await self.cookie_persistence.close()
 
 			if self.config.trace_path:
 				try:
@@ -649,23 +692,23 @@ class BrowserContext:
 
 		# Load cookies if they exist
 		if self.config.cookies_file and os.path.exists(self.config.cookies_file):
-			async with await anyio.open_file(self.config.cookies_file, 'r') as f:
-				try:
-					cookies = json.loads(await f.read())
-
-					valid_same_site_values = ['Strict', 'Lax', 'None']
-					for cookie in cookies:
-						if 'sameSite' in cookie:
-							if cookie['sameSite'] not in valid_same_site_values:
-								logger.warning(
-									f"Fixed invalid sameSite value '{cookie['sameSite']}' to 'None' for cookie {cookie.get('name')}"
-								)
-								cookie['sameSite'] = 'None'
-					logger.info(f'🍪  Loaded {len(cookies)} cookies from {self.config.cookies_file}')
-					await context.add_cookies(cookies)
-
-				except json.JSONDecodeError as e:
-					logger.error(f'Failed to parse cookies file: {str(e)}')
+			try:
+				storage_state = await asyncio.to_thread(read_storage_state, self.config.cookies_file)
+				logger.info(f'🍪  Loaded {len(storage_state["cookies"])} cookies from {self.config.cookies_file}')
+				await apply_storage_state(context, storage_state)
+			except (json.JSONDecodeError, ValueError) as e:
+				logger.error(f'Failed to parse cookies file: {str(e)}')
+
+		if self.config.storage_state:
+			try:
+				if isinstance(self.config.storage_state, str):
+					storage_state = await asyncio.to_thread(read_storage_state, self.config.storage_state)
+				else:
+					storage_state = normalize_storage_state(self.config.storage_state)
+				await apply_storage_state(context, storage_state)
+				logger.debug(f'🍪  Restored storage state with {len(storage_state["cookies"])} cookies')
+			except (OSError, json.JSONDecodeError, ValueError) as e:
+				logger.error(f'Failed to restore storage state: {str(e)}')
 
 		init_script = """
 			// Permissions
@@ -902,6 +945,7 @@ class BrowserContext:
 
 		logger.debug(f'⚖️  Network stabilized for {self.config.wait_for_network_idle_page_load_time} seconds')
 
+	@time_execution_async('--wait_for_page_and_frames_load', phase='network_wait')
 	async def _wait_for_page_and_frames_load(self, timeout_overwrite: float | None = None):
 		"""
 		Ensures page is fully loaded before continuing.
@@ -1117,14 +1161,109 @@ class BrowserContext:
 		structure = await page.evaluate(debug_script)
 		return structure
 
-	@time_execution_sync('--get_state')  # This decorator might need to be updated to handle async
+	@time_execution_async('--get_state')
 	async def get_state(self, cache_clickable_elements_hashes: bool) -> BrowserState:
 		"""Get the current state of the browser
 
 		cache_clickable_elements_hashes: bool
 			If True, cache the clickable elements hashes for the current state. This is used to calculate which elements are new to the llm (from last message) -> reduces token usage.
 		"""
+		session = await self.get_session()
+
+		if self.config.cache_page_state:
+			page = await self.get_agent_current_page()
+			# A tab that has not navigated since its last extraction (e.g. after switching back to it) is served
+			# from the cache without waiting for the page to load, as long as its content did not change either
+			if session.state_cache.is_clean(page):
+				fingerprint = await PageStateCache.get_fingerprint(page)
+				cached_state = session.state_cache.get(page, fingerprint) if fingerprint else None
+				if cached_state is not None:
+					logger.debug(f'♻️  Page state unchanged since last extraction: {cached_state.url}')
+					session.cached_state = await self._with_current_tabs(cached_state)
+					session.cached_state_fingerprint = fingerprint
+					return session.cached_state
+
 		await self._wait_for_page_and_frames_load()
+
+		page = await self.get_agent_current_page()
+		fingerprint = await PageStateCache.get_fingerprint(page)
+		session.cached_state_fingerprint = fingerprint
+
+		if self.config.cache_page_state and fingerprint is not None:
+			extracted = False
+
+			async def extract() -> BrowserState:
+				nonlocal extracted
+				extracted = True
+				return await self._extract_state(cache_clickable_elements_hashes)
+
+			updated_state = await session.state_cache.get_or_extract(page, fingerprint, extract)
+			if not extracted:
+				updated_state = await self._with_current_tabs(updated_state)
+		else:
+			updated_state = await self._extract_state(cache_clickable_elements_hashes)
+
+		session.cached_state = updated_state
+
+		# Save cookies if a file is specified
+		if self.cookie_persistence:
+			self.cookie_persistence.schedule_save()
+
+		return session.cached_state
+
+	async def is_cached_state_current(self, selector_map: SelectorMap | None = None) -> bool:
+		"""
+		Cheap check whether the indices of the cached state still point to the same elements and no elements appeared
+		or disappeared, e.g. between the actions of one step, instead of extracting a new state.
+
+		True when the page shows the same document at the same scroll position, no nodes were added or removed, no
+		attributes that show or hide elements changed, and every highlighted element is still found at its xpath.
+		Typing into fields does not change the state. False whenever this is unknown, and when a selector_map is given
+		and a newer state than the one of that selector map was extracted meanwhile.
+		"""
+		session = await self.get_session()
+		if session.cached_state is None or session.cached_state_fingerprint is None:
+			return False
+		if selector_map is not None and session.cached_state.selector_map is not selector_map:
+			return False
+		page = await self.get_agent_current_page()
+		fingerprint = await PageStateCache.get_fingerprint(page)
+		if fingerprint is None or not fingerprint.has_same_elements(session.cached_state_fingerprint):
+			return False
+		return await PageStateCache.elements_match(page, session.cached_state)
+
+	@time_execution_async('--wait_for_elements')
+	async def wait_for_elements(self, xpaths: list[str], timeout: float) -> bool:
+		"""
+		Wait until the current page has parsed its document and shows a visible element at each xpath of the top
+		document. Returns False if that did not happen within the timeout in seconds.
+		"""
+		# playwright treats a timeout of 0 as no timeout
+		if timeout <= 0:
+			return False
+		deadline = time.time() + timeout
+		try:
+			page = await self.get_agent_current_page()
+			await page.wait_for_load_state('domcontentloaded', timeout=timeout * 1000)
+			for xpath in xpaths:
+				remaining = deadline - time.time()
+				if remaining <= 0:
+					return False
+				await page.wait_for_selector(f'xpath=/{xpath}', state='visible', timeout=remaining * 1000)
+		except Exception as e:
+			logger.debug(f'Page not ready after {timeout}s: {type(e).__name__}: {e}')
+			return False
+		return True
+
+	async def _with_current_tabs(self, state: BrowserState) -> BrowserState:
+		"""
+		Copy of a cached state with the tabs that are open now, other tabs may have been opened, closed or navigated
+		since the state of this page was extracted
+		"""
+		return replace(state, tabs=await self.get_tabs_info())
+
+	async def _extract_state(self, cache_clickable_elements_hashes: bool) -> BrowserState:
+		"""Extract a fresh state of the current page and mark the elements that are new since the last cached hashes"""
 		session = await self.get_session()
 		updated_state = await self._get_updated_state()
 
@@ -1150,13 +1289,7 @@ class BrowserContext:
 				hashes=ClickableElementProcessor.get_clickable_elements_hashes(updated_state.element_tree),
 			)
 
-		session.cached_state = updated_state
-
-		# Save cookies if a file is specified
-		if self.config.cookies_file:
-			asyncio.create_task(self.save_cookies())
-
-		return session.cached_state
+		return updated_state
 
 	async def _get_updated_state(self, focus_element: int = -1) -> BrowserState:
 		"""Update and return state."""
@@ -1233,7 +1366,7 @@ class BrowserContext:
 			raise
 
 	# region - Browser Actions
-	@time_execution_async('--take_screenshot')
+	@time_execution_async('--take_screenshot', phase='screenshot')
 	async def take_screenshot(self, full_page: bool = False) -> str:
 		"""
 		Returns a base64 encoded screenshot of the current page.
@@ -1798,20 +1931,8 @@ class BrowserContext:
 
 	async def save_cookies(self):
 		"""Save current cookies to file"""
-		if self.session and self.session.context and self.config.cookies_file:
-			try:
-				cookies = await self.session.context.cookies()
-				logger.debug(f'🍪  Saving {len(cookies)} cookies to {self.config.cookies_file}')
-
-				# Check if the path is a directory and create it if necessary
-				dirname = os.path.dirname(self.config.cookies_file)
-				if dirname:
-					os.makedirs(dirname, exist_ok=True)
-
-				async with await anyio.open_file(self.config.cookies_file, 'w') as f:
-					await f.write(json.dumps(cookies))
-			except Exception as e:
-				logger.warning(f'❌  Failed to save cookies: {str(e)}')
+		if self.session and self.session.context and self.cookie_persistence:
+			await self.cookie_persistence.flush()
 
 	async def is_file_uploader(self, element_node: DOMElementNode, max_depth: int = 3, current_depth: int = 0) -> bool:
 		"""Check if element or its children are file uploaders"""
@@ -1861,6 +1982,7 @@ class BrowserContext:
 			await page.close()
 
 		session.cached_state = None
+		session.state_cache.clear()
 		self.state.target_id = None
 
 	async def _get_unique_filename(self, directory, filename):
@@ -0,0 +1,149 @@
+"""
+Cache of logged-in storage states, so that login flows only run when the previous session expired.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from patchright.async_api import BrowserContext as PlaywrightBrowserContext
+
+from browser_use.browser.context import BrowserContext
+from browser_use.browser.storage_state import apply_storage_state, normalize_storage_state, write_json_atomic
+from browser_use.browser.views import BrowserError
+from browser_use.utils import xdg_cache_home
+
+logger = logging.getLogger(__name__)
+
+AnyBrowserContext = BrowserContext | PlaywrightBrowserContext
+
+
+async def _get_playwright_context(context: AnyBrowserContext) -> PlaywrightBrowserContext:
+	if isinstance(context, BrowserContext):
+		session = await context.get_session()
+		return session.context
+	return context
+
+
+class LoginStateCache:
+	"""
+	Stores the storage state (cookies and localStorage) of a logged-in context per (site, account).
+
+	Entries expire after `ttl` seconds. Accepts browser_use BrowserContexts as well as plain Playwright contexts.
+	Scripts using the sync Playwright API can use `read` and `write` instead of `load` and `save`.
+
+	Example:
+		cache = LoginStateCache()
+		context = await browser.new_context(storage_state=await cache.load('sunrisetv', username))
+		await cache.ensure_logged_in(context, 'sunrisetv', username, login=do_login, is_logged_in=check_profile)
+	"""
+
+	def __init__(self, cache_dir: str | Path | None = None, ttl: float = 12 * 60 * 60):
+		self.cache_dir = Path(cache_dir) if cache_dir else xdg_cache_home() / 'browser_use' / 'login_states'
+		self.ttl = ttl
+
+	def _path(self, site: str, account: str) -> Path:
+		# account names are hashed so that e.g. email addresses do not end up in file names
+		digest = hashlib.sha256(f'{site}\0{account}'.encode()).hexdigest()[:16]
+		slug = re.sub(r'[^a-zA-Z0-9_.-]+', '_', site)[:50]
+		return self.cache_dir / f'{slug}-{digest}.json'
+
+	def read(self, site: str, account: str) -> dict | None:
+		"""Get the cached storage state for (site, account), or None if there is none or it expired."""
+		path = self._path(site, account)
+		try:
+			with open(path) as f:
+				entry = json.load(f)
+		except FileNotFoundError:
+			return None
+		except (OSError, json.JSONDecodeError) as e:
+			logger.warning(f'Ignoring unreadable login state {path}: {e}')
+			return None
+
+		if entry.get('expires_at', 0) <= time.time():
+			logger.debug(f'🔑  Cached login state for {site} expired')
+			self.invalidate(site, account)
+			return None
+		return normalize_storage_state(entry['storage_state'])
+
+	async def load(self, site: str, account: str) -> dict | None:
+		"""Like `read`, without blocking the event loop."""
+		return await asyncio.to_thread(self.read, site, account)
+
+	def write(self, site: str, account: str, storage_state: dict, ttl: float | None = None) -> None:
+		"""Save the storage state of a logged-in context for (site, account)."""
+		now = time.time()
+		entry = {
+			'site': site,
+			'saved_at': now,
+			'expires_at': now + (ttl if ttl is not None else self.ttl),
+			'storage_state': storage_state,
+		}
+		write_json_atomic(str(self._path(site, account)), entry)
+
+	async def save(self, context: AnyBrowserContext, site: str, account: str, ttl: float | None = None) -> None:
+		"""Save the storage state of a logged-in context for (site, account)."""
+		playwright_context = await _get_playwright_context(context)
+		storage_state = await playwright_context.storage_state()
+		await asyncio.to_thread(self.write, site, account, storage_state, ttl)
+		logger.info(f'🔑  Saved login state for {site} ({len(storage_state["cookies"])} cookies)')
+
+	def invalidate(self, site: str, account: str) -> None:
+		"""Remove the cached storage state for (site, account)."""
+		try:
+			os.remove(self._path(site, account))
+		except FileNotFoundError:
+			pass
+
+	async def restore(self, context: AnyBrowserContext, site: str, account: str) -> bool:
+		"""Apply the cached storage state for (site, account) to an existing context. Returns False if nothing is cached."""
+		storage_state = await self.load(site, account)
+		if storage_state is None:
+			return False
+		await apply_storage_state(await _get_playwright_context(context), storage_state)
+		return True
+
+	async def ensure_logged_in(
+		self,
+		context: AnyBrowserContext,
+		site: str,
+		account: str,
+		login: Callable[[AnyBrowserContext], Awaitable[None]],
+		is_logged_in: Callable[[AnyBrowserContext], Awaitable[bool]],
+		ttl: float | None = None,
+	) -> bool:
+		"""
+		Make sure the context is logged in to site as account.
+
+		Restores the cached storage state (if any) and checks it with the `is_logged_in` probe. If there is no usable
+		cached state, removes what was restored of it, runs `login`, checks it and caches the new storage state.
+
+		Returns True if the cached login state was reused, False if a fresh login was needed.
+		Raises BrowserError if the probe still fails after logging in.
+		"""
+		storage_state = await self.load(site, account)
+		if storage_state is not None:
+			playwright_context = await _get_playwright_context(context)
+			restore = await apply_storage_state(playwright_context, storage_state)
+			if await is_logged_in(context):
+				logger.info(f'🔑  Reused cached login state for {site}')
+				return True
+			logger.info(f'🔑  Cached login state for {site} is no longer valid, logging in again')
+			# the outdated session must not be seen by the login flow: portals redirect or short-circuit on a stale
+			# session cookie, and origins the probe did not load must not get the outdated localStorage later
+			await restore.revert()
+			for cookie in storage_state['cookies']:
+				await playwright_context.clear_cookies(name=cookie['name'], domain=cookie.get('domain'), path=cookie.get('path'))
+			self.invalidate(site, account)
+
+		await login(context)
+		if not await is_logged_in(context):
+			raise BrowserError(f'Login to {site} failed')
+		await self.save(context, site, account, ttl=ttl)
+		return False
@@ -0,0 +1,174 @@
+"""
+Host-wide leasing of resources that parallel browsers must not share: remote debugging ports and profile directories.
+X displays are leased by the runner that starts the script, see python-slave-runner/display_allocator.py.
+
+Leases are lock files in a shared directory holding the pid of their owner. They are released explicitly, when the
+owning process exits, or by the next allocator that finds the owning process dead.
+"""
+
+import atexit
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+from pathlib import Path
+from typing import Literal
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+ResourceKind = Literal['port', 'profile']
+
+DEFAULT_LOCK_DIR = Path(os.getenv('BROWSER_USE_LOCK_DIR') or Path(tempfile.gettempdir()) / 'browser_use_locks')
+
+
+class ResourceExhaustedError(Exception):
+	"""Raised when every candidate of a resource range is leased or in use"""
+
+
+class ResourceLease:
+	"""A resource held by this process until released"""
+
+	def __init__(self, allocator: 'ResourceAllocator', kind: ResourceKind, value: int | str, lock_path: Path):
+		self.kind = kind
+		self.value = value
+		self.lock_path = lock_path
+		self._allocator = allocator
+		self.released = False
+
+	def release(self) -> None:
+		"""Give the resource back (safe to call more than once)"""
+		self._allocator._release(self)
+
+	def __enter__(self) -> 'ResourceLease':
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+		self.release()
+
+	def __repr__(self) -> str:
+		return f'ResourceLease({self.kind}={self.value})'
+
+
+class ResourceAllocator:
+	"""
+	Leases debugging ports and profile directories that no other browser on this host uses.
+
+	All processes using the same lock directory (default: $BROWSER_USE_LOCK_DIR or <tmp>/browser_use_locks)
+	coordinate through it, so browsers started by different scripts never collide.
+	"""
+
+	def __init__(self, lock_dir: str | Path | None = None):
+		self.lock_dir = Path(lock_dir) if lock_dir else DEFAULT_LOCK_DIR
+		self._leases: list[ResourceLease] = []
+		self._mutex = threading.Lock()
+		atexit.register(self.release_all)
+
+	def lease_port(self, start: int = 9222, end: int = 9322) -> ResourceLease:
+		"""Lease a TCP port in [start, end) that nothing listens on, e.g. for --remote-debugging-port"""
+		for port in range(start, end):
+			if _is_port_in_use(port):
+				continue
+			lease = self._try_lock('port', port)
+			if lease is None:
+				continue
+			# the port could have been bound between the check and taking the lock
+			if _is_port_in_use(port):
+				lease.release()
+				continue
+			return lease
+		raise ResourceExhaustedError(f'No free port in range {start}-{end - 1}')
+
+	def lease_profile_dir(self, base_dir: str | Path | None = None, prefix: str = 'browser_use_profile_') -> ResourceLease:
+		"""Lease a new, empty browser profile directory, it is deleted when the lease is released"""
+		base = Path(base_dir) if base_dir else Path(tempfile.gettempdir())
+		base.mkdir(parents=True, exist_ok=True)
+		profile_dir = tempfile.mkdtemp(prefix=prefix, dir=base)
+		lease = self._try_lock('profile', profile_dir)
+		if lease is None:
+			raise ResourceExhaustedError(f'Could not lock profile directory {profile_dir}')
+		return lease
+
+	def release_all(self) -> None:
+		"""Release every lease this allocator handed out"""
+		for lease in list(self._leases):
+			lease.release()
+
+	def _lock_path(self, kind: ResourceKind, value: int | str) -> Path:
+		name = Path(str(value)).name if kind == 'profile' else str(value)
+		return self.lock_dir / f'{kind}-{name}.lock'
+
+	def _try_lock(self, kind: ResourceKind, value: int | str) -> ResourceLease | None:
+		self.lock_dir.mkdir(parents=True, exist_ok=True)
+		lock_path = self._lock_path(kind, value)
+
+		for _ in range(2):
+			try:
+				fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+			except FileExistsError:
+				if not _is_stale_lock(lock_path):
+					return None
+				logger.debug(f'Removing stale lock {lock_path}')
+				try:
+					os.remove(lock_path)
+				except FileNotFoundError:
+					pass
+				continue
+			with os.fdopen(fd, 'w') as f:
+				f.write(f'{os.getpid()}\n{value}\n')
+
+			lease = ResourceLease(self, kind, value, lock_path)
+			with self._mutex:
+				self._leases.append(lease)
+			logger.debug(f'🔒  Leased {kind} {value}')
+			return lease
+		return None
+
+	def _release(self, lease: ResourceLease) -> None:
+		with self._mutex:
+			if lease.released:
+				return
+			lease.released = True
+			if lease in self._leases:
+				self._leases.remove(lease)
+
+		if lease.kind == 'profile':
+			shutil.rmtree(lease.value, ignore_errors=True)
+		try:
+			os.remove(lease.lock_path)
+		except FileNotFoundError:
+			pass
+		logger.debug(f'🔓  Released {lease.kind} {lease.value}')
+
+
+def _is_stale_lock(lock_path: Path) -> bool:
+	"""A lock is stale when the process that took it no longer runs"""
+	try:
+		pid = int(lock_path.read_text().split()[0])
+	except (OSError, ValueError, IndexError):
+		# unreadable or half-written lock files are treated as held, they are removed by their owner
+		return False
+	return not psutil.pid_exists(pid)
+
+
+def _is_port_in_use(port: int) -> bool:
+	with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+		try:
+			s.bind(('127.0.0.1', port))
+			return False
+		except OSError:
+			return True
+
+
+_default_allocator: ResourceAllocator | None = None
+
+
+def get_resource_allocator() -> ResourceAllocator:
+	"""The allocator shared by all browsers of this process"""
+	global _default_allocator
+	if _default_allocator is None:
+		_default_allocator = ResourceAllocator()
+	return _default_allocator
@@ -0,0 +1,272 @@
+"""
+Per-page cache of extracted browser states.
+
+Extracting a BrowserState (DOM walk, highlighting, screenshot) is the most expensive browser operation an agent does
+every step. When several agents share one BrowserContext, one agent asks for the state of a page that has not
+changed, or an agent switches back to a tab it already extracted, the same extraction would be repeated. The cache
+keeps the last state of every open page keyed on a cheap in-page fingerprint, marks it dirty when the page navigates,
+and coalesces concurrent extractions of the same page into a single one.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable
+
+from patchright.async_api import Page
+
+from browser_use.browser.views import BrowserState
+
+logger = logging.getLogger(__name__)
+
+# Installs (once per document) a MutationObserver that counts DOM changes, ignoring the changes made by our own
+# element highlighting. `version` counts every change (structure, attributes, text, user input), `structure` only
+# counts nodes being added or removed, `layout` counts those and changes of attributes that can show, hide or move
+# elements.
+PAGE_STATE_TRACKER_JS = """
+() => {
+	if (window.__browserUseStateTracker) return window.__browserUseStateTracker;
+
+	const HIGHLIGHT_CONTAINER_ID = 'playwright-highlight-container';
+	const HIGHLIGHT_ATTRIBUTE = 'browser-user-highlight-id';
+	const LAYOUT_ATTRIBUTES = new Set(['class', 'style', 'hidden', 'open', 'disabled', 'aria-hidden', 'aria-expanded']);
+	const tracker = { version: 0, structure: 0, layout: 0 };
+
+	const isHighlightNode = (node) => {
+		const element = node && node.nodeType === Node.ELEMENT_NODE ? node : node && node.parentElement;
+		return !!element && (element.id === HIGHLIGHT_CONTAINER_ID || !!element.closest?.('#' + HIGHLIGHT_CONTAINER_ID));
+	};
+
+	const isOwnMutation = (record) => {
+		if (isHighlightNode(record.target)) return true;
+		if (record.type === 'attributes') return record.attributeName === HIGHLIGHT_ATTRIBUTE;
+		if (record.type === 'childList') {
+			const nodes = [...record.addedNodes, ...record.removedNodes];
+			return nodes.length > 0 && nodes.every(isHighlightNode);
+		}
+		return false;
+	};
+
+	new MutationObserver((records) => {
+		let changed = false;
+		let layoutChanged = false;
+		for (const record of records) {
+			if (isOwnMutation(record)) continue;
+			changed = true;
+			if (record.type === 'childList') {
+				tracker.structure++;
+				layoutChanged = true;
+				break;
+			}
+			if (record.type === 'attributes' && LAYOUT_ATTRIBUTES.has(record.attributeName)) layoutChanged = true;
+		}
+		if (changed) tracker.version++;
+		if (layoutChanged) tracker.layout++;
+	}).observe(document, { attributes: true, characterData: true, childList: true, subtree: true });
+
+	// Typing changes element properties, not attributes, so the observer would not see it
+	const onInput = () => { tracker.version++; };
+	document.addEventListener('input', onInput, true);
+	document.addEventListener('change', onInput, true);
+
+	window.__browserUseStateTracker = tracker;
+	return tracker;
+}
+"""
+
+PAGE_FINGERPRINT_JS = f"""
+() => {{
+	const tracker = ({PAGE_STATE_TRACKER_JS})();
+	return {{
+		url: window.location.href,
+		documentId: performance.timeOrigin,
+		version: tracker.version,
+		structure: tracker.structure,
+		layout: tracker.layout,
+		scrollX: Math.round(window.scrollX),
+		scrollY: Math.round(window.scrollY),
+		width: window.innerWidth,
+		height: window.innerHeight,
+	}};
+}}
+"""
+
+# Whether each [xpath, tag name] of the highlighted elements of a state still resolves to an element with that tag in
+# the top document. Only for elements whose xpath starts at the top document: the xpaths of elements in iframes are
+# relative to the frame document and look the same.
+ELEMENT_IDENTITIES_JS = """
+(elements) => elements.every(([xpath, tagName]) => {
+	const node = document.evaluate('/' + xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+	return !!node && node.nodeName.toLowerCase() === tagName;
+})
+"""
+
+
+@dataclass(frozen=True)
+class PageFingerprint:
+	"""
+	Cheap identity of what a page currently shows
+	"""
+
+	url: str
+	document_id: float  # performance.timeOrigin, unique per loaded document
+	mutation_version: int
+	structure_version: int
+	scroll_x: int
+	scroll_y: int
+	viewport_width: int
+	viewport_height: int
+	layout_version: int = 0
+
+	def has_same_elements(self, other: 'PageFingerprint') -> bool:
+		"""
+		Whether the page can only differ from the other fingerprint in values, text and attributes that do not affect
+		which elements are shown, i.e. the highlighted elements of a state are still the same
+		"""
+		return self == replace(other, mutation_version=self.mutation_version)
+
+
+@dataclass
+class _CacheEntry:
+	fingerprint: PageFingerprint
+	state: BrowserState
+	dirty: bool = False
+
+
+@dataclass
+class _InFlightExtraction:
+	fingerprint: PageFingerprint
+	task: 'asyncio.Task[BrowserState]'
+
+
+class PageStateCache:
+	"""
+	Caches the last extracted BrowserState of each page.
+
+	Entries are marked dirty when their page navigates and dropped when it closes, so a state of a background tab is
+	only served again while that tab has not changed. Entries only depend on their own page, the tabs of a returned
+	state are the ones at extraction time. The returned states are shared between all callers and must be treated as
+	read-only.
+	"""
+
+	def __init__(self):
+		self._entries: dict[Page, _CacheEntry] = {}
+		self._in_flight: dict[Page, _InFlightExtraction] = {}
+		self._watched_pages: set[Page] = set()
+
+	@staticmethod
+	async def get_fingerprint(page: Page) -> PageFingerprint | None:
+		"""Get the fingerprint of a page, or None if the page can not be evaluated."""
+		try:
+			data = await page.evaluate(PAGE_FINGERPRINT_JS)
+			return PageFingerprint(
+				url=data['url'],
+				document_id=data['documentId'],
+				mutation_version=data['version'],
+				structure_version=data['structure'],
+				layout_version=data['layout'],
+				scroll_x=data['scrollX'],
+				scroll_y=data['scrollY'],
+				viewport_width=data['width'],
+				viewport_height=data['height'],
+			)
+		except Exception as e:
+			logger.debug(f'Failed to get page fingerprint: {type(e).__name__}: {e}')
+			return None
+
+	@staticmethod
+	async def elements_match(page: Page, state: BrowserState) -> bool:
+		"""Whether the highlighted elements of the state are still found at their xpaths, False if that is unknown"""
+		# elements in iframes and shadow roots can not be found by xpath in the top document, and the page fingerprint
+		# does not see changes inside iframes either
+		if not all(node.has_document_xpath for node in state.selector_map.values()):
+			return False
+		elements = [[node.xpath, node.tag_name.lower()] for node in state.selector_map.values()]
+		try:
+			return await page.evaluate(ELEMENT_IDENTITIES_JS, elements)
+		except Exception as e:
+			logger.debug(f'Failed to check the highlighted elements: {type(e).__name__}: {e}')
+			return False
+
+	def get(self, page: Page, fingerprint: PageFingerprint) -> BrowserState | None:
+		"""Get the cached state of a page if it was extracted for the same fingerprint."""
+		entry = self._entries.get(page)
+		if entry is not None and not entry.dirty and entry.fingerprint == fingerprint:
+			return entry.state
+		return None
+
+	def is_clean(self, page: Page) -> bool:
+		"""Whether the page has a cached state and has not navigated since it was extracted."""
+		entry = self._entries.get(page)
+		return entry is not None and not entry.dirty
+
+	async def get_or_extract(
+		self,
+		page: Page,
+		fingerprint: PageFingerprint,
+		extract: Callable[[], Awaitable[BrowserState]],
+	) -> BrowserState:
+		"""
+		Return the cached state for the fingerprint, or extract it.
+
+		Only one extraction per page runs at a time: callers asking for the same fingerprint while an extraction is
+		running share its result, callers with a different fingerprint wait for it to finish and then extract again.
+		"""
+		while True:
+			cached = self.get(page, fingerprint)
+			if cached is not None:
+				logger.debug(f'♻️  Reusing cached state for {fingerprint.url}')
+				return cached
+
+			in_flight = self._in_flight.get(page)
+			if in_flight is None:
+				break
+			if in_flight.fingerprint == fingerprint:
+				# shield so that a cancelled waiter does not cancel the extraction for everyone else
+				return await asyncio.shield(in_flight.task)
+			await asyncio.wait([in_flight.task])
+
+		task = asyncio.ensure_future(extract())
+		self._in_flight[page] = _InFlightExtraction(fingerprint=fingerprint, task=task)
+		task.add_done_callback(lambda t: self._on_extraction_done(page, fingerprint, t))
+		return await asyncio.shield(task)
+
+	def _on_extraction_done(self, page: Page, fingerprint: PageFingerprint, task: 'asyncio.Task[BrowserState]') -> None:
+		in_flight = self._in_flight.get(page)
+		if in_flight is not None and in_flight.task is task:
+			del self._in_flight[page]
+		if task.cancelled() or task.exception() is not None:
+			return
+		self._entries[page] = _CacheEntry(fingerprint=fingerprint, state=task.result())
+		self._watch(page)
+
+	def _watch(self, page: Page) -> None:
+		"""Listen for navigations and closing of a page so that its cached state does not outlive the page content."""
+		if page in self._watched_pages:
+			return
+		self._watched_pages.add(page)
+
+		def on_frame_navigated(frame) -> None:
+			if frame == page.main_frame:
+				self.mark_dirty(page)
+
+		def on_close(*args) -> None:
+			self.invalidate(page)
+			self._watched_pages.discard(page)
+
+		page.on('framenavigated', on_frame_navigated)
+		page.on('close', on_close)
+
+	def mark_dirty(self, page: Page) -> None:
+		"""Mark the cached state of a page as outdated without dropping it."""
+		entry = self._entries.get(page)
+		if entry is not None:
+			entry.dirty = True
+
+	def invalidate(self, page: Page) -> None:
+		"""Forget the cached state of a page."""
+		self._entries.pop(page, None)
+
+	def clear(self) -> None:
+		"""Forget all cached states."""
+		self._entries.clear()
@@ -0,0 +1,278 @@
+"""
+Persistence of cookies and storage state of a browser context.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Callable, Literal
+from urllib.parse import urlparse
+
+from patchright.async_api import BrowserContext as PlaywrightBrowserContext
+from patchright.async_api import Page
+
+logger = logging.getLogger(__name__)
+
+CookiesFileFormat = Literal['cookies', 'storage_state']
+
+VALID_SAME_SITE_VALUES = ('Strict', 'Lax', 'None')
+
+# Restores the localStorage entries of one origin of a storage_state snapshot if the document is of that origin,
+# returns whether it was. Keys the page already set itself are never overwritten.
+RESTORE_LOCAL_STORAGE_JS = """
+(entry) => {
+	try {
+		if (entry.origin !== window.location.origin) return false;
+		for (const { name, value } of entry.localStorage || []) {
+			if (window.localStorage.getItem(name) === null) window.localStorage.setItem(name, value);
+		}
+		return true;
+	} catch (e) {
+		// opaque origins (about:blank, data: urls) have no localStorage
+		return false;
+	}
+}
+"""
+
+# Clears the localStorage of the document if it is of the given origin, returns whether it was
+CLEAR_LOCAL_STORAGE_JS = """
+(origin) => {
+	try {
+		if (origin !== window.location.origin) return false;
+		window.localStorage.clear();
+		return true;
+	} catch (e) {
+		return false;
+	}
+}
+"""
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+	"""Write data as compact JSON to a temporary file next to path and rename it into place."""
+	dirname = os.path.dirname(os.path.abspath(path))
+	os.makedirs(dirname, exist_ok=True)
+
+	fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+	try:
+		with os.fdopen(fd, 'w') as f:
+			json.dump(data, f, separators=(',', ':'))
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp_path, path)
+	except BaseException:
+		try:
+			os.remove(tmp_path)
+		except OSError:
+			pass
+		raise
+
+
+def normalize_storage_state(data: Any) -> dict:
+	"""
+	Convert the content of a cookies file to a storage_state dict ({'cookies': [...], 'origins': [...]}).
+
+	Accepts both the plain list of cookies written by older versions and Playwright storage_state snapshots.
+	"""
+	if isinstance(data, list):
+		state = {'cookies': data, 'origins': []}
+	elif isinstance(data, dict):
+		state = {'cookies': data.get('cookies') or [], 'origins': data.get('origins') or []}
+	else:
+		raise ValueError(f'Unsupported cookies file content: {type(data).__name__}')
+
+	for cookie in state['cookies']:
+		if 'sameSite' in cookie and cookie['sameSite'] not in VALID_SAME_SITE_VALUES:
+			logger.warning(f"Fixed invalid sameSite value '{cookie['sameSite']}' to 'None' for cookie {cookie.get('name')}")
+			cookie['sameSite'] = 'None'
+	return state
+
+
+def read_storage_state(path: str) -> dict:
+	"""Read a cookies file in either format and return it as a storage_state dict."""
+	with open(path) as f:
+		return normalize_storage_state(json.load(f))
+
+
+class LocalStorageRestore:
+	"""
+	Restores the localStorage of a storage_state once per origin, on the first page of the context that loads it.
+
+	Unlike an init script, nothing is left behind once every origin was restored or the restore was cancelled, so
+	entries of an outdated snapshot can not overwrite the values of a later login.
+	"""
+
+	def __init__(self, context: PlaywrightBrowserContext, origins: list[dict]):
+		self.context = context
+		self.pending = {entry['origin']: entry for entry in origins if entry.get('localStorage')}
+		self.restored: set[str] = set()
+		self._pages: list[Page] = []
+		self._tasks: set[asyncio.Future] = set()
+		self._listening = False
+		self._cancelled = False
+
+	def start(self) -> None:
+		if not self.pending:
+			return
+		self._listening = True
+		self.context.on('page', self._watch)
+		for page in self.context.pages:
+			self._watch(page)
+			# pages that already show an origin are restored right away
+			self._schedule(page)
+
+	def cancel(self) -> None:
+		"""Stop restoring the origins that were not loaded yet"""
+		self._cancelled = True
+		self.pending.clear()
+		if self._listening:
+			self._listening = False
+			self.context.remove_listener('page', self._watch)
+		for page in self._pages:
+			page.remove_listener('domcontentloaded', self._on_load)
+		self._pages.clear()
+
+	async def revert(self) -> None:
+		"""
+		Cancel the restore and clear the localStorage of the origins that were already restored, on the pages that
+		show them now. Origins that no open page shows any more keep their restored entries.
+		"""
+		self.cancel()
+		if self._tasks:
+			await asyncio.gather(*self._tasks, return_exceptions=True)
+		for page in list(self.context.pages):
+			origin = _origin(page.url)
+			if origin not in self.restored:
+				continue
+			try:
+				if await page.evaluate(CLEAR_LOCAL_STORAGE_JS, origin):
+					self.restored.discard(origin)
+					logger.debug(f'🍪  Cleared restored localStorage of {origin}')
+			except Exception as e:
+				logger.debug(f'Failed to clear localStorage of {origin}: {type(e).__name__}: {e}')
+
+	def _watch(self, page: Page) -> None:
+		self._pages.append(page)
+		page.on('domcontentloaded', self._on_load)
+
+	def _on_load(self, page: Page) -> None:
+		self._schedule(page)
+
+	def _schedule(self, page: Page) -> None:
+		task = asyncio.ensure_future(self._restore(page))
+		self._tasks.add(task)
+		task.add_done_callback(self._tasks.discard)
+
+	async def _restore(self, page: Page) -> None:
+		origin = _origin(page.url)
+		entry = self.pending.pop(origin, None)
+		if entry is None:
+			return
+		try:
+			restored = await page.evaluate(RESTORE_LOCAL_STORAGE_JS, entry)
+		except Exception as e:
+			logger.debug(f'Failed to restore localStorage of {origin}: {type(e).__name__}: {e}')
+			restored = False
+
+		if restored:
+			self.restored.add(origin)
+		if self._cancelled:
+			return
+		if not restored:
+			# e.g. the page navigated away meanwhile, restore on the next load of the origin instead
+			self.pending[origin] = entry
+			return
+		logger.debug(f'🍪  Restored localStorage of {origin}')
+		if not self.pending:
+			self.cancel()
+
+
+def _origin(url: str) -> str:
+	parsed = urlparse(url)
+	return f'{parsed.scheme}://{parsed.netloc}'
+
+
+async def apply_storage_state(context: PlaywrightBrowserContext, state: dict) -> LocalStorageRestore:
+	"""
+	Add the cookies of a storage_state to an existing context and restore its localStorage on the first page that
+	loads each origin. The returned restore can be cancelled if the snapshot turns out to be outdated.
+	"""
+	if state.get('cookies'):
+		await context.add_cookies(state['cookies'])
+	restore = LocalStorageRestore(context, state.get('origins') or [])
+	restore.start()
+	return restore
+
+
+class CookiePersistence:
+	"""
+	Saves the cookies of a browser context to a file.
+
+	Save requests are coalesced: the first one schedules a write after `save_interval` seconds and the requests that
+	arrive in the meantime are served by that same write. A write only happens when the cookie jar (or storage state)
+	differs from what was last written, and goes through a temporary file plus rename so the file is never left
+	half-written. Writes never overlap.
+	"""
+
+	def __init__(
+		self,
+		path: str,
+		get_context: Callable[[], PlaywrightBrowserContext | None],
+		file_format: CookiesFileFormat = 'cookies',
+		save_interval: float = 5.0,
+	):
+		self.path = path
+		self.file_format = file_format
+		self.save_interval = save_interval
+		self._get_context = get_context
+		self._lock = asyncio.Lock()
+		self._pending_save: asyncio.Task | None = None
+		self._last_written_digest: str | None = None
+
+	def schedule_save(self) -> None:
+		"""Request a save; it happens at most once per save interval."""
+		if self._pending_save is not None and not self._pending_save.done():
+			return
+		self._pending_save = asyncio.create_task(self._save_later())
+
+	async def _save_later(self) -> None:
+		await asyncio.sleep(self.save_interval)
+		# a write that already started is finished even if the scheduled save gets cancelled
+		await asyncio.shield(self.flush())
+
+	async def _snapshot(self, context: PlaywrightBrowserContext) -> list | dict:
+		if self.file_format == 'storage_state':
+			return await context.storage_state()
+		return await context.cookies()
+
+	async def flush(self) -> bool:
+		"""Write the cookies now if they changed since the last write. Returns True if the file was written."""
+		context = self._get_context()
+		if context is None:
+			return False
+
+		async with self._lock:
+			try:
+				snapshot = await self._snapshot(context)
+				digest = hashlib.sha256(json.dumps(snapshot, sort_keys=True).encode()).hexdigest()
+				if digest == self._last_written_digest:
+					return False
+
+				cookies = snapshot['cookies'] if isinstance(snapshot, dict) else snapshot
+				logger.debug(f'🍪  Saving {len(cookies)} cookies to {self.path}')
+				await asyncio.to_thread(write_json_atomic, self.path, snapshot)
+				self._last_written_digest = digest
+				return True
+			except Exception as e:
+				logger.warning(f'❌  Failed to save cookies: {str(e)}')
+				return False
+
+	async def close(self) -> None:
+		"""Cancel a scheduled save and write the final state."""
+		if self._pending_save is not None and not self._pending_save.done():
+			self._pending_save.cancel()
+		self._pending_save = None
+		await self.flush()
@@ -17,6 +17,7 @@ from browser_use.telemetry.views import (
 	ControllerRegisteredFunctionsTelemetryEvent,
 	RegisteredFunction,
 )
+from browser_use.tracing import set_span_attributes
 from browser_use.utils import time_execution_async
 
 Context = TypeVar('Context')
@@ -29,6 +30,8 @@ class Registry(Generic[Context]):
 		self.registry = ActionRegistry()
 		self.telemetry = ProductTelemetry()
 		self.exclude_actions = exclude_actions if exclude_actions is not None else []
+		# action models by the set of actions they contain, see create_action_model
+		self._action_model_cache: dict[tuple[tuple[str, int], ...], tuple[list[RegisteredAction], type[ActionModel]]] = {}
 
 	# @time_execution_sync('--create_param_model')
 	def _create_param_model(self, function: Callable) -> type[BaseModel]:
@@ -103,6 +106,7 @@ class Registry(Generic[Context]):
 		context: Context | None = None,
 	) -> Any:
 		"""Execute a registered action"""
+		set_span_attributes(action=action_name)
 		if action_name not in self.registry.actions:
 			raise ValueError(f'Action {action_name} not found')
 
@@ -141,7 +145,7 @@ class Registry(Generic[Context]):
 				extra_args['page_extraction_llm'] = page_extraction_llm
 			if 'available_file_paths' in parameter_names:
 				extra_args['available_file_paths'] = available_file_paths
-			if action_name == 'input_text' and sensitive_data:
+			if action_name in ('input_text', 'fill_form') and sensitive_data:
 				extra_args['has_sensitive_data'] = True
 			if is_pydantic:
 				return await action.function(validated_params, **extra_args)
@@ -191,10 +195,7 @@ class Registry(Generic[Context]):
 
 		return type(params).model_validate(processed_params)
 
-	# @time_execution_sync('--create_action_model')
-	def create_action_model(self, include_actions: list[str] | None = None, page=None) -> type[ActionModel]:
-		"""Creates a Pydantic model from registered actions, used by LLM APIs that support tool calling & enforce a schema"""
-
+	def _get_available_actions(self, include_actions: list[str] | None = None, page=None) -> dict[str, RegisteredAction]:
 		# Filter actions based on page if provided:
 		#   if page is None, only include actions with no filters
 		#   if page is provided, only include actions that match the page
@@ -218,6 +219,20 @@ class Registry(Generic[Context]):
 			if domain_is_allowed and page_is_allowed:
 				available_actions[name] = action
 
+		return available_actions
+
+	# @time_execution_sync('--create_action_model')
+	def create_action_model(self, include_actions: list[str] | None = None, page=None) -> type[ActionModel]:
+		"""Creates a Pydantic model from registered actions, used by LLM APIs that support tool calling & enforce a schema"""
+		available_actions = self._get_available_actions(include_actions, page)
+
+		# Models are built once per set of available actions, most pages share the same few sets.
+		# The cache keeps the actions alive, so their ids identify them as long as the entry exists.
+		signature = tuple((name, id(action)) for name, action in available_actions.items())
+		cached = self._action_model_cache.get(signature)
+		if cached is not None:
+			return cached[1]
+
 		fields = {
 			name: (
 				Optional[action.param_model],
@@ -235,7 +250,9 @@ class Registry(Generic[Context]):
 			)
 		)
 
-		return create_model('ActionModel', __base__=ActionModel, **fields)  # type:ignore
+		action_model = create_model('ActionModel', __base__=ActionModel, **fields)  # type:ignore
+		self._action_model_cache[signature] = (list(available_actions.values()), action_model)
+		return action_model
 
 	def get_prompt_description(self, page=None) -> str:
 		"""Get a description of all actions for the prompt
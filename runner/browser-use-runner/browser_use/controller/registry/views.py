@@ -1,7 +1,7 @@
 from collections.abc import Callable
 
 from patchright.async_api import Page
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 
 class RegisteredAction(BaseModel):
@@ -18,8 +18,14 @@ class RegisteredAction(BaseModel):
 
 	model_config = ConfigDict(arbitrary_types_allowed=True)
 
+	# generating the JSON schema is expensive and the result never changes
+	_prompt_description: str | None = PrivateAttr(default=None)
+
 	def prompt_description(self) -> str:
 		"""Get a description of the action for the prompt"""
+		if self._prompt_description is not None:
+			return self._prompt_description
+
 		skip_keys = ['title']
 		s = f'{self.description}: \n'
 		s += '{' + str(self.name) + ': '
@@ -30,6 +36,7 @@ class RegisteredAction(BaseModel):
 			}
 		)
 		s += '}'
+		self._prompt_description = s
 		return s
 
 
@@ -43,7 +50,7 @@ class ActionModel(BaseModel):
 	model_config = ConfigDict(arbitrary_types_allowed=True)
 
 	def get_index(self) -> int | None:
-		"""Get the index of the action"""
+		"""Get the index of the action, of the first element for actions on several elements (fill_form)"""
 		# {'clicked_element': {'index':5}}
 		params = self.model_dump(exclude_unset=True).values()
 		if not params:
@@ -51,6 +58,8 @@ class ActionModel(BaseModel):
 		for param in params:
 			if param is not None and 'index' in param:
 				return param['index']
+			if param is not None and param.get('fields'):
+				return param['fields'][0].get('index')
 		return None
 
 	def set_index(self, index: int):
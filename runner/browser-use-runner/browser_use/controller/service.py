@@ -20,6 +20,7 @@ from browser_use.controller.views import (
 	CloseTabAction,
 	DoneAction,
 	DragDropAction,
+	FillFormAction,
 	GoToUrlAction,
 	InputTextAction,
 	NoParamsAction,
@@ -30,7 +31,8 @@ from browser_use.controller.views import (
 	SendKeysAction,
 	SwitchTabAction,
 )
-from browser_use.utils import time_execution_sync
+from browser_use.profiling import profile_phase
+from browser_use.utils import time_execution_async
 
 logger = logging.getLogger(__name__)
 
@@ -170,6 +172,97 @@ class Controller(Generic[Context]):
 			logger.debug(f'Element xpath: {element_node.xpath}')
 			return ActionResult(extracted_content=msg, include_in_memory=True)
 
+		@self.registry.action(
+			'Fill several fields of a form at once - text inputs, textareas, dropdowns and checkboxes',
+			param_model=FillFormAction,
+		)
+		async def fill_form(params: FillFormAction, browser: BrowserContext, has_sensitive_data: bool = False):
+			selector_map = await browser.get_selector_map()
+			for field in params.fields:
+				if field.index not in selector_map:
+					raise Exception(f'Element index {field.index} does not exist - retry or use alternative actions')
+
+			# set all values in one evaluation, with the events a user would trigger, so frameworks pick them up
+			fill_form_js = """
+				(fields) => fields.map(({ xpath, value }) => {
+					const element = document.evaluate(xpath, document, null,
+						XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+					if (!element) return { status: 'not_found' };
+					if (element.disabled || element.readOnly) return { status: 'error', error: 'field is disabled or read-only' };
+
+					const tag = element.tagName.toLowerCase();
+					const type = (element.getAttribute('type') || '').toLowerCase();
+					const fire = (name) => element.dispatchEvent(new Event(name, { bubbles: true }));
+					element.focus();
+
+					if (tag === 'select') {
+						const wanted = value.trim().toLowerCase();
+						const options = Array.from(element.options);
+						const option = options.find((o) => o.text.trim().toLowerCase() === wanted)
+							|| options.find((o) => o.value.toLowerCase() === wanted);
+						if (!option) {
+							return { status: 'error', error: 'no such option, available: ' + options.map((o) => o.text.trim()).join(', ') };
+						}
+						element.value = option.value;
+						fire('input');
+						fire('change');
+					} else if (type === 'checkbox' || type === 'radio') {
+						const checked = ['true', 'yes', 'on', '1', 'checked'].includes(value.trim().toLowerCase());
+						if (type === 'radio' && !checked) {
+							return { status: 'error', error: 'a radio button can not be unchecked, select another option of its group' };
+						}
+						// a click toggles the state and dispatches the click, input and change events
+						if (element.checked !== checked) element.click();
+					} else if (tag === 'input' || tag === 'textarea') {
+						// the setter of the prototype, frameworks like React track the value set on the element itself
+						const prototype = tag === 'input' ? HTMLInputElement.prototype : HTMLTextAreaElement.prototype;
+						Object.getOwnPropertyDescriptor(prototype, 'value').set.call(element, value);
+						fire('input');
+						fire('change');
+					} else if (element.isContentEditable) {
+						element.textContent = value;
+						fire('input');
+					} else {
+						return { status: 'not_fillable' };
+					}
+					element.blur();
+					return { status: 'ok' };
+				})
+			"""
+			# fields in iframes and shadow roots have xpaths relative to those, which could find another element of the top
+			# document, they are typed into like input_text instead
+			results = [{'status': 'not_found'}] * len(params.fields)
+			batched = [i for i, field in enumerate(params.fields) if selector_map[field.index].has_document_xpath]
+			if batched:
+				page = await browser.get_current_page()
+				fields = [{'xpath': selector_map[params.fields[i].index].xpath, 'value': params.fields[i].value} for i in batched]
+				for i, result in zip(batched, await page.evaluate(fill_form_js, fields)):
+					results[i] = result
+
+			lines = []
+			filled = 0
+			for field, result in zip(params.fields, results):
+				if result['status'] in ('not_found', 'not_fillable'):
+					# type into it like input_text, which also finds elements in iframes and shadow roots
+					try:
+						await browser._input_text_element_node(selector_map[field.index], field.value)
+						result = {'status': 'ok'}
+					except Exception as e:
+						result = {'status': 'error', 'error': str(e)}
+
+				value = 'sensitive data' if has_sensitive_data else field.value
+				if result['status'] == 'ok':
+					filled += 1
+					lines.append(f'✅ {value} into index {field.index}')
+				else:
+					lines.append(f'❌ {value} into index {field.index}: {result["error"]}')
+
+			msg = f'⌨️  Filled {filled} / {len(params.fields)} fields:\n' + '\n'.join(lines)
+			logger.info(msg)
+			if not filled:
+				return ActionResult(error=msg, include_in_memory=True)
+			return ActionResult(extracted_content=msg, include_in_memory=True)
+
 		# Save PDF
 		@self.registry.action(
 			'Save the current page as a PDF file',
@@ -817,7 +910,7 @@ class Controller(Generic[Context]):
 
 	# Act --------------------------------------------------------------------
 
-	@time_execution_sync('--act')
+	@time_execution_async('--act')
 	async def act(
 		self,
 		action: ActionModel,
@@ -842,15 +935,16 @@ class Controller(Generic[Context]):
 					# 	},
 					# 	span_type='TOOL',
 					# ):
-					result = await self.registry.execute_action(
-						action_name,
-						params,
-						browser=browser_context,
-						page_extraction_llm=page_extraction_llm,
-						sensitive_data=sensitive_data,
-						available_file_paths=available_file_paths,
-						context=context,
-					)
+					with profile_phase(f'action.{action_name}'):
+						result = await self.registry.execute_action(
+							action_name,
+							params,
+							browser=browser_context,
+							page_extraction_llm=page_extraction_llm,
+							sensitive_data=sensitive_data,
+							available_file_paths=available_file_paths,
+							context=context,
+						)
 
 					# Laminar.set_span_output(result)
 
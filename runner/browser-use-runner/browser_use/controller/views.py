@@ -21,6 +21,15 @@ class InputTextAction(BaseModel):
 	xpath: str | None = None
 
 
+class FormField(BaseModel):
+	index: int
+	value: str = Field(description='Text to enter, the text of the option for dropdowns, or true/false for checkboxes')
+
+
+class FillFormAction(BaseModel):
+	fields: list[FormField]
+
+
 class DoneAction(BaseModel):
 	text: str
 	success: bool
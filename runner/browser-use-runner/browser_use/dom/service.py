@@ -62,7 +62,7 @@ class DomService:
 			and not is_ad_url(frame.url)  # exclude most common ad network tracker frame URLs
 		]
 
-	@time_execution_async('--build_dom_tree')
+	@time_execution_async('--build_dom_tree', phase='dom.build')
 	async def _build_dom_tree(
 		self,
 		highlight_elements: bool,
@@ -113,7 +113,7 @@ class DomService:
 
 		return await self._construct_dom_tree(eval_page)
 
-	@time_execution_async('--construct_dom_tree')
+	@time_execution_async('--construct_dom_tree', phase='dom.construct')
 	async def _construct_dom_tree(
 		self,
 		eval_page: dict,
@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from dataclasses import dataclass
 from functools import cached_property
 from typing import TYPE_CHECKING, Optional
@@ -121,6 +122,16 @@ class DOMElementNode(DOMBaseNode):
 
 		return tag_str
 
+	@property
+	def has_document_xpath(self) -> bool:
+		"""Whether xpath starts at the top document, i.e. the element is not inside an iframe or a shadow root"""
+		parent = self.parent
+		while parent is not None:
+			if parent.shadow_root or parent.tag_name.lower() == 'iframe':
+				return False
+			parent = parent.parent
+		return True
+
 	@cached_property
 	def hash(self) -> HashedDomElement:
 		from browser_use.dom.history_tree_processor.service import (
@@ -150,11 +161,88 @@ class DOMElementNode(DOMBaseNode):
 		return '\n'.join(text_parts).strip()
 
 	@time_execution_sync('--clickable_elements_to_string')
-	def clickable_elements_to_string(self, include_attributes: list[str] | None = None) -> str:
-		"""Convert the processed DOM content to HTML."""
-		formatted_text = []
-
-		def process_node(node: DOMBaseNode, depth: int) -> None:
+	def clickable_elements_to_string(
+		self,
+		include_attributes: list[str] | None = None,
+		max_tokens: int | None = None,
+		count_tokens: Callable[[str], int] | None = None,
+	) -> str:
+		"""Convert the processed DOM content to HTML.
+
+		If the result exceeds max_tokens (counted with count_tokens, default ~3 characters per token), long runs of
+		similar items are collapsed into a summary line first. If it still does not fit, lines are kept by priority
+		(in viewport, new, inputs, everything else) and the others are replaced by omission markers.
+		"""
+		runs: list[str] = []
+		lines = self._serialize_clickable_elements(include_attributes, runs if max_tokens is not None else None)
+		formatted_text = '\n'.join(line.text for line in lines)
+		if max_tokens is None:
+			return formatted_text
+
+		count_tokens = count_tokens or _estimate_tokens
+		if count_tokens(formatted_text) <= max_tokens:
+			return formatted_text
+
+		# 1. collapse long runs of similar items
+		collapsed_lines: list[_SerializedLine] = []
+		emitted_runs = set()
+		for line in lines:
+			if line.run is None:
+				collapsed_lines.append(line)
+			elif line.run not in emitted_runs:
+				emitted_runs.add(line.run)
+				collapsed_lines.append(_SerializedLine(text=runs[line.run], rank=(False, False, False), shape=()))
+
+		formatted_text = '\n'.join(line.text for line in collapsed_lines)
+		if count_tokens(formatted_text) <= max_tokens:
+			return formatted_text
+
+		# 2. keep the most important lines, leaving room for the omission markers
+		budget = int(max_tokens * 0.9)
+		kept = set()
+		used = 0
+		for i in sorted(range(len(collapsed_lines)), key=lambda i: (collapsed_lines[i].rank, i)):
+			cost = count_tokens(collapsed_lines[i].text) + 1
+			if used + cost <= budget:
+				kept.add(i)
+				used += cost
+
+		output = []
+		omitted = 0
+		for i, line in enumerate(collapsed_lines):
+			if i in kept:
+				if omitted:
+					output.append(f'... {omitted} lines omitted - scroll or extract content to see them ...')
+					omitted = 0
+				output.append(line.text)
+			else:
+				omitted += 1
+		if omitted:
+			output.append(f'... {omitted} lines omitted - scroll or extract content to see them ...')
+		return '\n'.join(output)
+
+	def clickable_elements_snapshot(self, include_attributes: list[str] | None = None) -> dict[str, str]:
+		"""
+		The lines of clickable_elements_to_string (without indentation) by element identity, to compare the elements
+		of two states of the same page. Elements are identified by their xpath, text lines by their parent and text.
+		"""
+		snapshot: dict[str, str] = {}
+		for line in self._serialize_clickable_elements(include_attributes):
+			key = line.key
+			occurrence = 1
+			while key in snapshot:
+				occurrence += 1
+				key = f'{line.key}#{occurrence}'
+			snapshot[key] = line.text.lstrip('\t')
+		return snapshot
+
+	def _serialize_clickable_elements(
+		self, include_attributes: list[str] | None = None, runs: list[str] | None = None
+	) -> list['_SerializedLine']:
+		"""Serialize the clickable elements line by line, long runs of similar items are marked if runs is given"""
+
+		def process_node(node: DOMBaseNode, depth: int) -> list[_SerializedLine]:
+			lines: list[_SerializedLine] = []
 			next_depth = int(depth)
 			depth_str = depth * '\t'
 
@@ -165,6 +253,7 @@ class DOMElementNode(DOMBaseNode):
 
 					text = node.get_all_text_till_next_clickable_element()
 					attributes_html_str = ''
+					attributes_to_include = {}
 					if include_attributes:
 						attributes_to_include = {
 							key: str(value) for key, value in node.attributes.items() if key in include_attributes
@@ -214,11 +303,22 @@ class DOMElementNode(DOMBaseNode):
 						line += ' '
 
 					line += ' />'  # 1 token
-					formatted_text.append(line)
+					lines.append(
+						_SerializedLine(
+							text=line,
+							rank=(not node.is_in_viewport, not node.is_new, not _is_input_element(node)),
+							shape=(depth, node.tag_name, tuple(attributes_to_include)),
+							highlight_index=node.highlight_index,
+							key=node.xpath,
+						)
+					)
 
 				# Process children regardless
-				for child in node.children:
-					process_node(child, next_depth)
+				children_lines = [process_node(child, next_depth) for child in node.children]
+				if runs is not None:
+					_mark_repeated_runs(node.children, children_lines, next_depth, runs)
+				for child_lines in children_lines:
+					lines.extend(child_lines)
 
 			elif isinstance(node, DOMTextNode):
 				# Add text only if it doesn't have a highlighted parent
@@ -228,10 +328,18 @@ class DOMElementNode(DOMBaseNode):
 					and node.parent.is_visible
 					and node.parent.is_top_element
 				):  # and node.is_parent_top_element()
-					formatted_text.append(f'{depth_str}{node.text}')
+					lines.append(
+						_SerializedLine(
+							text=f'{depth_str}{node.text}',
+							rank=(not node.is_parent_in_viewport(), True, True),
+							shape=(depth, '#text'),
+							key=f'{node.parent.xpath}#text:{node.text}',
+						)
+					)
+
+			return lines
 
-		process_node(self, 0)
-		return '\n'.join(formatted_text)
+		return process_node(self, 0)
 
 	def get_file_upload_element(self, check_siblings: bool = True) -> Optional['DOMElementNode']:
 		# Check if current element is a file input
@@ -256,6 +364,75 @@ class DOMElementNode(DOMBaseNode):
 		return None
 
 
+# a run of at least this many similar siblings (e.g. product cards) is collapsed, keeping the first few
+COLLAPSE_MIN_ITEMS = 8
+COLLAPSE_KEEP_ITEMS = 3
+
+LOW_PRIORITY = (True, True, True)
+
+INPUT_TAGS = ('input', 'textarea', 'select')
+INPUT_ROLES = ('textbox', 'searchbox', 'combobox', 'spinbutton')
+
+
+@dataclass
+class _SerializedLine:
+	"""A line of clickable_elements_to_string with what is needed to shorten the output to a token budget"""
+
+	text: str
+	rank: tuple[bool, bool, bool]  # (not in viewport, not new, not an input), lower is more important
+	shape: tuple  # what the line looks like regardless of its content, to detect repeated items
+	highlight_index: int | None = None
+	run: int | None = None  # the collapsible run of similar items this line belongs to
+	key: str = ''  # identity of the element (or text) across states of the page
+
+
+def _estimate_tokens(text: str) -> int:
+	return len(text) // 3
+
+
+def _is_input_element(node: 'DOMElementNode') -> bool:
+	return (
+		node.tag_name in INPUT_TAGS
+		or node.attributes.get('role') in INPUT_ROLES
+		or node.attributes.get('contenteditable') in ('', 'true')
+	)
+
+
+def _mark_repeated_runs(
+	children: list[DOMBaseNode], children_lines: list[list[_SerializedLine]], depth: int, runs: list[str]
+) -> None:
+	"""Assign the lines of long runs of siblings with the same shape (except the first few) to a collapsible run"""
+	shapes = [tuple(line.shape for line in child_lines) for child_lines in children_lines]
+	start = 0
+	while start < len(shapes):
+		end = start
+		while end + 1 < len(shapes) and shapes[end + 1] == shapes[start]:
+			end += 1
+
+		if shapes[start] and end - start + 1 >= COLLAPSE_MIN_ITEMS:
+			# items in the viewport, new items and inputs are never collapsed
+			collapsed = [
+				child_lines
+				for child_lines in children_lines[start + COLLAPSE_KEEP_ITEMS : end + 1]
+				if all(line.rank == LOW_PRIORITY for line in child_lines)
+			]
+			if collapsed:
+				indexes = [
+					line.highlight_index for child_lines in collapsed for line in child_lines if line.highlight_index is not None
+				]
+				child = children[start]
+				tag = child.tag_name if isinstance(child, DOMElementNode) else 'text'
+				indent = depth * '\t'
+				summary = f'{indent}... {len(collapsed)} more similar <{tag}> items'
+				if indexes:
+					summary += f' [{indexes[0]}]-[{indexes[-1]}]'
+				runs.append(summary + ' ...')
+				for child_lines in collapsed:
+					for line in child_lines:
+						line.run = len(runs) - 1
+		start = end + 1
+
+
 SelectorMap = dict[int, DOMElementNode]
 
 
@@ -0,0 +1,142 @@
+"""
+Per-step phase profiling: where the time of an agent step goes, for finding regressions and sizing deployments.
+
+Durations are only recorded while a step profile is active (Agent(profile_steps=True)). Without one, the profiled
+functions only pay for a context variable lookup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from collections.abc import Coroutine, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar, Token, copy_context
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# phase durations of the step running in the current context, None when not profiling
+_current_phases: ContextVar[dict[str, float] | None] = ContextVar('browser_use_step_phases', default=None)
+
+T = TypeVar('T')
+
+# upper bounds in seconds of the histogram buckets, from a fast DOM build up to a slow LLM response
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def start_step_profile(phases: dict[str, float]) -> Token:
+	"""Record the phases of everything run in this context (including tasks created in it) into phases"""
+	return _current_phases.set(phases)
+
+
+def stop_step_profile(token: Token) -> None:
+	_current_phases.reset(token)
+
+
+def create_unprofiled_task(coro: Coroutine[Any, Any, T]) -> asyncio.Task[T]:
+	"""
+	Create a task that can outlive the current step (planner, memory, background work). It runs in a copy of the
+	current context without the step profile, so its phases are not added to a step that may already be finished.
+	"""
+	context = copy_context()
+	context.run(_current_phases.set, None)
+	return asyncio.create_task(coro, context=context)
+
+
+@contextmanager
+def profile_step(phases: dict[str, float]) -> Iterator[dict[str, float]]:
+	token = start_step_profile(phases)
+	try:
+		yield phases
+	finally:
+		stop_step_profile(token)
+
+
+def record_phase(name: str, seconds: float) -> None:
+	"""Add seconds to a phase of the current step, phases that run several times per step add up"""
+	phases = _current_phases.get()
+	if phases is not None:
+		phases[name] = phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def profile_phase(name: str) -> Iterator[None]:
+	phases = _current_phases.get()
+	if phases is None:
+		yield
+		return
+	start_time = time.perf_counter()
+	try:
+		yield
+	finally:
+		phases[name] = phases.get(name, 0.0) + time.perf_counter() - start_time
+
+
+class PhaseMetrics:
+	"""Histograms of the phase durations of all profiled steps of the process, in the Prometheus text format"""
+
+	def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+		self.buckets = buckets
+		self._lock = threading.Lock()
+		# phase -> [count per bucket (the last one is +Inf), sum of seconds]
+		self._histograms: dict[str, tuple[list[int], list[float]]] = {}
+
+	def observe(self, phases: Mapping[str, float]) -> None:
+		with self._lock:
+			for phase, seconds in phases.items():
+				counts, total = self._histograms.setdefault(phase, ([0] * (len(self.buckets) + 1), [0.0]))
+				counts[bisect.bisect_left(self.buckets, seconds)] += 1
+				total[0] += seconds
+
+	def reset(self) -> None:
+		with self._lock:
+			self._histograms.clear()
+
+	def render(self) -> str:
+		lines = [
+			'# HELP browser_use_step_phase_seconds Time spent per phase of agent steps',
+			'# TYPE browser_use_step_phase_seconds histogram',
+		]
+		with self._lock:
+			for phase, (counts, total) in sorted(self._histograms.items()):
+				label = phase.replace('\\', '\\\\').replace('"', '\\"')
+				cumulative = 0
+				for bound, count in zip([*self.buckets, '+Inf'], counts):
+					cumulative += count
+					lines.append(f'browser_use_step_phase_seconds_bucket{{phase="{label}",le="{bound}"}} {cumulative}')
+				lines.append(f'browser_use_step_phase_seconds_sum{{phase="{label}"}} {total[0]}')
+				lines.append(f'browser_use_step_phase_seconds_count{{phase="{label}"}} {cumulative}')
+		return '\n'.join(lines) + '\n'
+
+
+# shared by all agents of the process
+step_metrics = PhaseMetrics()
+
+
+def serve_metrics(port: int, host: str = '127.0.0.1', metrics: PhaseMetrics = step_metrics) -> ThreadingHTTPServer:
+	"""Serve the metrics for scraping at http://host:port/metrics from a daemon thread, shutdown() stops it"""
+
+	class MetricsHandler(BaseHTTPRequestHandler):
+		def do_GET(self):
+			if self.path.split('?')[0] != '/metrics':
+				self.send_error(404)
+				return
+			body = metrics.render().encode()
+			self.send_response(200)
+			self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+			self.send_header('Content-Length', str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, format, *args):
+			logger.debug(f'metrics request: {format % args}')
+
+	server = ThreadingHTTPServer((host, port), MetricsHandler)
+	threading.Thread(target=server.serve_forever, name='browser-use-metrics', daemon=True).start()
+	logger.info(f'Serving step metrics on http://{host}:{server.server_port}/metrics')
+	return server
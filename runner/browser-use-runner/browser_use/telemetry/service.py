@@ -1,13 +1,12 @@
 import logging
 import os
 import uuid
-from pathlib import Path
 
 from dotenv import load_dotenv
 from posthog import Posthog
 
 from browser_use.telemetry.views import BaseTelemetryEvent
-from browser_use.utils import singleton
+from browser_use.utils import singleton, xdg_cache_home
 
 load_dotenv()
 
@@ -20,14 +19,6 @@ POSTHOG_EVENT_SETTINGS = {
 }
 
 
-def xdg_cache_home() -> Path:
-	default = Path.home() / '.cache'
-	env_var = os.getenv('XDG_CACHE_HOME')
-	if env_var and (path := Path(env_var)).is_absolute():
-		return path
-	return default
-
-
 @singleton
 class ProductTelemetry:
 	"""
@@ -0,0 +1,202 @@
+"""
+Local span tracing: nested spans of agent steps, LLM calls, actions, state captures and DOM builds written to a file.
+
+A .json file gets Chrome trace events that chrome://tracing and https://ui.perfetto.dev show as a flame chart, any
+other file gets one JSON span per line. Configure it with configure_tracing() or the environment:
+
+	BROWSER_USE_TRACE_FILE=traces/run.json BROWSER_USE_TRACE_SAMPLE_RATE=0.1 python my_agent.py
+
+Sampling is decided per trace, i.e. per outermost span (usually Agent.run), so a sampled run is traced completely.
+"""
+
+from __future__ import annotations
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Literal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+	name: str
+	trace_id: str
+	span_id: str
+	parent_id: str | None
+	start_time: float
+	end_time: float | None = None
+	attributes: dict[str, Any] = field(default_factory=dict)
+	error: str | None = None
+
+	@property
+	def duration_seconds(self) -> float:
+		return (self.end_time or time.time()) - self.start_time
+
+
+class SpanExporter:
+	"""Appends finished spans to a file, the file is created on the first span"""
+
+	def __init__(self, path: str | Path):
+		self.path = Path(path)
+		self._file = None
+		self._lock = threading.Lock()
+
+	def export(self, span: Span) -> None:
+		with self._lock:
+			if self._file is None:
+				self.path.parent.mkdir(parents=True, exist_ok=True)
+				self._file = open(self.path, 'w', encoding='utf-8')
+				self._write_header(self._file)
+			self._file.write(self._format(span) + '\n')
+			if span.parent_id is None:
+				self._file.flush()
+
+	def close(self) -> None:
+		with self._lock:
+			if self._file is not None:
+				self._file.close()
+				self._file = None
+
+	def _write_header(self, file) -> None:
+		pass
+
+	def _format(self, span: Span) -> str:
+		return json.dumps(asdict(span), default=str)
+
+
+class ChromeTraceExporter(SpanExporter):
+	"""
+	Chrome trace event format. The closing bracket of the event array is optional in that format, so events are
+	appended as they finish and a trace of a crashed process can still be opened.
+	"""
+
+	def __init__(self, path: str | Path):
+		super().__init__(path)
+		self._pid = os.getpid()
+		# one row per trace, so concurrent agents do not overlap in the flame chart
+		self._rows: dict[str, int] = {}
+		self._next_row = itertools.count(1)
+
+	def _write_header(self, file) -> None:
+		file.write('[\n')
+
+	def _format(self, span: Span) -> str:
+		row = self._rows.get(span.trace_id)
+		if row is None:
+			row = self._rows[span.trace_id] = next(self._next_row)
+		args = dict(span.attributes)
+		if span.error:
+			args['error'] = span.error
+		event = {
+			'name': span.name,
+			'ph': 'X',
+			'ts': round(span.start_time * 1_000_000),
+			'dur': round(span.duration_seconds * 1_000_000),
+			'pid': self._pid,
+			'tid': row,
+			'args': args,
+		}
+		return json.dumps(event, default=str) + ','
+
+
+class Tracer:
+	def __init__(self, exporter: SpanExporter, sample_rate: float = 1.0):
+		self.exporter = exporter
+		self.sample_rate = sample_rate
+
+
+# span of the current context, _UNSAMPLED inside a trace that is not recorded
+_current_span: ContextVar[Span | None] = ContextVar('browser_use_span', default=None)
+_UNSAMPLED = Span(name='unsampled', trace_id='', span_id='', parent_id=None, start_time=0.0)
+_tracer: Tracer | None = None
+
+
+def configure_tracing(
+	path: str | Path | None,
+	sample_rate: float = 1.0,
+	format: Literal['chrome', 'jsonl'] | None = None,
+) -> None:
+	"""Write spans to path (None disables tracing), in the Chrome format for .json files unless format is given"""
+	global _tracer
+	if _tracer is not None:
+		_tracer.exporter.close()
+		_tracer = None
+	if path is None:
+		return
+	if format is None:
+		format = 'chrome' if Path(path).suffix == '.json' else 'jsonl'
+	exporter = ChromeTraceExporter(path) if format == 'chrome' else SpanExporter(path)
+	_tracer = Tracer(exporter, sample_rate)
+
+
+def current_span() -> Span | None:
+	span = _current_span.get()
+	return None if span is _UNSAMPLED else span
+
+
+def set_span_attributes(**attributes: Any) -> None:
+	"""Add attributes to the current span, if it is recorded"""
+	span = current_span()
+	if span is not None:
+		span.attributes.update(attributes)
+
+
+@contextmanager
+def trace_span(name: str, **attributes: Any) -> Iterator[Span | None]:
+	"""A span around the block, nested in the span of the current context, yields None when it is not recorded"""
+	tracer = _tracer
+	if tracer is None:
+		yield None
+		return
+
+	parent = _current_span.get()
+	if parent is _UNSAMPLED:
+		yield None
+		return
+	if parent is None and random.random() >= tracer.sample_rate:
+		token = _current_span.set(_UNSAMPLED)
+		try:
+			yield None
+		finally:
+			_current_span.reset(token)
+		return
+
+	span = Span(
+		name=name,
+		trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+		span_id=uuid.uuid4().hex[:16],
+		parent_id=parent.span_id if parent else None,
+		start_time=time.time(),
+		attributes=attributes,
+	)
+	token = _current_span.set(span)
+	try:
+		yield span
+	except BaseException as e:
+		span.error = f'{type(e).__name__}: {e}'
+		raise
+	finally:
+		_current_span.reset(token)
+		span.end_time = time.time()
+		try:
+			tracer.exporter.export(span)
+		except Exception as e:
+			logger.debug(f'Failed to export span {name}: {e}')
+
+
+if os.getenv('BROWSER_USE_TRACE_FILE'):
+	configure_tracing(os.environ['BROWSER_USE_TRACE_FILE'], float(os.getenv('BROWSER_USE_TRACE_SAMPLE_RATE', '1.0')))
+atexit.register(configure_tracing, None)
@@ -4,11 +4,16 @@ import os
 import platform
 import signal
 import time
+import weakref
 from collections.abc import Callable, Coroutine
 from functools import wraps
+from pathlib import Path
 from sys import stderr
 from typing import Any, ParamSpec, TypeVar
 
+from browser_use.profiling import record_phase
+from browser_use.tracing import trace_span
+
 logger = logging.getLogger(__name__)
 
 # Global flag to prevent duplicate exit messages
@@ -18,6 +23,9 @@ _exiting = False
 R = TypeVar('R')
 P = ParamSpec('P')
 
+# Warn when the event loop is blocked longer than this many seconds (0 disables the check)
+LOOP_LAG_WARNING_THRESHOLD = float(os.getenv('BROWSER_USE_LOOP_LAG_THRESHOLD', '1.0'))
+
 
 class SignalHandler:
 	"""
@@ -297,14 +305,22 @@ class SignalHandler:
 			self.loop.waiting_for_input = False
 
 
-def time_execution_sync(additional_text: str = '') -> Callable[[Callable[P, R]], Callable[P, R]]:
+def time_execution_sync(additional_text: str = '', phase: str | None = None) -> Callable[[Callable[P, R]], Callable[P, R]]:
+	"""
+	Log the execution time and trace the call as a span named after the function (see browser_use.tracing). With a
+	phase name the time is added to the profiled step (see browser_use.profiling).
+	"""
+
 	def decorator(func: Callable[P, R]) -> Callable[P, R]:
 		@wraps(func)
 		def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
 			start_time = time.time()
-			result = func(*args, **kwargs)
+			with trace_span(func.__qualname__):
+				result = func(*args, **kwargs)
 			execution_time = time.time() - start_time
 			logger.debug(f'{additional_text} Execution time: {execution_time:.2f} seconds')
+			if phase:
+				record_phase(phase, execution_time)
 			return result
 
 		return wrapper
@@ -314,14 +330,18 @@ def time_execution_sync(additional_text: str = '') -> Callable[[Callable[P, R]],
 
 def time_execution_async(
 	additional_text: str = '',
+	phase: str | None = None,
 ) -> Callable[[Callable[P, Coroutine[Any, Any, R]]], Callable[P, Coroutine[Any, Any, R]]]:
 	def decorator(func: Callable[P, Coroutine[Any, Any, R]]) -> Callable[P, Coroutine[Any, Any, R]]:
 		@wraps(func)
 		async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
 			start_time = time.time()
-			result = await func(*args, **kwargs)
+			with trace_span(func.__qualname__):
+				result = await func(*args, **kwargs)
 			execution_time = time.time() - start_time
 			logger.debug(f'{additional_text} Execution time: {execution_time:.2f} seconds')
+			if phase:
+				record_phase(phase, execution_time)
 			return result
 
 		return wrapper
@@ -343,3 +363,97 @@ def singleton(cls):
 def check_env_variables(keys: list[str], any_or_all=all) -> bool:
 	"""Check if all required environment variables are set"""
 	return any_or_all(os.getenv(key, '').strip() for key in keys)
+
+
+def xdg_cache_home() -> Path:
+	default = Path.home() / '.cache'
+	env_var = os.getenv('XDG_CACHE_HOME')
+	if env_var and (path := Path(env_var)).is_absolute():
+		return path
+	return default
+
+
+async def ainvoke_llm(llm: Any, input: Any, **kwargs: Any) -> Any:
+	"""
+	Call a chat model without blocking the event loop.
+
+	Langchain models are called through ainvoke (which already runs sync-only models in an executor),
+	anything that only implements invoke is run in a worker thread.
+	"""
+	if hasattr(llm, 'ainvoke'):
+		return await llm.ainvoke(input, **kwargs)
+	return await asyncio.to_thread(llm.invoke, input, **kwargs)
+
+
+class LoopLagMonitor:
+	"""
+	Warns when the event loop was blocked for longer than `threshold` seconds.
+
+	A sync call inside a coroutine (a blocking HTTP request, a heavy computation) stalls every other agent, network
+	listener and websocket of the process. The monitor wakes up every `interval` seconds and measures how late it was.
+	One monitor per event loop is enough, use LoopLagMonitor.ensure_running() to share it and release() once done, the
+	monitor stops when its last user released it.
+	"""
+
+	_monitors: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LoopLagMonitor]' = weakref.WeakKeyDictionary()
+
+	def __init__(self, threshold: float = LOOP_LAG_WARNING_THRESHOLD, interval: float = 0.1):
+		self.threshold = threshold
+		self.interval = interval
+		self.max_lag = 0.0
+		self._task: asyncio.Task | None = None
+		self._users = 0
+
+	@property
+	def running(self) -> bool:
+		return self._task is not None and not self._task.done()
+
+	def start(self) -> None:
+		if not self.running:
+			self._task = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			try:
+				await self._task
+			except asyncio.CancelledError:
+				pass
+			self._task = None
+
+	async def release(self) -> None:
+		"""Give up one use of ensure_running(), stops the monitor when nothing else uses it"""
+		self._users -= 1
+		if self._users <= 0:
+			self._users = 0
+			await self.stop()
+
+	async def _run(self) -> None:
+		loop = asyncio.get_running_loop()
+		while True:
+			start = loop.time()
+			await asyncio.sleep(self.interval)
+			lag = loop.time() - start - self.interval
+			self.max_lag = max(self.max_lag, lag)
+			if lag >= self.threshold:
+				logger.warning(
+					f'🐢 Event loop was blocked for {lag:.2f}s, all other tasks of this process were stalled meanwhile'
+				)
+
+	@classmethod
+	def ensure_running(cls, threshold: float | None = None) -> 'LoopLagMonitor | None':
+		"""
+		Start the monitor of the running event loop unless it already runs, and count one more user of it.
+		Returns None if monitoring is disabled.
+		"""
+		threshold = LOOP_LAG_WARNING_THRESHOLD if threshold is None else threshold
+		if threshold <= 0:
+			return None
+		loop = asyncio.get_running_loop()
+		monitor = cls._monitors.get(loop)
+		if monitor is None or not monitor.running:
+			monitor = cls(threshold=threshold)
+			monitor.start()
+			cls._monitors[loop] = monitor
+		monitor._users += 1
+		return monitor
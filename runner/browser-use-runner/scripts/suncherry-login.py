@@ -6,7 +6,7 @@ from datetime import datetime
 from dotenv import load_dotenv
 
 from utils import init_browser, finalize_run, setup_common_args, run_main, clean_user_data_dir, kill_chrome_instances
-from suncherryUtils import login, is_logged_in
+from suncherryUtils import login_with_cache
 
 def get_username_password(username,password):
     if not username or not password:
@@ -39,13 +39,7 @@ def run(playwright: Playwright, headless=True, debug: bool = False, trace_folder
     page.set_default_timeout(5000)
     
     try:
-        page.goto(url, timeout=30000)
-        page.wait_for_timeout(10000)
-        if not is_logged_in(page, url, trace_subfolder):
-            login_result = login(page, url,username, password, trace_subfolder)
-        else:
-            print("Already logged in")
-            login_result = True
+        login_result = login_with_cache(page, url, username, password, trace_subfolder)
     except Exception as e:
         print(f"An error occurred during execution: {str(e)}")
         login_result = False
@@ -135,21 +135,18 @@ async def login(page: Page, url: str, username: str, password: str, trace_folder
     print(f"Cookies before reload: {len(cookies_before)} cookies found")
     return await is_logged_in(page, trace_folder)
 
-async def is_logged_in(page: Page, trace_folder: str):
-    activate_semantic_placeholder(page, trace_folder)
-    await page.wait_for_timeout(1000)
+async def is_logged_in(page: Page, trace_folder: str, timeout: float = 10000):
+    """Wait up to timeout ms for the profile button of a logged-in session"""
+    await activate_semantic_placeholder(page, trace_folder)
 
+    profile = page.get_by_label(re.compile("Profil", re.IGNORECASE)).first
     try:
-        element = await page.get_by_label(re.compile("Profil", re.IGNORECASE))
-        if element.count() > 0 and element.is_visible():
-            print('Test Success, Login successful')
-            take_screenshot(page, trace_folder, 'login_success')
-            return True
-        else:
-            print('Test Failed, Login failed')
-            take_screenshot(page, trace_folder, 'login_failed')
-            return False
+        await profile.wait_for(state="visible", timeout=timeout)
     except Exception as e:
         print(f'Test Failed, Login failed: {str(e)}')
-        take_screenshot(page, trace_folder, 'login_failed')
-        return False
\ No newline at end of file
+        await take_screenshot(page, trace_folder, 'login_failed')
+        return False
+
+    print('Test Success, Login successful')
+    await take_screenshot(page, trace_folder, 'login_success')
+    return True
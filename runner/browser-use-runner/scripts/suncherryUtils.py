@@ -2,6 +2,11 @@ import re
 from playwright.sync_api import Page
 from utils import take_screenshot, activate_semantic_placeholder
 
+from browser_use.browser.login_cache import LoginStateCache
+from browser_use.browser.storage_state import CLEAR_LOCAL_STORAGE_JS, RESTORE_LOCAL_STORAGE_JS
+
+LOGIN_CACHE_SITE = 'sunrisetv'
+
 def go_back(page: Page, trace_folder: str):
     print("** go_back **")
     page.go_back()
@@ -122,4 +127,53 @@ def is_logged_in(page: Page, url: str, trace_folder: str):
     except Exception as e:
         print(f'Is logged in check failed: {str(e)}')
         take_screenshot(page, trace_folder, 'login_failed')
-        return False
\ No newline at end of file
+        return False
+
+def restore_login_state(page: Page, url: str, storage_state: dict):
+    """Add the cached cookies, open url and restore the cached localStorage of its origin"""
+    print("** restore_login_state **")
+    page.context.add_cookies(storage_state['cookies'])
+    page.goto(url, timeout=30000)
+    restored = [entry['origin'] for entry in storage_state['origins'] if page.evaluate(RESTORE_LOCAL_STORAGE_JS, entry)]
+    if restored:
+        print(f"Restored localStorage of {', '.join(restored)}")
+        page.reload()
+
+def clear_login_state(page: Page, storage_state: dict):
+    """Remove the cookies and the localStorage of the current origin restored from an outdated login state"""
+    print("** clear_login_state **")
+    for cookie in storage_state['cookies']:
+        page.context.clear_cookies(name=cookie['name'], domain=cookie.get('domain'), path=cookie.get('path'))
+    for entry in storage_state['origins']:
+        page.evaluate(CLEAR_LOCAL_STORAGE_JS, entry['origin'])
+
+def login_with_cache(page: Page, url: str, username: str, password: str, trace_folder: str, cache: LoginStateCache = None):
+    """Reuse the cached login state of this account if it is still valid, otherwise log in and cache the new state"""
+    print("** login_with_cache **")
+    cache = cache or LoginStateCache()
+    storage_state = cache.read(LOGIN_CACHE_SITE, username)
+    if storage_state is not None:
+        restore_login_state(page, url, storage_state)
+    else:
+        page.goto(url, timeout=30000)
+    page.wait_for_timeout(10000)
+
+    if is_logged_in(page, url, trace_folder):
+        if storage_state is not None:
+            print("Reused cached login state")
+            return True
+        print("Already logged in")
+    else:
+        if storage_state is not None:
+            # the portal must not see the outdated session while logging in again
+            print("Cached login state is no longer valid, logging in again")
+            clear_login_state(page, storage_state)
+            cache.invalidate(LOGIN_CACHE_SITE, username)
+            page.reload()
+            page.wait_for_timeout(5000)
+        if not login(page, url, username, password, trace_folder):
+            return False
+
+    cache.write(LOGIN_CACHE_SITE, username, page.context.storage_state())
+    print("Cached login state")
+    return True
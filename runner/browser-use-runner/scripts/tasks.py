@@ -15,7 +15,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from datetime import datetime
-from utils import kill_chrome_instances, clean_user_data_dir
+from browser_use.browser.resources import get_resource_allocator
 
 from langchain_openai import ChatOpenAI
 from browser_use import BrowserConfig, Browser, Agent, BrowserContextConfig
@@ -108,6 +108,8 @@ server_state = {
     'log_buffer': [],
     'start_time': None,
     'current_task': None,
+    'cdp_url': None,
+    'resource_leases': [],
 }
 
 def update_log(message: str):
@@ -210,6 +212,12 @@ async def cleanup_browser_server():
         server_state['playwright'] = None
         server_state['chrome_process'] = None
         server_state['is_initialized'] = False
+
+        # Give the debugging port and profile directory back to other browsers on this host
+        for lease in server_state['resource_leases']:
+            lease.release()
+        server_state['resource_leases'] = []
+        server_state['cdp_url'] = None
         
         update_log("Browser closed successfully")
         return True, "Browser closed successfully"
@@ -251,7 +259,7 @@ async def initialize_browser_server():
         
         # Create browser-use Browser wrapper with CDP URL
         browser_config = BrowserConfig(
-            cdp_url='http://localhost:9222',
+            cdp_url=server_state['cdp_url'],
             headless=args.headless
         )
         browser_use_browser = Browser(config=browser_config)
@@ -523,7 +531,7 @@ async def initialize_browser_on_startup():
         
         # Create browser-use Browser wrapper with CDP URL
         browser_config = BrowserConfig(
-            cdp_url='http://localhost:9222',
+            cdp_url=server_state['cdp_url'],
             headless=args.headless
         )
         browser_use_browser = Browser(config=browser_config)
@@ -581,29 +589,14 @@ async def initialize_browser_on_startup():
 
 # Async version of init_browser_with_remote_debugging from utils
 async def init_browser_async(playwright, headless=False, debug=True, video_dir=None, screenshots=True, video=True, source=True, executable_path=None):
-    """Initialize browser with remote debugging enabled on port 9222"""
-    
-    # Kill any existing Chrome instances and clean up
-    kill_chrome_instances()
-    clean_user_data_dir()
+    """Initialize browser with remote debugging enabled on a leased port"""
     
-    # Check if port 9222 is in use and kill any process using it
-    try:
-        if is_port_in_use(9222):
-            print('Port 9222 is in use. Killing processes using this port...')
-            if platform.system() == 'Windows':
-                result = subprocess.run(['netstat', '-aon', '|', 'findstr', ':9222'], shell=True, stdout=subprocess.PIPE)
-                if result.stdout:
-                    lines = result.stdout.decode().splitlines()
-                    for line in lines:
-                        if 'LISTENING' in line:
-                            pid = line.split()[-1]
-                            os.system(f'taskkill /PID {pid} /F')
-            else:
-                os.system('lsof -ti:9222 | xargs kill -9')
-            time.sleep(1)
-    except Exception as e:
-        print(f'Error checking port usage: {str(e)}')
+    # Lease a free debugging port and a private profile directory, so other browsers on this host keep running
+    allocator = get_resource_allocator()
+    port_lease = allocator.lease_port()
+    profile_lease = allocator.lease_profile_dir(prefix='chrome_debug_profile_')
+    server_state['resource_leases'].extend([port_lease, profile_lease])
+    server_state['cdp_url'] = f'http://localhost:{port_lease.value}'
     
     # Set Chrome path based on OS if not provided
     if not executable_path:
@@ -623,9 +616,8 @@ async def init_browser_async(playwright, headless=False, debug=True, video_dir=N
     print(f'Launching Chrome with remote debugging using: {executable_path}')
     
     # Launch Chrome with remote debugging enabled
-    debug_port = 9222
-    user_data_dir = f'/tmp/chrome_debug_profile'
-    os.makedirs(user_data_dir, exist_ok=True)
+    debug_port = port_lease.value
+    user_data_dir = profile_lease.value
     
     chrome_flags = [
         f'--remote-debugging-port={debug_port}',
@@ -651,9 +643,9 @@ async def init_browser_async(playwright, headless=False, debug=True, video_dir=N
     print(f'Chrome launched with PID: {process.pid}')
     time.sleep(10)
     
-    print('Attempting to connect via http://127.0.0.1:9222...')
-    browser = await playwright.chromium.connect_over_cdp('http://localhost:9222')
-    print('Connected to Chrome instance via CDP on port 9222')
+    print(f"Attempting to connect via {server_state['cdp_url']}...")
+    browser = await playwright.chromium.connect_over_cdp(server_state['cdp_url'])
+    print(f'Connected to Chrome instance via CDP on port {debug_port}')
     
     context = browser.contexts[0]
     
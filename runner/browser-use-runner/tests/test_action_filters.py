@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 from patchright.async_api import Page
@@ -303,3 +303,54 @@ class TestActionFilters:
 		assert 'domain_filter_action' in non_matching_page_model.model_fields
 		assert 'page_filter_action' not in non_matching_page_model.model_fields
 		assert 'both_filters_action' not in non_matching_page_model.model_fields
+
+	async def test_action_models_are_cached_per_action_set(self):
+		"""Test that pages with the same available actions share one action model and telemetry is sent once per set"""
+		registry = Registry()
+		registry.telemetry = MagicMock()
+
+		@registry.action(description='No filter action')
+		def no_filter_action():
+			pass
+
+		@registry.action(description='Domain filter action', domains=['example.com'])
+		def domain_filter_action():
+			pass
+
+		mock_page = MagicMock(spec=Page)
+		mock_page.url = 'https://example.com/a'
+		first_model = registry.create_action_model(page=mock_page)
+
+		mock_page.url = 'https://example.com/b'
+		assert registry.create_action_model(page=mock_page) is first_model
+
+		mock_page.url = 'https://other.com/'
+		other_model = registry.create_action_model(page=mock_page)
+		assert other_model is not first_model
+		assert 'domain_filter_action' not in other_model.model_fields
+		assert registry.telemetry.capture.call_count == 2
+
+		# registering another action changes the set, so a new model is built
+		@registry.action(description='Another action')
+		def another_action():
+			pass
+
+		new_model = registry.create_action_model(page=mock_page)
+		assert 'another_action' in new_model.model_fields
+		assert registry.create_action_model(page=mock_page) is new_model
+		assert registry.telemetry.capture.call_count == 3
+
+	def test_prompt_descriptions_are_built_once_per_action(self):
+		"""Test that the JSON schema of an action is only generated for its first prompt description"""
+		registry = Registry()
+
+		@registry.action(description='No filter action')
+		def no_filter_action(text: str):
+			pass
+
+		action = registry.registry.actions['no_filter_action']
+		with patch.object(action.param_model, 'model_json_schema', wraps=action.param_model.model_json_schema) as schema:
+			description = registry.registry.get_prompt_description()
+			assert action._prompt_description is not None and action._prompt_description in description
+			assert registry.registry.get_prompt_description() == description
+		schema.assert_called_once()
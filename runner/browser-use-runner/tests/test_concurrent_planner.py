@@ -0,0 +1,71 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from browser_use.agent.service import Agent
+from browser_use.agent.views import ActionResult
+
+
+class RecordingPlanner(FakeListChatModel):
+	calls: list = []
+	sleep: float = 0.0
+
+	async def ainvoke(self, input, *args, **kwargs):
+		self.calls.append(input)
+		await asyncio.sleep(self.sleep)
+		return await super().ainvoke(input, *args, **kwargs)
+
+
+def make_agent(planner: FakeListChatModel, **kwargs) -> Agent:
+	agent = Agent(
+		task='Find the docs',
+		llm=FakeListChatModel(responses=['unused']),
+		planner_llm=planner,
+		browser=Mock(),
+		browser_context=Mock(),
+		enable_memory=False,
+		**kwargs,
+	)
+	agent.browser_context.get_current_page = AsyncMock(return_value=Mock(url='https://example.com'))
+	return agent
+
+
+async def test_planner_for_next_step_runs_concurrently_with_the_action_results():
+	"""
+	The planner starts right after the actions, with their results, and its plan is taken once it is done.
+	"""
+	planner = RecordingPlanner(responses=['{"next_steps": "open the docs"}'], calls=[], sleep=0.05)
+	agent = make_agent(planner, concurrent_planner=True)
+
+	agent._start_planner([ActionResult(extracted_content='clicked the menu')])
+	task = agent._planner_task
+	assert task is not None and not task.done()
+	# only one planner at a time
+	agent._start_planner([ActionResult(extracted_content='clicked again')])
+	assert agent._planner_task is task
+
+	await asyncio.wait_for(asyncio.shield(task), timeout=5)
+	assert len(planner.calls) == 1
+	assert agent._take_planner_result() == '{"next_steps": "open the docs"}'
+	assert agent._planner_task is None
+	assert planner.calls[0][-1].content == 'Action result: clicked the menu'
+
+
+async def test_failed_concurrent_planner_does_not_fail_the_step():
+	agent = make_agent(FakeListChatModel(responses=['unused']), concurrent_planner=True)
+	agent._planner_task = asyncio.create_task(AsyncMock(side_effect=RuntimeError('planner down'))())
+	await asyncio.sleep(0)
+	assert agent._take_planner_result() is None
+
+
+def test_unchanged_plans_make_the_planner_run_less_often():
+	agent = make_agent(FakeListChatModel(responses=['unused']), skip_unchanged_plans=True)
+	assert all(agent._should_run_planner(step) for step in range(1, 5))
+
+	agent._track_plan('{"next_steps": "scroll down", "reasoning": "first"}')
+	agent._track_plan('{"next_steps": "scroll down", "reasoning": "second"}')
+	assert [agent._should_run_planner(step) for step in range(1, 5)] == [False, True, False, True]
+
+	agent._track_plan('{"next_steps": "click the result"}')
+	assert all(agent._should_run_planner(step) for step in range(1, 5))
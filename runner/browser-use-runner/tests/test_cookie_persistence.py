@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+
+from browser_use.browser.storage_state import CookiePersistence, normalize_storage_state, read_storage_state
+
+
+class DummyContext:
+	"""Stands in for a Playwright BrowserContext, counting how often the cookie jar is read."""
+
+	def __init__(self, cookies):
+		self.jar = cookies
+		self.reads = 0
+
+	async def cookies(self):
+		self.reads += 1
+		return list(self.jar)
+
+	async def storage_state(self):
+		self.reads += 1
+		return {'cookies': list(self.jar), 'origins': [{'origin': 'https://example.com', 'localStorage': []}]}
+
+
+def make_cookie(name: str, value: str) -> dict:
+	return {'name': name, 'value': value, 'domain': 'example.com', 'path': '/', 'sameSite': 'Lax'}
+
+
+def read_json(path: str):
+	return json.loads(Path(path).read_text())
+
+
+async def test_scheduled_saves_are_coalesced(tmp_path):
+	"""
+	Many save requests within one interval lead to a single write of the cookie file.
+	"""
+	path = str(tmp_path / 'cookies.json')
+	context = DummyContext([make_cookie('session', 'a')])
+	persistence = CookiePersistence(path, get_context=lambda: context, save_interval=0.05)
+
+	for _ in range(10):
+		persistence.schedule_save()
+	await asyncio.sleep(0.2)
+
+	assert context.reads == 1
+	assert read_json(path) == [make_cookie('session', 'a')]
+
+
+async def test_unchanged_cookies_are_not_rewritten(tmp_path):
+	"""
+	The file is only rewritten when the cookie jar changed, and no temporary files are left behind.
+	"""
+	path = str(tmp_path / 'cookies.json')
+	context = DummyContext([make_cookie('session', 'a')])
+	persistence = CookiePersistence(path, get_context=lambda: context)
+
+	assert await persistence.flush() is True
+	assert await persistence.flush() is False
+
+	context.jar = [make_cookie('session', 'b')]
+	assert await persistence.flush() is True
+	assert os.listdir(tmp_path) == ['cookies.json']
+
+
+async def test_close_flushes_pending_save(tmp_path):
+	"""
+	Closing writes the cookies immediately instead of waiting for the scheduled save.
+	"""
+	path = str(tmp_path / 'cookies.json')
+	context = DummyContext([make_cookie('session', 'a')])
+	persistence = CookiePersistence(path, get_context=lambda: context, save_interval=60)
+
+	persistence.schedule_save()
+	await persistence.close()
+
+	assert read_json(path) == [make_cookie('session', 'a')]
+
+
+async def test_storage_state_format_round_trip(tmp_path):
+	"""
+	storage_state snapshots are written as such and read back in the same normalized form as plain cookie lists.
+	"""
+	path = str(tmp_path / 'state.json')
+	context = DummyContext([make_cookie('session', 'a')])
+	persistence = CookiePersistence(path, get_context=lambda: context, file_format='storage_state')
+
+	await persistence.flush()
+	state = read_storage_state(path)
+	assert state['cookies'] == [make_cookie('session', 'a')]
+	assert state['origins'][0]['origin'] == 'https://example.com'
+
+	legacy = normalize_storage_state([{'name': 'x', 'value': '1', 'sameSite': 'unspecified'}])
+	assert legacy == {'cookies': [{'name': 'x', 'value': '1', 'sameSite': 'None'}], 'origins': []}
@@ -0,0 +1,86 @@
+from langchain_core.messages import SystemMessage
+
+from browser_use.agent.message_manager.delta import diff_elements
+from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
+from browser_use.browser.views import BrowserState, TabInfo
+from browser_use.dom.views import DOMElementNode, DOMTextNode
+
+
+def link(index: int, label: str) -> DOMElementNode:
+	node = DOMElementNode(
+		tag_name='a',
+		xpath=f'/body/a[{label}]',
+		attributes={},
+		children=[DOMTextNode(text=label, is_visible=True, parent=None)],
+		is_visible=True,
+		parent=None,
+		highlight_index=index,
+		is_top_element=True,
+	)
+	node.children[0].parent = node
+	return node
+
+
+def make_state(labels: list[str], url: str = 'https://app.example.com') -> BrowserState:
+	root = DOMElementNode(tag_name='body', xpath='/body', attributes={}, children=[], is_visible=True, parent=None)
+	root.children = [link(i, label) for i, label in enumerate(labels)]
+	for child in root.children:
+		child.parent = root
+	return BrowserState(
+		element_tree=root,
+		selector_map={},
+		url=url,
+		title='App',
+		tabs=[TabInfo(page_id=0, url=url, title='App')],
+	)
+
+
+def state_text(message_manager: MessageManager, state: BrowserState) -> str:
+	message_manager.add_state_message(state, use_vision=False)
+	content = message_manager.get_messages()[-1].content
+	message_manager._remove_last_state_message()
+	return content
+
+
+def test_diff_reports_changes_and_moved_indexes():
+	old = make_state(['a', 'b', 'c', 'd']).element_tree.clickable_elements_snapshot()
+	new = make_state(['new', 'a', 'b', 'c']).element_tree.clickable_elements_snapshot()
+
+	delta = diff_elements(old, new)
+	assert delta.added == ['[0]<a >new />']
+	assert delta.removed == ['[3]<a >d />']
+	assert delta.unchanged == 3
+	assert 'moved to new indexes: [0]-[2]->[1]-[3]' in delta.to_string()
+
+
+def test_delta_mode_keeps_a_snapshot_and_refreshes_it_on_navigation():
+	"""
+	The first state becomes a snapshot message in the history, later states on the same page only carry the changes.
+	"""
+	message_manager = MessageManager(
+		task='task',
+		system_message=SystemMessage(content='system prompt'),
+		settings=MessageManagerSettings(delta_state_messages=True, full_state_interval=2),
+	)
+	labels = [f'item {i}' for i in range(10)]
+
+	first = state_text(message_manager, make_state(labels))
+	snapshots = [m for m in message_manager.state.history.messages if m.metadata.message_type == 'page_snapshot']
+	assert len(snapshots) == 1
+	assert '[9]<a >item 9 />' in snapshots[0].message.content
+	assert 'No changes to the interactive elements' in first
+
+	second = state_text(message_manager, make_state(labels + ['item 10']))
+	assert 'Added:\n[10]<a >item 10 />' in second
+	assert 'item 3' not in second
+
+	state_text(message_manager, make_state(labels))
+	# full_state_interval reached: new snapshot replaces the old one
+	state_text(message_manager, make_state(labels))
+	assert message_manager.state.page_snapshot.steps == 0
+
+	state_text(message_manager, make_state(labels, url='https://app.example.com/other'))
+	snapshots = [m for m in message_manager.state.history.messages if m.metadata.message_type == 'page_snapshot']
+	assert len(snapshots) == 1
+	assert message_manager.state.page_snapshot.url == 'https://app.example.com/other'
+	assert message_manager.state.history.current_tokens == sum(m.metadata.tokens for m in message_manager.state.history.messages)
@@ -0,0 +1,74 @@
+from browser_use.dom.views import DOMElementNode, DOMTextNode
+
+
+def element(tag: str, children=None, highlight_index=None, is_in_viewport=False, is_new=None, **attributes) -> DOMElementNode:
+	node = DOMElementNode(
+		tag_name=tag,
+		xpath=f'/{tag}',
+		attributes=attributes,
+		children=children or [],
+		is_visible=True,
+		parent=None,
+		highlight_index=highlight_index,
+		is_in_viewport=is_in_viewport,
+		is_top_element=True,
+		is_new=is_new,
+	)
+	for child in node.children:
+		child.parent = node
+	return node
+
+
+def text(value: str) -> DOMTextNode:
+	return DOMTextNode(text=value, is_visible=True, parent=None)
+
+
+def product_page() -> DOMElementNode:
+	products = [element('a', [text(f'Product number {i} with a long description')], highlight_index=i) for i in range(20)]
+	return element(
+		'body',
+		[
+			element('input', highlight_index=100, type='search'),
+			element('div', products),
+			element('button', [text('Show more')], highlight_index=101, is_in_viewport=True),
+		],
+	)
+
+
+def test_without_budget_or_within_budget_output_is_unchanged():
+	root = product_page()
+	full = root.clickable_elements_to_string()
+	assert full.count('Product number') == 20
+	assert root.clickable_elements_to_string(max_tokens=100_000) == full
+
+
+def test_long_lists_are_collapsed_before_anything_else_is_dropped():
+	"""
+	Runs of similar siblings keep their first items and a summary with the range of the collapsed indexes.
+	"""
+	root = product_page()
+	full = root.clickable_elements_to_string()
+	text_out = root.clickable_elements_to_string(max_tokens=len(full) // 3 - 1)
+
+	assert text_out.count('Product number') == 3
+	assert '\n... 17 more similar <a> items [3]-[19] ...\n' in text_out
+	assert '[100]<input ' in text_out
+	assert '[101]<button >Show more' in text_out
+	assert 'omitted' not in text_out
+
+
+def test_tight_budget_keeps_viewport_new_and_input_elements():
+	"""
+	When collapsing is not enough, elements in the viewport, new elements and inputs are kept first, the rest is
+	replaced by omission markers in place.
+	"""
+	root = product_page()
+	root.children[1].children[10].is_new = True
+	text_out = root.clickable_elements_to_string(max_tokens=40, count_tokens=lambda s: len(s.split()))
+
+	assert '[101]<button >Show more' in text_out
+	assert '*[10]*<a >Product number 10' in text_out
+	assert '... 16 more similar <a> items [3]-[19] ...' in text_out
+	assert '[100]<input ' in text_out
+	assert 'lines omitted - scroll or extract content to see them' in text_out
+	assert len(text_out.split()) <= 40
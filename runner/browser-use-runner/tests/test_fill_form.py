@@ -0,0 +1,81 @@
+from unittest.mock import AsyncMock, Mock
+
+from browser_use.controller.service import Controller
+from browser_use.dom.views import DOMElementNode
+
+
+def make_browser(page_results: list[dict]) -> Mock:
+	def node(index: int, tag_name: str) -> DOMElementNode:
+		return DOMElementNode(
+			tag_name=tag_name,
+			xpath=f'html/body/form/{tag_name}[{index}]',
+			attributes={},
+			children=[],
+			is_visible=True,
+			parent=None,
+			highlight_index=index,
+		)
+
+	browser = Mock()
+	browser.get_selector_map = AsyncMock(return_value={1: node(1, 'input'), 2: node(2, 'select'), 3: node(3, 'input')})
+	browser.get_current_page = AsyncMock(return_value=Mock(evaluate=AsyncMock(return_value=page_results)))
+	browser._input_text_element_node = AsyncMock()
+	return browser
+
+
+async def test_fill_form_sets_all_fields_in_one_evaluation_with_secrets():
+	controller = Controller()
+	browser = make_browser([{'status': 'ok'}, {'status': 'error', 'error': 'no such option, available: Red, Blue'}])
+
+	result = await controller.registry.execute_action(
+		'fill_form',
+		{'fields': [{'index': 1, 'value': '<secret>password</secret>'}, {'index': 2, 'value': 'Green'}]},
+		browser=browser,
+		sensitive_data={'password': 'hunter2'},
+	)
+
+	page = await browser.get_current_page()
+	page.evaluate.assert_awaited_once()
+	fields = page.evaluate.await_args.args[1]
+	assert fields == [
+		{'xpath': 'html/body/form/input[1]', 'value': 'hunter2'},
+		{'xpath': 'html/body/form/select[2]', 'value': 'Green'},
+	]
+	assert result.error is None
+	assert 'Filled 1 / 2 fields' in result.extracted_content
+	assert 'no such option, available: Red, Blue' in result.extracted_content
+	assert 'hunter2' not in result.extracted_content
+
+
+async def test_fields_outside_the_document_are_typed_like_input_text():
+	controller = Controller()
+	browser = make_browser([{'status': 'not_found'}])
+	browser._input_text_element_node.side_effect = RuntimeError('element detached')
+
+	result = await controller.registry.execute_action('fill_form', {'fields': [{'index': 3, 'value': 'Berlin'}]}, browser=browser)
+
+	browser._input_text_element_node.assert_awaited_once()
+	assert result.error == '⌨️  Filled 0 / 1 fields:\n❌ Berlin into index 3: element detached'
+
+
+async def test_fields_in_iframes_are_not_looked_up_in_the_top_document():
+	controller = Controller()
+	browser = make_browser([{'status': 'ok'}])
+	selector_map = await browser.get_selector_map()
+	iframe = DOMElementNode(tag_name='iframe', xpath='html/body/iframe', attributes={}, children=[], is_visible=True, parent=None)
+	selector_map[3].parent = iframe
+
+	result = await controller.registry.execute_action(
+		'fill_form', {'fields': [{'index': 1, 'value': 'Ada'}, {'index': 3, 'value': 'Berlin'}]}, browser=browser
+	)
+
+	page = await browser.get_current_page()
+	assert page.evaluate.await_args.args[1] == [{'xpath': 'html/body/form/input[1]', 'value': 'Ada'}]
+	browser._input_text_element_node.assert_awaited_once_with(selector_map[3], 'Berlin')
+	assert 'Filled 2 / 2 fields' in result.extracted_content
+
+
+def test_fill_form_is_checked_like_an_indexed_action():
+	action_model = Controller().registry.create_action_model()
+	action = action_model(fill_form={'fields': [{'index': 7, 'value': 'a'}, {'index': 9, 'value': 'b'}]})
+	assert action.get_index() == 7
@@ -0,0 +1,49 @@
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+
+from browser_use.agent.llm_cache import LLMCacheConfig, LLMCacheMissError, LLMResponseCache
+
+
+def make_llm(cache: LLMResponseCache) -> FakeListChatModel:
+	llm = FakeListChatModel(responses=['first', 'second', 'third'])
+	cache.attach([llm])
+	return llm
+
+
+def state_message(time_str: str, url: str = 'https://example.com') -> list[HumanMessage]:
+	return [HumanMessage(content=f'Current url: {url}\nCurrent date and time: {time_str}')]
+
+
+async def test_read_through_ignores_timestamp_line(tmp_path):
+	"""
+	Identical prompts are answered from the cache even if their timestamp line differs, other changes miss the cache.
+	"""
+	cache = LLMResponseCache(LLMCacheConfig(path=tmp_path / 'cache.sqlite3'))
+	llm = make_llm(cache)
+
+	assert (await llm.ainvoke(state_message('2025-01-01 10:00'))).content == 'first'
+	assert (await llm.ainvoke(state_message('2025-01-02 11:30'))).content == 'first'
+	assert (await llm.ainvoke(state_message('2025-01-01 10:00', url='https://other.com'))).content == 'second'
+	assert cache.hits == 1
+	assert cache.misses == 2
+
+
+async def test_replay_uses_recorded_responses_and_fails_on_miss(tmp_path):
+	"""
+	Responses recorded by one run are replayed by another process without calling the model.
+	"""
+	path = tmp_path / 'cache.sqlite3'
+	recorder = LLMResponseCache(LLMCacheConfig(path=path, mode='record'))
+	recording_llm = make_llm(recorder)
+	await recording_llm.ainvoke(state_message('2025-01-01 10:00'))
+	# record mode always calls the model and overwrites the recorded response
+	await recording_llm.ainvoke(state_message('2025-01-01 10:00'))
+	recorder.close()
+
+	replay = LLMResponseCache(LLMCacheConfig(path=path, mode='replay'))
+	replay_llm = make_llm(replay)
+	assert (await replay_llm.ainvoke(state_message('2025-03-01 09:00'))).content == 'second'
+
+	with pytest.raises(LLMCacheMissError):
+		await replay_llm.ainvoke([HumanMessage(content='never recorded')])
@@ -0,0 +1,44 @@
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, SystemMessage
+
+from browser_use.agent.memory import Memory, MemoryConfig
+from browser_use.agent.memory.local import HashingEmbedder, LocalMemoryStore
+from browser_use.agent.message_manager.service import MessageManager
+
+
+def test_store_finds_the_most_similar_memory_among_thousands():
+	store = LocalMemoryStore(HashingEmbedder(384))
+	for i in range(3000):
+		store.add(f'visited page {i} of the product catalogue and read its reviews', {'agent_id': 'a' if i % 2 else 'b'})
+	store.add('logged in to the admin dashboard with the test account', {'agent_id': 'a'})
+
+	start = time.perf_counter()
+	results = store.search('admin dashboard login', limit=3, filters={'agent_id': 'a'})
+	assert time.perf_counter() - start < 0.5
+
+	assert results[0]['memory'] == 'logged in to the admin dashboard with the test account'
+	assert len(results) == 3
+	assert all(r['metadata']['agent_id'] == 'a' for r in results)
+	assert results[0]['score'] > results[1]['score']
+
+
+def test_local_backend_consolidates_without_mem0():
+	"""
+	The local backend summarizes with the agent's LLM and produces the same memory message as mem0.
+	"""
+	llm = FakeListChatModel(responses=['Task: buy a book. Step 1: searched the catalogue.'])
+	message_manager = MessageManager(task='buy a book', system_message=SystemMessage(content='system prompt'))
+	for i in range(3):
+		message_manager._add_message_with_tokens(AIMessage(content=f'step {i}'))
+
+	start = time.perf_counter()
+	memory = Memory(message_manager=message_manager, llm=llm, config=MemoryConfig(backend='local', agent_id='buyer'))
+	assert time.perf_counter() - start < 0.5
+
+	memory.create_procedural_memory(current_step=3)
+
+	memory_messages = [m for m in message_manager.state.history.messages if m.metadata.message_type == 'memory']
+	assert [m.message.content for m in memory_messages] == ['Task: buy a book. Step 1: searched the catalogue.']
+	assert memory.mem0.search('catalogue', agent_id='buyer')['results'][0]['metadata']['step'] == 3
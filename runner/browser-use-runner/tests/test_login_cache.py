@@ -0,0 +1,194 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from browser_use.browser.login_cache import LoginStateCache
+from browser_use.browser.views import BrowserError
+
+
+class EventEmitter:
+	def __init__(self):
+		self.listeners = {}
+
+	def on(self, event, listener):
+		self.listeners.setdefault(event, []).append(listener)
+
+	def remove_listener(self, event, listener):
+		self.listeners[event].remove(listener)
+
+	def emit(self, event, *args):
+		for listener in list(self.listeners.get(event, [])):
+			listener(*args)
+
+
+class DummyPage(EventEmitter):
+	"""Stands in for a Playwright Page, recording the origins whose localStorage was restored or cleared"""
+
+	def __init__(self):
+		super().__init__()
+		self.url = 'about:blank'
+		self.restored = []
+		self.cleared = []
+
+	async def goto(self, url):
+		self.url = url
+		self.emit('domcontentloaded', self)
+		await asyncio.sleep(0)
+
+	async def evaluate(self, script, arg):
+		if isinstance(arg, str):
+			self.cleared.append(arg)
+		else:
+			self.restored.append(arg)
+		return True
+
+
+class DummyContext(EventEmitter):
+	"""Stands in for a Playwright BrowserContext with a cookie jar and pages"""
+
+	def __init__(self, token: str = 'new'):
+		super().__init__()
+		self.cookies = []
+		self.pages = []
+		self.token = token
+
+	async def new_page(self):
+		page = DummyPage()
+		self.pages.append(page)
+		self.emit('page', page)
+		return page
+
+	async def storage_state(self):
+		local_storage = [{'name': 'token', 'value': self.token}]
+		return {'cookies': list(self.cookies), 'origins': [{'origin': 'https://tv.example.com', 'localStorage': local_storage}]}
+
+	async def add_cookies(self, cookies):
+		self.cookies.extend(cookies)
+
+	async def clear_cookies(self, name=None, domain=None, path=None):
+		def matches(cookie):
+			return all(
+				value is None or cookie[key] == value for key, value in (('name', name), ('domain', domain), ('path', path))
+			)
+
+		self.cookies = [cookie for cookie in self.cookies if not matches(cookie)]
+
+
+def read_json(path: Path):
+	return json.loads(path.read_text())
+
+
+SESSION_COOKIE = {'name': 'session', 'value': 'secret', 'domain': 'tv.example.com', 'path': '/', 'sameSite': 'Lax'}
+
+
+async def fake_login(context):
+	context.cookies.append(SESSION_COOKIE)
+
+
+async def has_session_cookie(context):
+	return any(cookie['name'] == 'session' for cookie in context.cookies)
+
+
+async def test_login_runs_once_and_is_reused(tmp_path):
+	"""
+	The first context logs in and caches its storage state, the next one restores it without logging in.
+	"""
+	cache = LoginStateCache(cache_dir=tmp_path)
+
+	assert await cache.ensure_logged_in(DummyContext(), 'tv', 'alice', login=fake_login, is_logged_in=has_session_cookie) is False
+
+	second = DummyContext()
+	assert await cache.ensure_logged_in(second, 'tv', 'alice', login=fake_login, is_logged_in=has_session_cookie) is True
+	assert second.cookies == [SESSION_COOKIE]
+
+	# localStorage is restored once, on the first page that loads the cached origin
+	page = await second.new_page()
+	await page.goto('https://tv.example.com.other.net/')
+	await page.goto('https://tv.example.com/home')
+	await page.goto('https://tv.example.com/profile')
+	assert [entry['localStorage'] for entry in page.restored] == [[{'name': 'token', 'value': 'new'}]]
+	assert not second.listeners['page'] and not page.listeners['domcontentloaded']
+
+	# other accounts do not share the login state
+	assert await cache.load('tv', 'bob') is None
+
+
+async def test_expired_or_invalid_state_falls_back_to_login(tmp_path):
+	"""
+	Expired entries are ignored, and a cached state that fails the probe is replaced by a fresh login.
+	"""
+	cache = LoginStateCache(cache_dir=tmp_path)
+	await cache.ensure_logged_in(DummyContext(), 'tv', 'alice', login=fake_login, is_logged_in=has_session_cookie, ttl=-1)
+	assert await cache.load('tv', 'alice') is None
+
+	await cache.ensure_logged_in(DummyContext(), 'tv', 'alice', login=fake_login, is_logged_in=has_session_cookie)
+	logins = 0
+
+	async def counting_login(context):
+		nonlocal logins
+		logins += 1
+		await fake_login(context)
+
+	async def probe_rejects_cached_state(context):
+		return logins > 0
+
+	reused = await cache.ensure_logged_in(
+		DummyContext(), 'tv', 'alice', login=counting_login, is_logged_in=probe_rejects_cached_state
+	)
+	assert reused is False
+	assert logins == 1
+
+	assert read_json(cache._path('tv', 'alice'))['expires_at'] > time.time()
+
+
+async def test_outdated_state_is_removed_before_a_new_login(tmp_path):
+	"""
+	When the probe rejects the cached state, the login does not see its cookies or localStorage, and its localStorage
+	is not restored on top of the new login either.
+	"""
+	cache = LoginStateCache(cache_dir=tmp_path)
+	await cache.ensure_logged_in(DummyContext(token='old'), 'tv', 'alice', login=fake_login, is_logged_in=has_session_cookie)
+
+	other_cookie = {'name': 'consent', 'value': 'yes', 'domain': 'tv.example.com', 'path': '/'}
+	context = DummyContext()
+	context.cookies.append(other_cookie)
+	probe_page = await context.new_page()
+	logins = 0
+
+	async def checking_login(context):
+		nonlocal logins
+		logins += 1
+		assert context.cookies == [other_cookie]
+		assert probe_page.cleared == ['https://tv.example.com']
+		await fake_login(context)
+
+	async def probe_rejects_cached_state(context):
+		if not logins:
+			await probe_page.goto('https://tv.example.com/profile')
+		return logins > 0
+
+	await cache.ensure_logged_in(context, 'tv', 'alice', login=checking_login, is_logged_in=probe_rejects_cached_state)
+	assert logins == 1
+	assert [entry['localStorage'][0]['value'] for entry in probe_page.restored] == ['old']
+
+	page = await context.new_page()
+	await page.goto('https://tv.example.com/')
+	assert page.restored == []
+	assert read_json(cache._path('tv', 'alice'))['storage_state']['origins'][0]['localStorage'][0]['value'] == 'new'
+
+
+async def test_failed_login_raises(tmp_path):
+	"""
+	A login after which the probe still fails raises and caches nothing.
+	"""
+	cache = LoginStateCache(cache_dir=tmp_path)
+
+	async def broken_login(context):
+		pass
+
+	with pytest.raises(BrowserError):
+		await cache.ensure_logged_in(DummyContext(), 'tv', 'alice', login=broken_login, is_logged_in=has_session_cookie)
+	assert await cache.load('tv', 'alice') is None
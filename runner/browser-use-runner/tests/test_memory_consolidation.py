@@ -0,0 +1,63 @@
+import asyncio
+import threading
+from unittest.mock import Mock
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from browser_use.agent.memory.service import Memory
+from browser_use.agent.memory.views import MemoryConfig
+from browser_use.agent.message_manager.service import MessageManager
+
+
+def make_memory(mem0_add) -> Memory:
+	"""A Memory with a replaced mem0 client, the real one needs an embedding model"""
+	memory = Memory.__new__(Memory)
+	memory.message_manager = MessageManager(task='task', system_message=SystemMessage(content='system prompt'))
+	memory.config = MemoryConfig(agent_id='test')
+	memory.mem0 = Mock(add=mem0_add)
+	memory._consolidations = set()
+	memory._consolidating = set()
+	for i in range(3):
+		memory.message_manager._add_message_with_tokens(AIMessage(content=f'step {i}'))
+	return memory
+
+
+async def test_consolidation_runs_in_background_and_keeps_new_messages():
+	"""
+	The step continues while mem0 runs, messages added meanwhile stay after the memory message.
+	"""
+	release = threading.Event()
+
+	def mem0_add(**kwargs):
+		release.wait(5)
+		return {'results': [{'memory': 'summary of steps 0-2'}]}
+
+	memory = make_memory(mem0_add)
+	history = memory.message_manager.state.history
+
+	assert memory.schedule_procedural_memory(current_step=3)
+	# bounded: a second consolidation is skipped while the first is running
+	assert not memory.schedule_procedural_memory(current_step=4)
+
+	memory.message_manager._add_message_with_tokens(HumanMessage(content='added while consolidating'))
+	await asyncio.sleep(0.05)
+	assert not any(m.metadata.message_type == 'memory' for m in history.messages)
+
+	release.set()
+	await memory.wait_for_consolidations()
+
+	contents = [m.message.content for m in history.messages if m.metadata.message_type != 'init']
+	assert contents == ['summary of steps 0-2', 'added while consolidating']
+	assert history.current_tokens == sum(m.metadata.tokens for m in history.messages)
+
+
+async def test_failed_consolidation_leaves_history_untouched():
+	memory = make_memory(Mock(side_effect=RuntimeError('embedding service down')))
+	history = memory.message_manager.state.history
+	before = [m.message.content for m in history.messages]
+
+	assert memory.schedule_procedural_memory(current_step=3)
+	await memory.wait_for_consolidations()
+
+	assert [m.message.content for m in history.messages] == before
+	assert memory._consolidating == set()
@@ -0,0 +1,41 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from browser_use.agent.message_manager.views import MessageHistory, MessageMetadata
+
+
+def make_history() -> MessageHistory:
+	history = MessageHistory()
+	history.add_message(SystemMessage(content='system'), MessageMetadata(tokens=10, message_type='init'))
+	history.add_message(HumanMessage(content='snapshot'), MessageMetadata(tokens=50, message_type='page_snapshot'))
+	history.add_message(AIMessage(content='output'), MessageMetadata(tokens=20))
+	history.add_message(HumanMessage(content='state'), MessageMetadata(tokens=100))
+	return history
+
+
+def test_running_total_and_type_index_follow_every_change():
+	history = make_history()
+	assert history.current_tokens == 180
+
+	history.remove_last_state_message()
+	assert history.current_tokens == 80
+	assert [m.message.content for m in history.get_messages_of_type('page_snapshot')] == ['snapshot']
+
+	history.set_message_type(history.messages[1], None)
+	assert history.get_messages_of_type('page_snapshot') == []
+	history.update_tokens(history.messages[1], 5)
+	assert history.current_tokens == 35
+
+	history.remove_oldest_message()
+	assert history.current_tokens == 30
+	assert history.current_tokens == sum(m.metadata.tokens for m in history.messages)
+
+
+def test_type_index_is_rebuilt_for_loaded_histories():
+	"""
+	Histories restored from a dump (e.g. a saved agent state) know their message types without extra work.
+	"""
+	history = MessageHistory.model_validate(make_history().model_dump())
+	assert history.current_tokens == 180
+	history.remove_messages_of_type('page_snapshot')
+	assert history.current_tokens == 130
+	assert [m.message.content for m in history.messages] == ['system', 'output', 'state']
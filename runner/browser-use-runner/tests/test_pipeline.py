@@ -0,0 +1,66 @@
+import asyncio
+from unittest.mock import Mock
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from browser_use.agent.pipeline import BackgroundWork
+from browser_use.agent.service import Agent
+
+
+async def test_background_work_keeps_order_per_kind_and_survives_errors():
+	background = BackgroundWork()
+	done = []
+
+	async def write(i: int):
+		await asyncio.sleep(0.02 if i == 0 else 0)
+		if i == 1:
+			raise OSError('disk full')
+		done.append(i)
+
+	for i in range(2):
+		await background.submit('conversation', lambda i=i: write(i))
+	# the caller was not blocked by the slow first write
+	assert done == []
+
+	# more pending work than MAX_PENDING_PER_KIND waits for the last submitted one
+	for i in range(2, 4):
+		await background.submit('conversation', lambda i=i: write(i))
+	assert done == [0]
+
+	await background.drain()
+	assert done == [0, 2, 3]
+	durations = background.take_durations()
+	assert list(durations) == ['background.conversation'] and durations['background.conversation'] >= 0.02
+	assert background.take_durations() == {}
+
+
+async def test_pipelined_step_callback_does_not_block_the_step(tmp_path):
+	release = asyncio.Event()
+	seen = []
+
+	async def slow_callback(state, model_output, n_steps):
+		await release.wait()
+		seen.append(n_steps)
+
+	agent = Agent(
+		task='Find the docs',
+		llm=FakeListChatModel(responses=['unused']),
+		browser=Mock(),
+		browser_context=Mock(),
+		enable_memory=False,
+		register_new_step_callback=slow_callback,
+		save_conversation_path=str(tmp_path / 'conversation'),
+		pipeline_steps=True,
+	)
+	agent.state.n_steps = 3
+	model_output = agent.AgentOutput(
+		current_state={'evaluation_previous_goal': '', 'memory': '', 'next_goal': 'open the docs'}, action=[]
+	)
+
+	await asyncio.wait_for(agent._report_step(Mock(), model_output, []), timeout=1)
+	assert seen == []
+
+	release.set()
+	await agent._background.drain()
+	assert seen == [3]
+	assert 'open the docs' in (tmp_path / 'conversation_3.txt').read_text()
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import urllib.request
+from unittest.mock import Mock
+
+from browser_use.agent.views import ActionResult, AgentHistory, AgentHistoryList, StepMetadata
+from browser_use.browser.views import BrowserStateHistory
+from browser_use.controller.service import Controller
+from browser_use.profiling import PhaseMetrics, create_unprofiled_task, profile_step, record_phase, serve_metrics
+from browser_use.utils import time_execution_async
+
+
+@time_execution_async('--build', phase='dom.build')
+async def build():
+	await asyncio.sleep(0.01)
+
+
+async def test_phases_are_recorded_only_while_profiling_a_step():
+	controller = Controller()
+
+	@controller.action('Say hello')
+	async def say_hello():
+		await asyncio.sleep(0.01)
+		return ActionResult(extracted_content='hello')
+
+	phases: dict[str, float] = {}
+	await build()
+	assert phases == {}
+
+	with profile_step(phases):
+		await build()
+		await build()
+		await controller.act(controller.registry.create_action_model()(say_hello={}), browser_context=Mock())
+
+	assert sorted(phases) == ['action.say_hello', 'dom.build']
+	assert phases['dom.build'] >= 0.02 and phases['action.say_hello'] >= 0.01
+
+	await build()
+	assert sorted(phases) == ['action.say_hello', 'dom.build']
+
+
+async def test_tasks_that_outlive_the_step_are_not_profiled_into_it():
+	async def prompt(seconds: float):
+		record_phase('prompt', seconds)
+
+	phases: dict[str, float] = {}
+	with profile_step(phases):
+		background = create_unprofiled_task(prompt(5.0))
+		await asyncio.create_task(prompt(1.0))
+	await background
+
+	assert phases == {'prompt': 1.0}
+
+
+def test_metrics_are_served_as_prometheus_histograms():
+	metrics = PhaseMetrics(buckets=(0.1, 1.0))
+	metrics.observe({'llm': 0.5, 'screenshot': 0.05})
+	metrics.observe({'llm': 2.0})
+
+	server = serve_metrics(0, metrics=metrics)
+	try:
+		with urllib.request.urlopen(f'http://127.0.0.1:{server.server_port}/metrics', timeout=5) as response:
+			text = response.read().decode()
+	finally:
+		server.shutdown()
+
+	assert 'browser_use_step_phase_seconds_bucket{phase="llm",le="0.1"} 0' in text
+	assert 'browser_use_step_phase_seconds_bucket{phase="llm",le="1.0"} 1' in text
+	assert 'browser_use_step_phase_seconds_bucket{phase="llm",le="+Inf"} 2' in text
+	assert 'browser_use_step_phase_seconds_sum{phase="llm"} 2.5' in text
+	assert 'browser_use_step_phase_seconds_count{phase="screenshot"} 1' in text
+
+
+def test_step_profile_is_saved_as_json_lines(tmp_path):
+	state = BrowserStateHistory(url='', title='', tabs=[], interacted_element=[], screenshot=None)
+	history = AgentHistoryList(
+		history=[
+			AgentHistory(
+				model_output=None,
+				result=[ActionResult()],
+				state=state,
+				metadata=StepMetadata(
+					step_number=1, step_start_time=10.0, step_end_time=12.5, input_tokens=900, phase_durations={'llm': 1.5}
+				),
+			),
+			AgentHistory(model_output=None, result=[ActionResult(error='failed')], state=state, metadata=None),
+		]
+	)
+
+	path = tmp_path / 'profile.jsonl'
+	history.save_step_profile(path)
+	history.save_step_profile(path, append=True)
+
+	records = [json.loads(line) for line in path.read_text().splitlines()]
+	assert len(records) == 2
+	assert records[0] == {'step': 1, 'start': 10.0, 'duration': 2.5, 'input_tokens': 900, 'phases': {'llm': 1.5}}
@@ -0,0 +1,79 @@
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
+from browser_use.agent.views import ActionResult, AgentBrain, AgentOutput
+from browser_use.browser.views import BrowserState, TabInfo
+from browser_use.controller.registry.views import ActionModel
+from browser_use.dom.views import DOMElementNode
+
+
+def make_state() -> BrowserState:
+	root = DOMElementNode(tag_name='body', xpath='/body', attributes={}, children=[], is_visible=True, parent=None)
+	return BrowserState(
+		element_tree=root,
+		selector_map={},
+		url='https://example.com',
+		title='Example',
+		tabs=[TabInfo(page_id=0, url='https://example.com', title='Example')],
+	)
+
+
+def cache_control_positions(messages) -> list[int]:
+	return [
+		i
+		for i, message in enumerate(messages)
+		if isinstance(message.content, list)
+		and any('cache_control' in item for item in message.content if isinstance(item, dict))
+	]
+
+
+def run_step(message_manager: MessageManager, page_filtered_actions: str | None = None) -> list:
+	message_manager.add_state_message(
+		make_state(),
+		[ActionResult(extracted_content='clicked', include_in_memory=True)],
+		page_filtered_actions=page_filtered_actions,
+	)
+	messages = message_manager.get_messages()
+	message_manager._remove_last_state_message()
+	message_manager.add_model_output(
+		AgentOutput(current_state=AgentBrain(evaluation_previous_goal='', memory='', next_goal=''), action=[ActionModel()])
+	)
+	return messages
+
+
+def test_cache_control_marks_stable_prefix_without_touching_history():
+	"""
+	Breakpoints are set on the system prompt, the end of the init messages and the last message before the state,
+	only on the messages sent to the model.
+	"""
+	message_manager = MessageManager(
+		task='Find the docs',
+		system_message=SystemMessage(content='system prompt'),
+		settings=MessageManagerSettings(add_cache_control=True),
+	)
+
+	messages = run_step(message_manager)
+	positions = cache_control_positions(messages)
+	assert positions[0] == 0
+	assert len(positions) == 3
+	assert max(positions) < len(messages) - 1
+	assert messages[max(positions)].content[0]['text'] == 'Action result: clicked'
+
+	assert cache_control_positions(message_manager.get_messages()) == positions
+	message_manager.settings.add_cache_control = False
+	assert cache_control_positions(message_manager.get_messages()) == []
+	assert all(isinstance(m.message.content, str) for m in message_manager.state.history.messages[:3])
+
+
+def test_page_actions_do_not_change_the_history_prefix():
+	"""
+	Page specific actions are part of the state message, so the messages before it are identical across steps.
+	"""
+	message_manager = MessageManager(task='Find the docs', system_message=SystemMessage(content='system prompt'))
+
+	first = run_step(message_manager, page_filtered_actions='special_action: does something')
+	assert 'special_action' in first[-1].content
+	second = run_step(message_manager)
+	assert [m.content for m in second[: len(first) - 1]] == [m.content for m in first[:-1]]
+	assert not any('special_action' in str(m.content) for m in second)
+	assert isinstance(second[-1], HumanMessage)
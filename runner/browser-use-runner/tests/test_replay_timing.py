@@ -0,0 +1,102 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from browser_use.agent.service import Agent
+from browser_use.agent.views import ActionResult, AgentHistory, AgentHistoryList
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.browser.views import BrowserState, BrowserStateHistory
+from browser_use.dom.history_tree_processor.service import HistoryTreeProcessor
+from browser_use.dom.views import DOMElementNode
+
+CURRENT_STATE = {'evaluation_previous_goal': '', 'memory': '', 'next_goal': ''}
+
+
+def make_tree() -> tuple[DOMElementNode, DOMElementNode, DOMElementNode]:
+	def node(tag_name: str, xpath: str, parent: DOMElementNode | None, index: int | None = None) -> DOMElementNode:
+		element = DOMElementNode(
+			tag_name=tag_name, xpath=xpath, attributes={}, children=[], is_visible=True, parent=parent, highlight_index=index
+		)
+		if parent is not None:
+			parent.children.append(element)
+		return element
+
+	body = node('body', 'html/body', None)
+	button = node('button', 'html/body/button', body, index=3)
+	iframe = node('iframe', 'html/body/iframe', body)
+	framed_button = node('button', 'html/body/button', node('body', 'html/body', node('html', 'html', iframe)), index=4)
+	return body, button, framed_button
+
+
+def make_agent() -> Agent:
+	agent = Agent(
+		task='replay', llm=FakeListChatModel(responses=['unused']), browser=Mock(), browser_context=Mock(), enable_memory=False
+	)
+	body, button, framed_button = make_tree()
+	selector_map = {3: button, 4: framed_button}
+	state = BrowserState(element_tree=body, selector_map=selector_map, url='https://example.com', title='', tabs=[])
+	agent.browser_context.get_state = AsyncMock(return_value=state)
+	agent.multi_act = AsyncMock(return_value=[ActionResult()])
+	return agent
+
+
+def make_history(agent: Agent) -> AgentHistoryList:
+	_, button, framed_button = make_tree()
+	steps = [
+		({'click_element_by_index': {'index': 3}}, HistoryTreeProcessor.convert_dom_element_to_history_element(button)),
+		({'click_element_by_index': {'index': 4}}, HistoryTreeProcessor.convert_dom_element_to_history_element(framed_button)),
+		({'scroll_down': {}}, None),
+	]
+	return AgentHistoryList(
+		history=[
+			AgentHistory(
+				model_output=agent.AgentOutput.model_validate({'current_state': CURRENT_STATE, 'action': [action]}),
+				result=[ActionResult()],
+				state=BrowserStateHistory(url='https://example.com', title='', tabs=[], interacted_element=[interacted]),
+			)
+			for action, interacted in steps
+		]
+	)
+
+
+async def test_replay_waits_for_the_elements_of_each_step_instead_of_sleeping():
+	agent = make_agent()
+	agent.browser_context.wait_for_elements = AsyncMock(return_value=True)
+
+	with patch('browser_use.agent.service.asyncio.sleep', new=AsyncMock()) as sleep:
+		results = await agent.rerun_history(make_history(agent), wait_timeout=4)
+
+	assert len(results) == 3
+	sleep.assert_not_awaited()
+	# elements inside iframes have xpaths relative to the frame and are not waited for
+	assert [call.args for call in agent.browser_context.wait_for_elements.await_args_list] == [
+		(['html/body/button'], 4),
+		([], 4),
+		([], 4),
+	]
+
+
+async def test_fixed_delay_is_the_fallback_when_the_page_is_not_ready():
+	agent = make_agent()
+	agent.browser_context.wait_for_elements = AsyncMock(side_effect=[False, True, True])
+
+	with patch('browser_use.agent.service.asyncio.sleep', new=AsyncMock()) as sleep:
+		await agent.rerun_history(make_history(agent), delay_between_actions=1.5)
+
+	sleep.assert_awaited_once_with(1.5)
+	assert agent.multi_act.await_count == 3
+
+
+async def test_wait_for_elements_is_bounded_by_the_timeout():
+	page = Mock(wait_for_load_state=AsyncMock(), wait_for_selector=AsyncMock())
+	context = BrowserContext(browser=Mock(), config=BrowserContextConfig())
+	context.get_agent_current_page = AsyncMock(return_value=page)
+
+	assert await context.wait_for_elements(['html/body/button'], timeout=2)
+	page.wait_for_load_state.assert_awaited_once_with('domcontentloaded', timeout=2000)
+	assert page.wait_for_selector.await_args.args == ('xpath=/html/body/button',)
+	assert 0 < page.wait_for_selector.await_args.kwargs['timeout'] <= 2000
+
+	page.wait_for_selector.side_effect = TimeoutError('Timeout 2000ms exceeded')
+	assert not await context.wait_for_elements(['html/body/button'], timeout=2)
+	assert not await context.wait_for_elements([], timeout=0)
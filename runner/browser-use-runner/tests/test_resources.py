@@ -0,0 +1,69 @@
+import os
+import socket
+
+import pytest
+
+from browser_use.browser.resources import ResourceAllocator, ResourceExhaustedError
+
+
+def test_port_leases_are_exclusive_across_allocators(tmp_path):
+	"""
+	Two allocators sharing a lock directory (e.g. two scripts on one host) never hand out the same port,
+	and a released port can be leased again.
+	"""
+	first = ResourceAllocator(lock_dir=tmp_path)
+	second = ResourceAllocator(lock_dir=tmp_path)
+
+	with socket.socket() as s:
+		s.bind(('127.0.0.1', 0))
+		start = s.getsockname()[1] + 1
+
+	lease_a = first.lease_port(start, start + 10)
+	lease_b = second.lease_port(start, start + 10)
+	assert lease_a.value != lease_b.value
+
+	lease_a.release()
+	lease_a.release()
+	assert not lease_a.lock_path.exists()
+	assert second.lease_port(lease_a.value, lease_a.value + 1).value == lease_a.value
+
+
+def test_bound_port_is_skipped(tmp_path):
+	"""
+	A port something already listens on is never leased.
+	"""
+	allocator = ResourceAllocator(lock_dir=tmp_path)
+	with socket.socket() as s:
+		s.bind(('127.0.0.1', 0))
+		s.listen()
+		port = s.getsockname()[1]
+		with pytest.raises(ResourceExhaustedError):
+			allocator.lease_port(port, port + 1)
+
+
+def test_stale_lock_of_dead_process_is_reclaimed(tmp_path):
+	"""
+	A lock left behind by a process that no longer runs does not block the resource.
+	"""
+	allocator = ResourceAllocator(lock_dir=tmp_path)
+	with socket.socket() as s:
+		s.bind(('127.0.0.1', 0))
+		start = s.getsockname()[1] + 1
+	(tmp_path / f'port-{start}.lock').write_text(f'999999999\n{start}\n')
+	(tmp_path / f'port-{start + 1}.lock').write_text(f'{os.getpid()}\n{start + 1}\n')
+
+	assert allocator.lease_port(start, start + 2).value == start
+	with pytest.raises(ResourceExhaustedError):
+		allocator.lease_port(start + 1, start + 2)
+
+
+def test_profile_dir_is_removed_on_release(tmp_path):
+	"""
+	Leased profile directories are fresh and deleted with the lease.
+	"""
+	allocator = ResourceAllocator(lock_dir=tmp_path / 'locks')
+	lease = allocator.lease_profile_dir(tmp_path / 'profiles')
+	assert os.path.isdir(lease.value)
+
+	allocator.release_all()
+	assert not os.path.exists(lease.value)
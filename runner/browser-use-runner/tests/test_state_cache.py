@@ -0,0 +1,246 @@
+import asyncio
+from dataclasses import replace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from browser_use.agent.service import Agent
+from browser_use.agent.views import ActionResult
+from browser_use.browser.context import BrowserContext, BrowserContextConfig, BrowserSession
+from browser_use.browser.state_cache import PageFingerprint, PageStateCache
+from browser_use.browser.views import BrowserState
+from browser_use.dom.views import DOMElementNode
+
+
+def make_state(url: str) -> BrowserState:
+	root = DOMElementNode(tag_name='body', xpath='/body', attributes={}, children=[], is_visible=True, parent=None)
+	return BrowserState(element_tree=root, selector_map={}, url=url, title='', tabs=[])
+
+
+def make_page(url: str) -> Mock:
+	"""A page that never changes: its fingerprint stays the same as long as its url does"""
+	page = Mock(title=AsyncMock(return_value=url), is_closed=Mock(return_value=False))
+	page.url = url
+
+	async def evaluate(script, *args):
+		return {
+			'url': page.url,
+			'documentId': 1.0,
+			'version': 0,
+			'structure': 0,
+			'layout': 0,
+			'scrollX': 0,
+			'scrollY': 0,
+			'width': 1280,
+			'height': 1100,
+		}
+
+	page.evaluate = evaluate
+	return page
+
+
+def make_fingerprint(url: str = 'https://example.com', mutation_version: int = 0, scroll_y: int = 0) -> PageFingerprint:
+	return PageFingerprint(
+		url=url,
+		document_id=1.0,
+		mutation_version=mutation_version,
+		structure_version=0,
+		scroll_x=0,
+		scroll_y=scroll_y,
+		viewport_width=1280,
+		viewport_height=1100,
+	)
+
+
+async def test_same_key_reuses_cached_state():
+	"""
+	A state extracted for a fingerprint is returned again for the same fingerprint, and extracted again
+	once the DOM mutation counter or the scroll position changes.
+	"""
+	cache = PageStateCache()
+	page = Mock()
+	extract_calls = 0
+
+	async def extract():
+		nonlocal extract_calls
+		extract_calls += 1
+		return make_state('https://example.com')
+
+	first = await cache.get_or_extract(page, make_fingerprint(), extract)
+	second = await cache.get_or_extract(page, make_fingerprint(), extract)
+	assert first is second
+	assert extract_calls == 1
+
+	await cache.get_or_extract(page, make_fingerprint(mutation_version=1), extract)
+	await cache.get_or_extract(page, make_fingerprint(mutation_version=1, scroll_y=500), extract)
+	assert extract_calls == 3
+
+
+async def test_concurrent_calls_share_one_extraction():
+	"""
+	Concurrent callers asking for the same page state share a single in-flight extraction.
+	"""
+	cache = PageStateCache()
+	page = Mock()
+	extract_calls = 0
+	release = asyncio.Event()
+
+	async def extract():
+		nonlocal extract_calls
+		extract_calls += 1
+		await release.wait()
+		return make_state('https://example.com')
+
+	tasks = [asyncio.create_task(cache.get_or_extract(page, make_fingerprint(), extract)) for _ in range(5)]
+	await asyncio.sleep(0)
+	release.set()
+	states = await asyncio.gather(*tasks)
+
+	assert extract_calls == 1
+	assert all(state is states[0] for state in states)
+
+
+async def test_failed_extraction_is_not_cached():
+	"""
+	An extraction that raises propagates the error and leaves nothing in the cache.
+	"""
+	cache = PageStateCache()
+	page = Mock()
+
+	async def failing_extract():
+		raise RuntimeError('page crashed')
+
+	with pytest.raises(RuntimeError):
+		await cache.get_or_extract(page, make_fingerprint(), failing_extract)
+	assert cache.get(page, make_fingerprint()) is None
+
+
+async def test_get_fingerprint_handles_closed_page():
+	"""
+	A page that can no longer be evaluated has no fingerprint, so callers fall back to a fresh extraction.
+	"""
+	page = Mock()
+
+	async def evaluate(*args, **kwargs):
+		raise Exception('Target page, context or browser has been closed')
+
+	page.evaluate = evaluate
+	assert await PageStateCache.get_fingerprint(page) is None
+
+
+async def test_navigation_marks_tab_dirty_and_close_drops_it():
+	"""
+	The cached state of a background tab stays valid until the tab navigates or closes.
+	"""
+	cache = PageStateCache()
+	page = Mock()
+	listeners = {}
+	page.on = lambda event, handler: listeners.setdefault(event, handler)
+
+	async def extract():
+		return make_state('https://example.com')
+
+	await cache.get_or_extract(page, make_fingerprint(), extract)
+	assert cache.is_clean(page)
+	assert cache.get(page, make_fingerprint()) is not None
+
+	# navigations of child frames do not affect the page state
+	listeners['framenavigated'](Mock())
+	assert cache.is_clean(page)
+
+	listeners['framenavigated'](page.main_frame)
+	assert not cache.is_clean(page)
+	assert cache.get(page, make_fingerprint()) is None
+
+	await cache.get_or_extract(page, make_fingerprint(), extract)
+	assert cache.is_clean(page)
+
+	listeners['close'](page)
+	assert not cache.is_clean(page)
+
+
+def test_typing_keeps_the_elements_of_a_fingerprint():
+	fingerprint = make_fingerprint()
+	assert replace(fingerprint, mutation_version=5).has_same_elements(fingerprint)
+	assert not replace(fingerprint, mutation_version=5, layout_version=1).has_same_elements(fingerprint)
+	assert not replace(fingerprint, structure_version=1, layout_version=1).has_same_elements(fingerprint)
+	assert not replace(fingerprint, scroll_y=300).has_same_elements(fingerprint)
+
+
+async def test_multi_act_extracts_state_only_when_the_page_changed():
+	"""
+	Indexed actions after the first one only need a full state when the cheap check reports a change.
+	"""
+	agent = Agent(
+		task='Fill the form',
+		llm=FakeListChatModel(responses=['unused']),
+		browser=Mock(),
+		browser_context=Mock(),
+		enable_memory=False,
+	)
+	agent.browser_context.config.wait_between_actions = 0
+	agent.browser_context.get_selector_map = AsyncMock(return_value={})
+	agent.browser_context.remove_highlights = AsyncMock()
+	agent.browser_context.get_state = AsyncMock(return_value=make_state('https://example.com'))
+	agent._execute_action = AsyncMock(return_value=ActionResult())
+	actions = [agent.ActionModel(input_text={'index': i, 'text': 'x'}) for i in range(3)]
+
+	agent.browser_context.is_cached_state_current = AsyncMock(return_value=True)
+	assert len(await agent.multi_act(actions)) == 3
+	agent.browser_context.get_state.assert_not_awaited()
+
+	agent.browser_context.is_cached_state_current = AsyncMock(return_value=False)
+	assert len(await agent.multi_act(actions)) == 3
+	assert agent.browser_context.get_state.await_count == 2
+
+	# once a state was extracted, the cached state is no longer the one the indices refer to
+	agent.browser_context.get_state.reset_mock()
+	agent.browser_context.is_cached_state_current = AsyncMock(side_effect=[False, True])
+	assert len(await agent.multi_act(actions)) == 3
+	assert agent.browser_context.get_state.await_count == 2
+	agent.browser_context.is_cached_state_current.assert_awaited_once_with({})
+
+
+async def test_elements_in_iframes_are_never_matched_by_xpath():
+	def node(tag_name: str, xpath: str, parent: DOMElementNode | None) -> DOMElementNode:
+		return DOMElementNode(tag_name=tag_name, xpath=xpath, attributes={}, children=[], is_visible=True, parent=parent)
+
+	body = node('body', 'html/body', None)
+	button = node('button', 'html/body/button', body)
+	framed_button = node('button', 'html/body/button', node('body', 'html/body', node('iframe', 'html/body/iframe', body)))
+	page = Mock(evaluate=AsyncMock(return_value=True))
+
+	state = make_state('https://example.com')
+	state.selector_map = {1: button}
+	assert await PageStateCache.elements_match(page, state)
+
+	state.selector_map = {1: button, 2: framed_button}
+	assert not await PageStateCache.elements_match(page, state)
+	page.evaluate.assert_awaited_once()
+
+
+async def test_switching_back_to_an_unchanged_tab_reuses_its_state():
+	"""
+	Opening another tab does not change the cached state of the first tab, only the tabs of the returned state.
+	"""
+	first_tab, second_tab = make_page('https://example.com'), make_page('https://example.org')
+	context = BrowserContext(browser=Mock(), config=BrowserContextConfig(cache_page_state=True))
+	context.session = BrowserSession(context=Mock(spec=['pages'], pages=[first_tab]))
+	context._wait_for_page_and_frames_load = AsyncMock()
+	context._get_updated_state = AsyncMock(side_effect=lambda: make_state(context.agent_current_page.url))
+
+	context.agent_current_page = first_tab
+	first = await context.get_state(cache_clickable_elements_hashes=False)
+
+	context.session.context.pages.append(second_tab)
+	context.agent_current_page = second_tab
+	await context.get_state(cache_clickable_elements_hashes=False)
+
+	context.agent_current_page = first_tab
+	switched_back = await context.get_state(cache_clickable_elements_hashes=False)
+
+	assert context._get_updated_state.await_count == 2
+	assert switched_back.selector_map is first.selector_map
+	assert [tab.url for tab in switched_back.tabs] == ['https://example.com', 'https://example.org']
+	assert first.tabs == []
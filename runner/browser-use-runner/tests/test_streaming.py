@@ -0,0 +1,56 @@
+import json
+
+from browser_use.agent.streaming import StreamingActionParser
+
+RESPONSE = {
+	'current_state': {
+		'evaluation_previous_goal': 'Success - the "action" {menu} opened',
+		'memory': 'Searching for [laptops]',
+		'next_goal': 'Type the query',
+	},
+	'action': [
+		{'input_text': {'index': 4, 'text': 'gaming laptop } "quoted" \\ ]'}},
+		{'click_element': {'index': 7}},
+	],
+}
+
+
+def feed_in_chunks(parser: StreamingActionParser, text: str, size: int) -> list[list[dict]]:
+	return [parser.feed(text[i : i + size]) for i in range(0, len(text), size)]
+
+
+def test_actions_are_emitted_as_soon_as_they_are_complete():
+	"""
+	Each action is returned by the feed call that completes it, however the response is chunked,
+	and braces, brackets or keys inside strings do not confuse the parser.
+	"""
+	text = json.dumps(RESPONSE)
+	for size in (1, 3, 17, len(text)):
+		parser = StreamingActionParser()
+		emitted = feed_in_chunks(parser, text, size)
+		assert [action for chunk in emitted for action in chunk] == RESPONSE['action']
+		assert parser.actions == RESPONSE['action']
+
+	parser = StreamingActionParser()
+	first_action_end = text.index('}}', text.index('input_text')) + 2
+	assert parser.feed(text[:first_action_end]) == [RESPONSE['action'][0]]
+	assert parser.feed(text[first_action_end:]) == [RESPONSE['action'][1]]
+
+
+def test_reasoning_and_fences_before_the_json_are_skipped():
+	"""
+	Reasoning blocks and markdown fences of raw text responses are ignored, even if they contain JSON.
+	"""
+	text = '<think>maybe {"action": [{"go_back": {}}]}</think>\n```json\n' + json.dumps(RESPONSE) + '\n```'
+	parser = StreamingActionParser()
+	emitted = feed_in_chunks(parser, text, 5)
+	assert [action for chunk in emitted for action in chunk] == RESPONSE['action']
+
+
+def test_actions_after_the_array_are_ignored():
+	"""
+	Only elements of the top level "action" array count, nested "action" keys do not.
+	"""
+	text = json.dumps({'current_state': {'action': [{'nested': {}}]}, 'action': [{'done': {'text': 'ok', 'success': True}}]})
+	parser = StreamingActionParser()
+	assert parser.feed(text) == [{'done': {'text': 'ok', 'success': True}}]
@@ -0,0 +1,86 @@
+import base64
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
+from browser_use.agent.message_manager.tokenizer import (
+	Tokenizer,
+	anthropic_image_tokens,
+	get_png_size,
+	get_tokenizer,
+	openai_image_tokens,
+)
+
+
+class WordTokenizer(Tokenizer):
+	"""One token per whitespace separated word, easy to count by hand"""
+
+	def _count_text(self, text: str) -> int:
+		return len(text.split())
+
+
+def png_data_url(width: int, height: int) -> str:
+	header = b'\x89PNG\r\n\x1a\n' + b'\x00\x00\x00\rIHDR' + width.to_bytes(4, 'big') + height.to_bytes(4, 'big') + b'\x08\x06'
+	return 'data:image/png;base64,' + base64.b64encode(header + b'\x00' * 16).decode()
+
+
+def test_image_tokens_follow_provider_formulas():
+	"""
+	Screenshot sizes are read from the PNG header and priced with the provider's formula.
+	"""
+	assert get_png_size(png_data_url(1280, 1100)) == (1280, 1100)
+	assert get_png_size('data:image/jpeg;base64,/9j/4AAQ') is None
+
+	assert openai_image_tokens(1280, 1100) == 85 + 170 * 4
+	assert anthropic_image_tokens(1280, 1100) == 1878
+
+	assert get_tokenizer('gpt-4o').count_image(png_data_url(1280, 1100)) == 765
+	assert get_tokenizer('claude-3-5-sonnet').count_image(png_data_url(1280, 1100)) == 1878
+	assert get_tokenizer('some-local-model', image_tokens=800).count_image(png_data_url(1280, 1100)) == 800
+
+
+def test_history_tokens_are_exact_and_cut_keeps_exactly_the_budget():
+	"""
+	With a pluggable tokenizer the history total is the exact sum of its messages, and cutting an oversized state
+	message keeps exactly as many tokens as fit.
+	"""
+	message_manager = MessageManager(
+		task='task',
+		system_message=SystemMessage(content='one two three'),
+		settings=MessageManagerSettings(),
+		tokenizer=WordTokenizer(image_tokens=50),
+	)
+	history = message_manager.state.history
+	assert history.current_tokens == sum(m.metadata.tokens for m in history.messages)
+	budget = history.current_tokens + 100
+	message_manager.settings.max_input_tokens = budget
+
+	message_manager._add_message_with_tokens(
+		HumanMessage(
+			content=[
+				{'type': 'text', 'text': ' '.join(f'word{i}' for i in range(300))},
+				{'type': 'image_url', 'image_url': {'url': 'data:image/jpeg;base64,abc'}},
+			]
+		)
+	)
+	assert history.messages[-1].metadata.tokens == 350
+
+	message_manager.cut_messages()
+	assert history.current_tokens == budget
+	assert history.messages[-1].metadata.tokens == 100
+	assert history.current_tokens == sum(m.metadata.tokens for m in history.messages)
+	assert isinstance(history.messages[-1].message.content, str)
+
+
+def test_only_message_counts_are_cached():
+	"""
+	Whole messages are memoized, pieces counted with cache=False (e.g. serialized lines) do not fill the cache.
+	"""
+	with pytest.raises(TypeError):
+		Tokenizer()
+
+	tokenizer = WordTokenizer()
+	assert tokenizer.count_text('a b c') == 3
+	assert tokenizer.count_text('d e', cache=False) == 2
+	assert tokenizer._count_text_cached.cache_info().currsize == 1
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from browser_use.tracing import configure_tracing, set_span_attributes, trace_span
+from browser_use.utils import time_execution_async
+
+
+class Worker:
+	@time_execution_async('--act')
+	async def act(self, fail: bool = False):
+		set_span_attributes(action='click')
+		if fail:
+			raise RuntimeError('element not found')
+
+	@time_execution_async('--step')
+	async def step(self):
+		await self.act()
+		with pytest.raises(RuntimeError):
+			await self.act(fail=True)
+
+
+@pytest.fixture(autouse=True)
+def disable_tracing():
+	yield
+	configure_tracing(None)
+
+
+async def test_nested_spans_are_written_as_chrome_trace_events(tmp_path):
+	path = tmp_path / 'trace.json'
+	configure_tracing(path)
+
+	await Worker().step()
+	configure_tracing(None)
+
+	# the trace event array may be left open, close it to parse it as JSON
+	events = json.loads(path.read_text().rstrip().rstrip(',') + ']')
+	assert [e['name'] for e in events] == ['Worker.act', 'Worker.act', 'Worker.step']
+	assert all(e['ph'] == 'X' and e['tid'] == events[0]['tid'] for e in events)
+	assert events[0]['args'] == {'action': 'click'}
+	assert events[1]['args']['error'] == 'RuntimeError: element not found'
+	step = events[2]
+	assert all(step['ts'] <= e['ts'] and e['ts'] + e['dur'] <= step['ts'] + step['dur'] for e in events[:2])
+
+
+async def test_jsonl_spans_link_to_their_parents(tmp_path):
+	path = tmp_path / 'trace.jsonl'
+	configure_tracing(path)
+
+	with trace_span('run', task='search'):
+		await Worker().step()
+	configure_tracing(None)
+
+	spans = {span['name']: span for span in map(json.loads, path.read_text().splitlines())}
+	assert spans['run']['parent_id'] is None and spans['run']['attributes'] == {'task': 'search'}
+	assert spans['Worker.step']['parent_id'] == spans['run']['span_id']
+	assert spans['Worker.act']['parent_id'] == spans['Worker.step']['span_id']
+	assert len({span['trace_id'] for span in spans.values()}) == 1
+
+
+async def test_unsampled_traces_are_not_written(tmp_path):
+	path = tmp_path / 'trace.jsonl'
+	configure_tracing(path, sample_rate=0.0)
+
+	with trace_span('run') as span:
+		await Worker().step()
+	configure_tracing(None)
+
+	assert span is None
+	assert not path.exists()
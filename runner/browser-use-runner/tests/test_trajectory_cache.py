@@ -0,0 +1,155 @@
+from unittest.mock import AsyncMock, Mock
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from browser_use.agent.service import Agent
+from browser_use.agent.trajectory_cache import Trajectory, TrajectoryCache, TrajectoryCacheConfig
+from browser_use.agent.views import ActionResult, AgentHistory, AgentHistoryList
+from browser_use.browser.views import BrowserState, BrowserStateHistory
+from browser_use.dom.history_tree_processor.service import HistoryTreeProcessor
+from browser_use.dom.views import DOMElementNode
+
+START_URL = 'https://tv.example.com/'
+CURRENT_STATE = {'evaluation_previous_goal': '', 'memory': '', 'next_goal': ''}
+
+
+def make_state(url: str, button_index: int) -> BrowserState:
+	body = DOMElementNode(tag_name='body', xpath='html/body', attributes={}, children=[], is_visible=True, parent=None)
+	button = DOMElementNode(
+		tag_name='button',
+		xpath='html/body/button',
+		attributes={'id': 'channel-7'},
+		children=[],
+		is_visible=True,
+		parent=body,
+		highlight_index=button_index,
+	)
+	body.children.append(button)
+	return BrowserState(element_tree=body, selector_map={button_index: button}, url=url, title='', tabs=[])
+
+
+def make_trajectory() -> Trajectory:
+	button = make_state(START_URL, 5).selector_map[5]
+	steps = [
+		(
+			START_URL,
+			[{'click_element_by_index': {'index': 5}}],
+			[HistoryTreeProcessor.convert_dom_element_to_history_element(button)],
+		),
+		(START_URL + 'channel/7', [{'scroll_down': {'amount': 500}}], [None]),
+		(START_URL + 'channel/7', [{'done': {'text': 'Channel 7 is on', 'success': True}}], [None]),
+	]
+	return Trajectory(
+		task='zap to channel 7',
+		start_url=START_URL,
+		steps=[
+			{'url': url, 'model_output': {'current_state': CURRENT_STATE, 'action': actions}, 'interacted_element': elements}
+			for url, actions, elements in steps
+		],
+	)
+
+
+def make_agent(tmp_path, pages: list[BrowserState], replay_done: bool = False) -> Agent:
+	cache = TrajectoryCache(TrajectoryCacheConfig(path=tmp_path / 'trajectories.sqlite3', replay_done=replay_done))
+	cache.put(make_trajectory())
+	agent = Agent(
+		task='zap to channel 7',
+		llm=FakeListChatModel(responses=['unused']),
+		browser=Mock(),
+		browser_context=Mock(),
+		enable_memory=False,
+		trajectory_cache=cache,
+	)
+	agent.browser_context.get_current_page = AsyncMock(return_value=Mock(url=START_URL))
+	agent.browser_context.get_state = AsyncMock(side_effect=pages)
+	agent.multi_act = AsyncMock(side_effect=lambda actions: [act(action) for action in actions])
+	return agent
+
+
+def act(action) -> ActionResult:
+	done = action.model_dump(exclude_unset=True).get('done')
+	if done is not None:
+		return ActionResult(is_done=True, success=done['success'], extracted_content=done['text'])
+	return ActionResult()
+
+
+async def test_cached_steps_are_replayed_with_re_identified_elements(tmp_path):
+	"""
+	The button moved from index 5 to 7, the replay clicks it at its new index without asking the LLM.
+	The done step is left to the LLM, so that the result is written for this run.
+	"""
+	agent = make_agent(tmp_path, [make_state(START_URL, 7), make_state(START_URL + 'channel/7', 7)])
+
+	assert await agent._replay_cached_trajectory(max_steps=10) == (2, False)
+	assert not agent.state.history.is_done()
+
+	replayed = [call.args[0][0].model_dump(exclude_unset=True) for call in agent.multi_act.await_args_list]
+	assert replayed == [{'click_element_by_index': {'index': 7}}, {'scroll_down': {'amount': 500}}]
+	assert len(agent.state.history.history) == 2
+	assert agent.state.history.total_input_tokens() == 0
+	assert agent.state.n_steps == 3
+
+
+async def test_replay_with_done_finishes_the_task(tmp_path):
+	pages = [make_state(START_URL, 5), make_state(START_URL + 'channel/7', 5), make_state(START_URL + 'channel/7', 5)]
+	agent = make_agent(tmp_path, pages, replay_done=True)
+
+	assert await agent._replay_cached_trajectory(max_steps=10) == (3, False)
+	assert agent.state.history.is_successful()
+
+
+async def test_replayed_steps_count_against_max_steps(tmp_path):
+	"""The last of max_steps is left to the LLM, so that a long trajectory can not use up the budget."""
+	agent = make_agent(tmp_path, [make_state(START_URL, 5)])
+
+	assert await agent._replay_cached_trajectory(max_steps=2) == (1, False)
+	assert agent.multi_act.await_count == 1
+	assert agent.state.n_steps == 2
+
+
+async def test_replay_stops_where_the_page_diverges(tmp_path):
+	"""
+	Replayed steps go through the hooks, the step callback and telemetry like LLM steps. The step that does not match
+	was already started, the LLM takes it over without starting it again.
+	"""
+	agent = make_agent(tmp_path, [make_state(START_URL, 5), make_state(START_URL + 'login', 5)])
+	agent.register_new_step_callback = Mock()
+	agent.telemetry = Mock()
+	on_step_start, on_step_end = AsyncMock(), AsyncMock()
+
+	replayed = await agent._replay_cached_trajectory(max_steps=10, on_step_start=on_step_start, on_step_end=on_step_end)
+
+	assert replayed == (1, True)
+	assert agent.multi_act.await_count == 1
+	assert len(agent.state.history.history) == 1
+	assert on_step_start.await_count == 2
+	on_step_end.assert_awaited_once_with(agent)
+	state, model_output, n_steps = agent.register_new_step_callback.call_args.args
+	assert (state.url, n_steps) == (START_URL, 2)
+	assert model_output.action[0].model_dump(exclude_unset=True) == {'click_element_by_index': {'index': 5}}
+	assert agent.telemetry.capture.call_args.args[0].step == 2
+
+
+def test_failed_steps_are_not_cached(tmp_path):
+	cache = TrajectoryCache(TrajectoryCacheConfig(path=tmp_path / 'trajectories.sqlite3'))
+	agent = Agent(
+		task='t', llm=FakeListChatModel(responses=['unused']), browser=Mock(), browser_context=Mock(), enable_memory=False
+	)
+
+	def item(action: dict, result: ActionResult) -> AgentHistory:
+		state = BrowserStateHistory(url=START_URL, title='', tabs=[], interacted_element=[None])
+		model_output = agent.AgentOutput.model_validate({'current_state': CURRENT_STATE, 'action': [action]})
+		return AgentHistory(model_output=model_output, result=[result], state=state)
+
+	history = AgentHistoryList(
+		history=[
+			item({'go_to_url': {'url': 'https://example.com'}}, ActionResult(error='timeout')),
+			item({'go_to_url': {'url': 'https://example.com'}}, ActionResult()),
+		]
+	)
+	cache.put(Trajectory.from_history('open example', START_URL, history))
+
+	trajectory = cache.get('open example ', START_URL)
+	assert trajectory is not None and len(trajectory.steps) == 1
+	assert cache.get('open example', 'about:blank') is None
+	assert (cache.hits, cache.misses) == (1, 1)
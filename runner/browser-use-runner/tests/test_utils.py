@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import threading
+import time
+
+from browser_use.utils import LoopLagMonitor, ainvoke_llm
+
+
+async def test_ainvoke_llm_runs_sync_only_models_in_a_thread():
+	"""
+	A model that only implements a blocking invoke does not block the event loop.
+	"""
+	loop_thread = threading.get_ident()
+
+	class SyncOnlyModel:
+		def invoke(self, messages):
+			time.sleep(0.2)
+			return threading.get_ident()
+
+	ticks = 0
+
+	async def ticker():
+		nonlocal ticks
+		while True:
+			await asyncio.sleep(0.01)
+			ticks += 1
+
+	ticker_task = asyncio.create_task(ticker())
+	invoke_thread = await ainvoke_llm(SyncOnlyModel(), ['hi'])
+	ticker_task.cancel()
+
+	assert invoke_thread != loop_thread
+	assert ticks > 5
+
+
+async def test_loop_lag_monitor_warns_about_blocking_calls(caplog):
+	"""
+	Blocking the loop longer than the threshold is reported, and the monitor is shared per loop.
+	"""
+	monitor = LoopLagMonitor.ensure_running(threshold=0.1)
+	assert monitor is not None
+	assert LoopLagMonitor.ensure_running(threshold=0.1) is monitor
+	assert LoopLagMonitor.ensure_running(threshold=0) is None
+
+	await asyncio.sleep(0.15)
+	with caplog.at_level(logging.WARNING, logger='browser_use.utils'):
+		time.sleep(0.3)  # noqa: ASYNC251 - blocking the loop on purpose is what the monitor has to detect
+		await asyncio.sleep(0.15)
+
+	assert monitor.max_lag >= 0.2
+	assert any('Event loop was blocked' in record.message for record in caplog.records)
+
+	# the monitor keeps running until its last user released it
+	await monitor.release()
+	assert monitor.running
+	await monitor.release()
+	assert not monitor.running
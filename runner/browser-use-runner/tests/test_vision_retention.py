@@ -0,0 +1,85 @@
+import base64
+
+from langchain_core.messages import SystemMessage
+
+from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
+from browser_use.agent.message_manager.tokenizer import CharacterEstimateTokenizer
+from browser_use.agent.message_manager.views import VisionRetentionPolicy
+from browser_use.agent.views import AgentStepInfo
+from browser_use.browser.views import BrowserState, TabInfo
+from browser_use.dom.views import DOMElementNode
+
+SCREENSHOT = base64.b64encode(b'not really a png').decode()
+
+
+def make_state() -> BrowserState:
+	root = DOMElementNode(tag_name='body', xpath='/body', attributes={}, children=[], is_visible=True, parent=None)
+	return BrowserState(
+		element_tree=root,
+		selector_map={},
+		url='https://example.com',
+		title='Example',
+		tabs=[TabInfo(page_id=0, url='https://example.com', title='Example')],
+		screenshot=SCREENSHOT,
+	)
+
+
+def run_steps(message_manager: MessageManager, steps: int) -> None:
+	for step in range(steps):
+		message_manager.add_state_message(make_state(), step_info=AgentStepInfo(step_number=step, max_steps=10))
+		message_manager._remove_last_state_message(keep_screenshot=True)
+
+
+def screenshot_labels(message_manager: MessageManager) -> list[str]:
+	return [
+		m.message.content[0]['text']
+		for m in message_manager.state.history.messages
+		if isinstance(m.message.content, list) and any('image_url' in item for item in m.message.content)
+	]
+
+
+def make_message_manager(policy: VisionRetentionPolicy) -> MessageManager:
+	return MessageManager(
+		task='task',
+		system_message=SystemMessage(content='system prompt'),
+		settings=MessageManagerSettings(vision_retention=policy),
+		tokenizer=CharacterEstimateTokenizer(image_tokens=800),
+	)
+
+
+def test_default_policy_keeps_no_previous_screenshots():
+	message_manager = make_message_manager(VisionRetentionPolicy())
+	run_steps(message_manager, 3)
+	assert screenshot_labels(message_manager) == []
+
+
+def test_only_the_last_screenshots_are_kept_and_tokens_follow():
+	"""
+	With max_screenshots=3 the two previous screenshots stay, older ones become placeholders.
+	"""
+	message_manager = make_message_manager(VisionRetentionPolicy(max_screenshots=3))
+	run_steps(message_manager, 4)
+
+	assert screenshot_labels(message_manager) == [
+		'Screenshot of step 3 (https://example.com):',
+		'Screenshot of step 4 (https://example.com):',
+	]
+	history = message_manager.state.history
+	assert 'Screenshot of step 1 (https://example.com): [screenshot removed]' in [m.message.content for m in history.messages]
+	assert history.current_tokens == sum(m.metadata.tokens for m in history.messages)
+
+
+def test_cut_messages_drops_previous_screenshots_first():
+	message_manager = make_message_manager(VisionRetentionPolicy(max_screenshots=3))
+	run_steps(message_manager, 2)
+	message_manager.add_state_message(make_state(), step_info=AgentStepInfo(step_number=2, max_steps=10))
+
+	history = message_manager.state.history
+	message_manager.settings.max_input_tokens = history.current_tokens - 1000
+	message_manager.cut_messages()
+
+	assert not any(m.metadata.message_type == 'screenshot' for m in history.messages)
+	# the screenshot of the current state is kept
+	assert len(screenshot_labels(message_manager)) == 1
+	assert isinstance(history.messages[-1].message.content, list)
+	assert history.current_tokens == sum(m.metadata.tokens for m in history.messages)
@@ -22,6 +22,7 @@ import signal
 import time
 import gc
 import psutil
+from display_allocator import leased_display
 
 # Load environment variables from .env file
 load_dotenv()
@@ -134,21 +135,23 @@ async def execute_script():
     # Set environment variables
     script_env = os.environ.copy()
     script_env.update(env_vars)
-    script_env['DISPLAY'] = ':1'
 
     # Execute script
     try:
         print(f"[execute_script] Executing script: {script_path} for job {job_id}, script_id {script_id}", file=sys.stderr)
         print(f"[execute_script] Memory usage before execution: {psutil.Process().memory_info().rss / 1024 / 1024:.2f} MB", file=sys.stderr)
         # Update stream status to 'streaming' only if streaming is enabled
-        process = subprocess.run(
-            command,
-            shell=False,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            env=script_env
-        )
+        # Each script gets its own X display, so that parallel jobs do not share one screen
+        with leased_display() as display:
+            script_env['DISPLAY'] = display
+            process = subprocess.run(
+                command,
+                shell=False,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                env=script_env
+            )
 
         stdout_data = process.stdout
         stderr_data = process.stderr
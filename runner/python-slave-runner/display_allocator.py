@@ -0,0 +1,108 @@
+import os
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+# Lock files under LOCK_DIR coordinate all runner workers on this node, one private Xvfb display per running script
+LOCK_DIR = os.getenv('DISPLAY_LOCK_DIR', '/tmp/slave_runner_locks')
+DISPLAY_RANGE = range(int(os.getenv('DISPLAY_RANGE_START', '100')), int(os.getenv('DISPLAY_RANGE_END', '200')))
+XVFB_SCREEN = os.getenv('XVFB_SCREEN', '1280x720x24')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _display_in_use(number):
+    # X servers create both of these while they run
+    return os.path.exists(f'/tmp/.X{number}-lock') or os.path.exists(f'/tmp/.X11-unix/X{number}')
+
+
+def _try_lock(number):
+    lock_path = os.path.join(LOCK_DIR, f'display-{number}.lock')
+    for _ in range(2):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            try:
+                with open(lock_path) as f:
+                    pid = int(f.read().split()[0])
+            except (OSError, ValueError, IndexError):
+                return None
+            if _pid_alive(pid):
+                return None
+            # the worker holding this display died without releasing it
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write(f'{os.getpid()}\n')
+        return lock_path
+    return None
+
+
+def _start_xvfb(number, timeout=10):
+    xvfb = subprocess.Popen(
+        ['Xvfb', f':{number}', '-screen', '0', XVFB_SCREEN, '-nolisten', 'tcp'],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if os.path.exists(f'/tmp/.X11-unix/X{number}'):
+            return xvfb
+        if xvfb.poll() is not None:
+            break
+        time.sleep(0.1)
+    xvfb.kill()
+    return None
+
+
+@contextmanager
+def leased_display():
+    """
+    Yield a DISPLAY value backed by a private Xvfb server, which is stopped and released on exit.
+
+    Set SCRIPT_DISPLAY to force every script onto one display (e.g. ':1' when watching it over VNC).
+    Without Xvfb installed, the runner's own DISPLAY is used.
+    """
+    forced_display = os.getenv('SCRIPT_DISPLAY')
+    if forced_display or not shutil.which('Xvfb'):
+        yield forced_display or os.getenv('DISPLAY', ':1')
+        return
+
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    for number in DISPLAY_RANGE:
+        if _display_in_use(number):
+            continue
+        lock_path = _try_lock(number)
+        if lock_path is None:
+            continue
+        xvfb = _start_xvfb(number)
+        if xvfb is None:
+            os.remove(lock_path)
+            continue
+        print(f"[display_allocator] Leased display :{number}", file=sys.stderr)
+        try:
+            yield f':{number}'
+        finally:
+            xvfb.terminate()
+            try:
+                xvfb.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                xvfb.kill()
+            os.remove(lock_path)
+            print(f"[display_allocator] Released display :{number}", file=sys.stderr)
+        return
+
+    raise RuntimeError(f'No free display in range :{DISPLAY_RANGE.start}-:{DISPLAY_RANGE.stop - 1}')